@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import Equipo, Mantenimiento, Recurso, Evento, DatoEntrenamiento, ModeloIA
+from .models import (
+    Equipo,
+    Mantenimiento,
+    Recurso,
+    Evento,
+    DatoEntrenamiento,
+    ModeloIA,
+    Tarea,
+)
 
 
 @admin.register(Equipo)
@@ -31,6 +39,7 @@ class MantenimientoAdmin(admin.ModelAdmin):
     search_fields = ["descripcion", "tecnico_asignado"]
     date_hierarchy = "fecha_programada"
     ordering = ["-prioridad", "fecha_programada"]
+    list_select_related = ["equipo"]
 
 
 @admin.register(Recurso)
@@ -55,6 +64,7 @@ class EventoAdmin(admin.ModelAdmin):
     search_fields = ["descripcion"]
     date_hierarchy = "fecha_evento"
     ordering = ["-severidad", "-fecha_evento"]
+    list_select_related = ["equipo"]
 
 
 @admin.register(DatoEntrenamiento)
@@ -78,3 +88,11 @@ class ModeloIAAdmin(admin.ModelAdmin):
     list_filter = ["estado", "activo"]
     search_fields = ["nombre", "version"]
     ordering = ["-activo", "-fecha_creacion"]
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ["id", "tipo", "estado", "progreso", "worker", "fecha_creacion"]
+    list_filter = ["estado", "tipo"]
+    date_hierarchy = "fecha_creacion"
+    ordering = ["-fecha_creacion"]
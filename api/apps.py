@@ -13,6 +13,8 @@ class ApiConfig(AppConfig):
         """Se ejecuta cuando Django esta listo"""
         import os
 
+        from . import signals  # noqa: F401
+
         if os.environ.get("RUN_MAIN") == "true":
             self.inicializar_sistema()
 
@@ -70,6 +70,7 @@ PALABRAS_CLAVE_PRIORIDAD = {
         ("critico", 40),
         ("urgente", 45),
         ("falla", 35),
+        ("peligro", 45),
     ],
     PRIORIDAD_MEDIA: [
         ("ruido", 20),
@@ -1,8 +1,22 @@
-import random
 import math
+import os
+import random
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
+# Weight file layout (flat float64 .npy):
+#   [MAGIC, FORMAT, version, input_size, hidden_size, output_size, w1, b1, w2, b2]
+WEIGHTS_MAGIC = 0xC0E7
+WEIGHTS_FORMAT = 1
+_HEADER_SIZE = 6
 
-class CortexNN:
+
+class PurePythonCortexNN:
     """
     Cortex Neural Network: A pure Python implementation of a Multi-Layer Perceptron.
     Designed for embedding in lightweight systems without heavy ML dependencies.
@@ -103,6 +117,176 @@ class CortexNN:
 
         return sum([e**2 for e in output_errors]) / len(output_errors)  # MSE
 
+    def train_batch(self, inputs, targets, batch_size=32, epochs=1):
+        """
+        Trains over a whole dataset, sample by sample (SGD).
+        batch_size is accepted for API parity with NumpyCortexNN.
+        Returns the mean MSE of the last epoch.
+        """
+        loss = 0.0
+        for _ in range(epochs):
+            losses = [self.train(x, y) for x, y in zip(inputs, targets, strict=True)]
+            loss = sum(losses) / len(losses) if losses else 0.0
+        return loss
+
     def save_weights(self, filepath):
         # Implementation for saving state could go here
         pass
+
+
+class NumpyCortexNN:
+    """
+    Cortex Neural Network backed by NumPy.
+    Same constructor and API as PurePythonCortexNN, but forward/backprop are
+    matrix operations over 2-D batches (one row per sample).
+    """
+
+    def __init__(self, input_size, hidden_size, output_size, learning_rate=0.1):
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.output_size = output_size
+        self.learning_rate = learning_rate
+
+        # Same layout as the pure Python version: w[neuron][input]
+        self.w1 = np.random.uniform(-1, 1, (hidden_size, input_size))
+        self.b1 = np.random.uniform(-1, 1, hidden_size)
+        self.w2 = np.random.uniform(-1, 1, (output_size, hidden_size))
+        self.b2 = np.random.uniform(-1, 1, output_size)
+
+    @staticmethod
+    def sigmoid(x):
+        # Clip avoids overflow in exp (same saturation as the pure version)
+        return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))
+
+    def forward(self, inputs):
+        """
+        Forward pass through the network.
+        inputs: 1-D vector (one sample) or 2-D array (batch, input_size)
+        """
+        x = np.asarray(inputs, dtype=np.float64)
+        batch = x.reshape(-1, self.input_size)
+
+        self.z1 = batch @ self.w1.T + self.b1
+        self.a1 = self.sigmoid(self.z1)
+        self.z2 = self.a1 @ self.w2.T + self.b2
+        self.a2 = self.sigmoid(self.z2)
+
+        return self.a2 if x.ndim == 2 else self.a2[0]
+
+    def _backprop(self, x, y):
+        """One gradient step over a mini-batch. Returns the batch MSE."""
+        self._ensure_writable()
+        outputs = self.forward(x)
+        errors = y - outputs
+
+        # sigmoid'(z) = a * (1 - a)
+        output_deltas = errors * outputs * (1 - outputs)
+        hidden_deltas = (output_deltas @ self.w2) * self.a1 * (1 - self.a1)
+
+        # Gradient averaged over the batch
+        rate = self.learning_rate / len(x)
+        self.w2 += rate * output_deltas.T @ self.a1
+        self.b2 += rate * output_deltas.sum(axis=0)
+        self.w1 += rate * hidden_deltas.T @ x
+        self.b1 += rate * hidden_deltas.sum(axis=0)
+
+        return float(np.mean(errors**2))
+
+    def train(self, inputs, targets):
+        """
+        Backpropagation over a single sample (same update as the pure version).
+        """
+        x = np.asarray(inputs, dtype=np.float64).reshape(1, self.input_size)
+        y = np.asarray(targets, dtype=np.float64).reshape(1, self.output_size)
+        return self._backprop(x, y)
+
+    def train_batch(self, inputs, targets, batch_size=32, epochs=1):
+        """
+        Mini-batch training over the whole dataset.
+        inputs: (n, input_size), targets: (n, output_size)
+        Returns the mean MSE of the last epoch.
+        """
+        x = np.asarray(inputs, dtype=np.float64).reshape(-1, self.input_size)
+        y = np.asarray(targets, dtype=np.float64).reshape(-1, self.output_size)
+        if len(x) == 0:
+            return 0.0
+
+        loss = 0.0
+        for _ in range(epochs):
+            orden = np.random.permutation(len(x))
+            suma = 0.0
+            for inicio in range(0, len(x), batch_size):
+                idx = orden[inicio : inicio + batch_size]
+                suma += self._backprop(x[idx], y[idx]) * len(idx)
+            loss = suma / len(x)
+        return loss
+
+    def _ensure_writable(self):
+        """Weights loaded via mmap are read-only: copy them before updating."""
+        if not self.w1.flags.writeable:
+            self.w1, self.b1 = self.w1.copy(), self.b1.copy()
+            self.w2, self.b2 = self.w2.copy(), self.b2.copy()
+
+    def save_weights(self, filepath, version=1):
+        """
+        Writes the weights as a flat versioned .npy file.
+        The file is written next to the target and renamed (atomic publish),
+        so readers never see a half-written file.
+        """
+        header = [
+            WEIGHTS_MAGIC,
+            WEIGHTS_FORMAT,
+            version,
+            self.input_size,
+            self.hidden_size,
+            self.output_size,
+        ]
+        flat = np.concatenate(
+            [
+                np.asarray(header, dtype=np.float64),
+                self.w1.ravel(),
+                self.b1,
+                self.w2.ravel(),
+                self.b2,
+            ]
+        )
+
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, flat)
+        os.replace(tmp_path, filepath)
+
+    def load_weights(self, filepath, mmap=True):
+        """
+        Loads weights saved with save_weights. With mmap=True the arrays are
+        read-only views over the file, shared between processes by the OS
+        page cache. Returns the weights version.
+        """
+        flat = np.load(filepath, mmap_mode="r" if mmap else None)
+        magic, fmt, version, n_in, n_hidden, n_out = (
+            int(v) for v in flat[:_HEADER_SIZE]
+        )
+        if magic != WEIGHTS_MAGIC or fmt != WEIGHTS_FORMAT:
+            raise ValueError(f"Unsupported weights file: {filepath}")
+        if (n_in, n_hidden, n_out) != (
+            self.input_size,
+            self.hidden_size,
+            self.output_size,
+        ):
+            raise ValueError(
+                f"Weights shape {(n_in, n_hidden, n_out)} does not match the network"
+            )
+
+        sizes = [n_hidden * n_in, n_hidden, n_out * n_hidden, n_out]
+        offsets = np.cumsum([_HEADER_SIZE, *sizes])
+        self.w1 = flat[offsets[0] : offsets[1]].reshape(n_hidden, n_in)
+        self.b1 = flat[offsets[1] : offsets[2]]
+        self.w2 = flat[offsets[2] : offsets[3]].reshape(n_out, n_hidden)
+        self.b2 = flat[offsets[3] : offsets[4]]
+        return version
+
+
+# Default engine: NumPy when available, pure Python otherwise
+CortexNN = NumpyCortexNN if NUMPY_AVAILABLE else PurePythonCortexNN
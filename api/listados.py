@@ -0,0 +1,193 @@
+"""
+Listados rápidos de solo lectura
+
+Para los listados de mucho tráfico (mantenimientos, eventos) se evita el
+ModelSerializer: la página se lee con values_list (tuplas, sin instanciar
+modelos), las etiquetas de las opciones salen de diccionarios armados una
+vez desde api/constants.py y el JSON se escribe de una pasada con orjson
+si está instalado. El resultado es byte a byte el mismo que produce el
+serializer con JSONRenderer; test_listados lo compara.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from rest_framework import serializers
+
+from .constants import EstadoOrden, Prioridad
+from .models import Evento, Mantenimiento
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Filas por bloque al exportar (también el chunk_size del iterator)
+TAMANO_LOTE = 2000
+
+
+def _etiquetas(opciones) -> dict:
+    """{valor: etiqueta} de unas choices"""
+    return {valor: str(etiqueta) for valor, etiqueta in opciones}
+
+
+def _mostrar(opciones):
+    """Equivalente a get_<campo>_display() + CharField"""
+    etiquetas = _etiquetas(opciones)
+    return lambda valor: etiquetas.get(valor, str(valor))
+
+
+# Mismas conversiones que los campos del serializer (fechas en la zona
+# actual, decimales como texto con sus decimales)
+_fecha = serializers.DateTimeField().to_representation
+_costo = serializers.DecimalField(max_digits=10, decimal_places=2).to_representation
+
+
+def a_json(datos, libre: bool = False) -> bytes:
+    """
+    Mismos bytes que JSONRenderer. `libre` indica que hay JSON arbitrario
+    (floats con exponente, enteros enormes) que orjson escribiría distinto,
+    y entonces se usa json de la librería estándar.
+    """
+    if ORJSON_AVAILABLE and not libre:
+        contenido = orjson.dumps(datos)
+    else:
+        contenido = json.dumps(
+            datos, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+    # JSONRenderer escapa los separadores de línea de JavaScript
+    return contenido.replace("\u2028".encode(), b"\\u2028").replace(
+        "\u2029".encode(), b"\\u2029"
+    )
+
+
+def _celdas(fila: dict) -> list:
+    """Valores para CSV: lo anidado (datos) va como texto JSON"""
+    return [
+        json.dumps(valor, ensure_ascii=False)
+        if isinstance(valor, (dict, list))
+        else valor
+        for valor in fila.values()
+    ]
+
+
+class ListadoRapido:
+    """
+    Columnas (clave, origen, conversión) en el orden de los campos del
+    serializer. `origen` es un camino de values_list; varias claves pueden
+    leer la misma columna (tipo y tipo_display).
+    """
+
+    def __init__(self, columnas, libre: bool = False):
+        self.definicion = columnas
+        self.origenes = list(dict.fromkeys(origen for _, origen, _ in columnas))
+        self.columnas = [
+            (clave, self.origenes.index(origen), convertir)
+            for clave, origen, convertir in columnas
+        ]
+        self.libre = libre
+
+    def elegir(self, claves) -> "ListadoRapido":
+        """El mismo listado con solo las claves pedidas (?fields= / ?omit=)"""
+        return ListadoRapido(
+            [columna for columna in self.definicion if columna[0] in claves],
+            libre=self.libre,
+        )
+
+    def consulta(self, queryset, orden=()):
+        """
+        Tuplas con nombre. Se agregan la pk y las columnas de `orden`
+        aunque no se muestren: la paginación las lee de la última fila.
+        """
+        extra = [queryset.model._meta.pk.attname, *orden]
+        return queryset.values_list(
+            *self.origenes,
+            *(c for c in dict.fromkeys(extra) if c not in self.origenes),
+            named=True,
+        )
+
+    def filas(self, tuplas) -> list:
+        return list(self.iterar(tuplas))
+
+    def iterar(self, tuplas):
+        columnas = self.columnas
+        return (
+            {
+                clave: (
+                    fila[i]
+                    if convertir is None or fila[i] is None
+                    else convertir(fila[i])
+                )
+                for clave, i, convertir in columnas
+            }
+            for fila in tuplas
+        )
+
+    # ── Exportación en streaming ────────────────────────────
+
+    def _lotes(self, tuplas, tamano: int):
+        filas = self.iterar(tuplas)
+        while lote := list(islice(filas, tamano)):
+            yield lote
+
+    def exportar_ndjson(self, tuplas, tamano: int = TAMANO_LOTE):
+        """Un objeto JSON por línea, en bloques de `tamano` filas"""
+        for lote in self._lotes(tuplas, tamano):
+            yield b"".join(a_json(fila, libre=self.libre) + b"\n" for fila in lote)
+
+    def exportar_csv(self, tuplas, tamano: int = TAMANO_LOTE):
+        """Encabezado con las claves y una fila por registro"""
+        salida = io.StringIO()
+        escritor = csv.writer(salida)
+        escritor.writerow(clave for clave, _, _ in self.columnas)
+        for lote in self._lotes(tuplas, tamano):
+            escritor.writerows(map(_celdas, lote))
+            yield salida.getvalue().encode()
+            salida.seek(0)
+            salida.truncate()
+        if salida.tell():
+            yield salida.getvalue().encode()
+
+
+LISTADO_MANTENIMIENTOS = ListadoRapido(
+    [
+        ("id", "id", None),
+        ("tipo_display", "tipo", _mostrar(Mantenimiento.TIPOS)),
+        ("prioridad_display", "prioridad", _mostrar(Prioridad.choices)),
+        ("estado_display", "estado", _mostrar(EstadoOrden.choices)),
+        ("equipo_nombre", "equipo__nombre", None),
+        ("tipo", "tipo", None),
+        ("prioridad", "prioridad", None),
+        ("estado", "estado", None),
+        ("tecnico_asignado", "tecnico_asignado", None),
+        ("fecha_programada", "fecha_programada", _fecha),
+        ("fecha_completada", "fecha_completada", _fecha),
+        ("descripcion", "descripcion", None),
+        ("resultado", "resultado", None),
+        ("costo", "costo", _costo),
+        ("fecha_creacion", "fecha_creacion", _fecha),
+        ("equipo", "equipo_id", None),
+    ]
+)
+
+LISTADO_EVENTOS = ListadoRapido(
+    [
+        ("id", "id", None),
+        ("tipo_display", "tipo", _mostrar(Evento.TIPOS)),
+        ("equipo_nombre", "equipo__nombre", None),
+        ("tipo", "tipo", None),
+        ("severidad", "severidad", None),
+        ("descripcion", "descripcion", None),
+        ("datos", "datos", None),
+        ("resuelto", "resuelto", None),
+        ("fecha_evento", "fecha_evento", _fecha),
+        ("equipo", "equipo_id", None),
+    ],
+    # `datos` es JSON libre
+    libre=True,
+)
@@ -0,0 +1,92 @@
+"""
+Genera recomendaciones proactivas repartiendo la flota entre procesos
+"""
+
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from api.models import Equipo
+from api.servicios.recomendaciones import MotorRecomendaciones
+
+
+def _procesar_rango(tarea):
+    """Ejecuta el motor masivo sobre un rango de ids de Equipo"""
+    desde, hasta, ahora = tarea
+    inicio = time.perf_counter()
+    resultado = MotorRecomendaciones.generar_recomendaciones_lote(
+        equipos=Equipo.objects.filter(id__range=(desde, hasta)), ahora=ahora
+    )
+    resultado["rango"] = (desde, hasta)
+    resultado["duracion"] = time.perf_counter() - inicio
+    return resultado
+
+
+class Command(BaseCommand):
+    help = "Genera recomendaciones para todos los equipos, en paralelo por rangos de id"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Procesos en paralelo (1 = en el proceso actual)",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers debe ser mayor o igual a 1")
+
+        # Mismo instante de referencia en todos los procesos
+        ahora = timezone.now()
+        tareas = [
+            (desde, hasta, ahora)
+            for desde, hasta in MotorRecomendaciones.rangos_equipos(workers)
+        ]
+
+        en_paralelo = len(tareas) > 1
+        if en_paralelo and "fork" not in multiprocessing.get_all_start_methods():
+            # Los procesos hijos heredan Django ya configurado solo con fork
+            # (en Windows no existe): mismos shards, uno tras otro
+            self.stderr.write(
+                self.style.WARNING(
+                    "Esta plataforma no soporta fork: los shards se procesan "
+                    "en el proceso actual"
+                )
+            )
+            en_paralelo = False
+
+        inicio = time.perf_counter()
+        if not en_paralelo:
+            resultados = [_procesar_rango(t) for t in tareas]
+        else:
+            # Cada proceso abre su propia conexión: no heredar la del padre
+            connections.close_all()
+            contexto = multiprocessing.get_context("fork")
+            with contexto.Pool(len(tareas), initializer=connections.close_all) as pool:
+                resultados = pool.map(_procesar_rango, tareas)
+        duracion = time.perf_counter() - inicio
+
+        for numero, resultado in enumerate(resultados, start=1):
+            desde, hasta = resultado["rango"]
+            ritmo = resultado["equipos"] / max(resultado["duracion"], 1e-9)
+            self.stdout.write(
+                f"Shard {numero} [{desde}-{hasta}]: {resultado['equipos']} equipos, "
+                f"{resultado['total']} creadas, {resultado['omitidas']} omitidas "
+                f"({ritmo:.0f} equipos/s)"
+            )
+
+        total = sum(r["total"] for r in resultados)
+        omitidas = sum(r["omitidas"] for r in resultados)
+        equipos = sum(r["equipos"] for r in resultados)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} recomendaciones generadas ({omitidas} omitidas) "
+                f"para {equipos} equipos en {duracion:.2f}s "
+                f"con {len(tareas) if en_paralelo else 1} procesos"
+            )
+        )
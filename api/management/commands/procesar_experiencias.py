@@ -0,0 +1,54 @@
+"""
+Aplica a la Q-table las experiencias encoladas por /sistema/aprender/
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.servicios.ia_core import ia_sistema
+
+
+class Command(BaseCommand):
+    help = "Drena el buffer de experiencias por mini-lotes y actualiza la Q-table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=256,
+            help="Experiencias por mini-lote (default: 256)",
+        )
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="No terminar: volver a drenar cada --intervalo segundos",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5.0,
+            help="Segundos entre pasadas en modo continuo (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            resultado = ia_sistema.procesar_experiencias(lote=options["lote"])
+            duracion = time.perf_counter() - inicio
+
+            if resultado["procesadas"] or not options["continuo"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{resultado['procesadas']} experiencias en "
+                        f"{resultado['lotes']} lotes ({duracion:.2f}s), "
+                        f"{resultado['pendientes']} pendientes, "
+                        f"retorno descontado {resultado['retorno_descontado']:.2f}"
+                    )
+                )
+            if not options["continuo"]:
+                break
+            try:
+                time.sleep(options["intervalo"])
+            except KeyboardInterrupt:
+                break
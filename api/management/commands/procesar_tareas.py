@@ -0,0 +1,62 @@
+"""
+Worker de la cola de tareas (endpoints que responden 202)
+
+Se pueden lanzar varios en paralelo: cada tarea la toma un solo worker.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.servicios.tareas import ServicioTareas, identificador_worker
+
+
+class Command(BaseCommand):
+    help = "Ejecuta las tareas pendientes de la cola (una a la vez)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="No terminar al vaciar la cola: esperar nuevas tareas",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos entre consultas con la cola vacía (default: 2)",
+        )
+        parser.add_argument(
+            "--max-tareas",
+            type=int,
+            default=0,
+            help="Terminar tras ejecutar esta cantidad (0 = sin límite)",
+        )
+
+    def handle(self, *args, **options):
+        worker = identificador_worker()
+        ejecutadas = 0
+        while not options["max_tareas"] or ejecutadas < options["max_tareas"]:
+            close_old_connections()
+            inicio = time.perf_counter()
+            tarea = ServicioTareas.procesar_siguiente(worker)
+            if tarea is None:
+                if not options["continuo"]:
+                    break
+                try:
+                    time.sleep(options["intervalo"])
+                except KeyboardInterrupt:
+                    break
+                continue
+
+            ejecutadas += 1
+            estilo = self.style.SUCCESS if not tarea.error else self.style.ERROR
+            self.stdout.write(
+                estilo(
+                    f"Tarea {tarea.pk} {tarea.tipo}: {tarea.estado} "
+                    f"({time.perf_counter() - inicio:.2f}s)"
+                    + (f" - {tarea.error}" if tarea.error else "")
+                )
+            )
+        self.stdout.write(f"{ejecutadas} tareas ejecutadas por {worker}")
@@ -0,0 +1,24 @@
+"""
+Reconstruye la tabla EstadisticaEquipo desde el historial de mantenimientos
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.servicios.estadisticas import ServicioEstadisticas
+
+
+class Command(BaseCommand):
+    help = "Recalcula las estadísticas de confiabilidad de todos los equipos"
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = ServicioEstadisticas.reconstruir()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} estadísticas de equipo reconstruidas en {duracion:.2f}s"
+            )
+        )
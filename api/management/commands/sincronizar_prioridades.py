@@ -0,0 +1,48 @@
+"""
+Recalcula la prioridad de los mantenimientos pendientes a partir de su
+descripción
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.constants import ESTADO_PENDIENTE
+from api.models import Mantenimiento
+from api.servicios.comun import ServicioMantenimiento
+
+
+class Command(BaseCommand):
+    help = "Sincroniza por lotes la prioridad de los mantenimientos pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=5000,
+            help="Mantenimientos puntuados por llamada (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        pendientes = Mantenimiento.objects.filter(estado=ESTADO_PENDIENTE).order_by(
+            "pk"
+        )
+
+        revisados = cambiados = 0
+        ultimo = 0
+        while True:
+            lote = list(pendientes.filter(pk__gt=ultimo)[: options["lote"]])
+            if not lote:
+                break
+            ultimo = lote[-1].pk
+            revisados += len(lote)
+            cambiados += len(ServicioMantenimiento.sincronizar_prioridades(lote))
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{cambiados} de {revisados} prioridades actualizadas "
+                f"en {duracion:.2f}s"
+            )
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_estadisticaequipo_y_modelos_ia"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ValorQ",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("estado", models.CharField(max_length=200)),
+                ("accion", models.CharField(max_length=100)),
+                ("valor", models.FloatField(default=0.0)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Valor Q",
+                "verbose_name_plural": "Valores Q",
+                "db_table": "valor_q",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("estado", "accion"), name="valor_q_estado_accion_unico"
+                    )
+                ],
+            },
+        ),
+    ]
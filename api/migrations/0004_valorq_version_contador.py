@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_valorq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContadorVersion",
+            fields=[
+                (
+                    "nombre",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("valor", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Contador de versión",
+                "verbose_name_plural": "Contadores de versión",
+                "db_table": "contador_version",
+            },
+        ),
+        migrations.AddField(
+            model_name="valorq",
+            name="version",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
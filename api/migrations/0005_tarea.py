@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:23
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_valorq_version_contador"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tarea",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tipo", models.CharField(max_length=50, verbose_name="Tipo de tarea")),
+                (
+                    "parametros",
+                    models.JSONField(default=dict, verbose_name="Parámetros"),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("pendiente", "Pendiente"),
+                            ("en_curso", "En curso"),
+                            ("completada", "Completada"),
+                            ("fallida", "Fallida"),
+                            ("cancelada", "Cancelada"),
+                        ],
+                        default="pendiente",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "progreso",
+                    models.FloatField(default=0.0, verbose_name="Progreso (0-1)"),
+                ),
+                ("mensaje", models.CharField(blank=True, max_length=300)),
+                (
+                    "resultado",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("cancelacion_solicitada", models.BooleanField(default=False)),
+                ("worker", models.CharField(blank=True, max_length=100)),
+                ("fecha_creacion", models.DateTimeField(auto_now_add=True)),
+                ("fecha_inicio", models.DateTimeField(blank=True, null=True)),
+                ("fecha_fin", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Tarea",
+                "verbose_name_plural": "Tareas",
+                "db_table": "tarea",
+                "ordering": ["-fecha_creacion"],
+                "indexes": [
+                    models.Index(
+                        fields=["estado", "fecha_creacion"], name="tarea_cola_idx"
+                    )
+                ],
+            },
+        ),
+    ]
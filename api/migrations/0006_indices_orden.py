@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_tarea"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="equipo",
+            index=models.Index(
+                fields=["-es_critico", "nombre", "id"], name="equipo_orden_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="evento",
+            index=models.Index(
+                fields=["-severidad", "-fecha_evento", "id"], name="evento_orden_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mantenimiento",
+            index=models.Index(
+                fields=["-prioridad", "fecha_programada", "id"],
+                name="mantenimiento_orden_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recurso",
+            index=models.Index(
+                fields=["tipo", "nombre", "id"], name="recurso_orden_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def poblar_estadisticas(apps, schema_editor):
+    """
+    Llena EstadisticaEquipo en bases existentes (la tabla se creó vacía en
+    0002 y la analítica solo lee de ella). Es la misma reconstrucción que
+    `manage.py reconstruir_estadisticas`, sobre los modelos históricos.
+    """
+    from api.servicios.estadisticas import ServicioEstadisticas
+
+    ServicioEstadisticas.reconstruir(apps)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_indices_orden"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_estadisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_poblar_estadisticaequipo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tarea",
+            name="intentos",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tarea",
+            name="latido",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_tarea_latido"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="valorq",
+            name="accion",
+            field=models.CharField(max_length=150),
+        ),
+    ]
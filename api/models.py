@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from .constants import CategoriaEquipo, EspecialidadTecnico, EstadoOrden, Prioridad
 
@@ -25,6 +26,12 @@ class Equipo(models.Model):
         verbose_name = "Equipo"
         verbose_name_plural = "Equipos"
         ordering = ["-es_critico", "nombre"]
+        # Orden + id: la paginación keyset recorre este índice
+        indexes = [
+            models.Index(
+                fields=["-es_critico", "nombre", "id"], name="equipo_orden_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.empresa_nombre})"
@@ -70,6 +77,12 @@ class Mantenimiento(models.Model):
         verbose_name = "Mantenimiento"
         verbose_name_plural = "Mantenimientos"
         ordering = ["-prioridad", "fecha_programada"]
+        indexes = [
+            models.Index(
+                fields=["-prioridad", "fecha_programada", "id"],
+                name="mantenimiento_orden_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.equipo.nombre}"
@@ -108,6 +121,9 @@ class Recurso(models.Model):
         verbose_name = "Recurso"
         verbose_name_plural = "Recursos"
         ordering = ["tipo", "nombre"]
+        indexes = [
+            models.Index(fields=["tipo", "nombre", "id"], name="recurso_orden_idx")
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()}: {self.nombre}"
@@ -150,6 +166,11 @@ class Evento(models.Model):
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
         ordering = ["-severidad", "-fecha_evento"]
+        indexes = [
+            models.Index(
+                fields=["-severidad", "-fecha_evento", "id"], name="evento_orden_idx"
+            )
+        ]
 
     def __str__(self):
         estado = "✓" if self.resuelto else "⚠"
@@ -303,3 +324,148 @@ class AuditLog(models.Model):
     class Meta:
         db_table = "audit_log"
         ordering = ["-fecha"]
+
+
+class EstadisticaEquipo(models.Model):
+    """Estadísticas de confiabilidad por equipo (desnormalizadas)
+
+    Se mantiene incrementalmente desde las señales de Mantenimiento
+    (api/signals.py) y se puede reconstruir con
+    ``manage.py reconstruir_estadisticas``.
+    """
+
+    VENTANA_FECHAS = 5
+
+    equipo = models.OneToOneField(
+        Equipo,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="estadistica",
+    )
+    total_mantenimientos = models.IntegerField(default=0)
+    total_completados = models.IntegerField(default=0)
+    pendientes = models.IntegerField(default=0)
+    suma_prioridad_pendientes = models.BigIntegerField(default=0)
+    costo_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    suma_intervalos_dias = models.BigIntegerField(default=0)
+    fecha_ultimo_completado = models.DateTimeField(null=True, blank=True)
+    # Fechas ISO de los últimos completados (más reciente primero)
+    ultimas_fechas = models.JSONField(default=list)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "estadistica_equipo"
+        verbose_name = "Estadística de Equipo"
+        verbose_name_plural = "Estadísticas de Equipos"
+
+    def __str__(self):
+        return f"Estadística equipo {self.equipo_id} (MTBF {self.mtbf_dias:.1f} días)"
+
+    @property
+    def mtbf_dias(self):
+        """Tiempo medio entre mantenimientos completados (días)"""
+        if self.total_completados < 2:
+            return 0.0
+        return self.suma_intervalos_dias / (self.total_completados - 1)
+
+    @property
+    def costo_promedio(self):
+        """Costo promedio de todos los mantenimientos del equipo"""
+        if not self.total_mantenimientos:
+            return 0
+        return self.costo_total / self.total_mantenimientos
+
+    @property
+    def prioridad_promedio_pendientes(self):
+        """Prioridad promedio de los mantenimientos pendientes"""
+        if not self.pendientes:
+            return 0
+        return self.suma_prioridad_pendientes / self.pendientes
+
+
+class ValorQ(models.Model):
+    """Valor Q persistido de SistemaIA (una fila por par estado/acción)"""
+
+    estado = models.CharField(max_length=200)
+    # "tecnico_{tecnico_asignado}": prefijo + hasta 100 caracteres
+    accion = models.CharField(max_length=150)
+    valor = models.FloatField(default=0.0)
+    # Versión global (ContadorVersion "q_table") de la última escritura
+    version = models.BigIntegerField(default=0, db_index=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "valor_q"
+        verbose_name = "Valor Q"
+        verbose_name_plural = "Valores Q"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["estado", "accion"], name="valor_q_estado_accion_unico"
+            )
+        ]
+
+    def __str__(self):
+        return f"Q({self.estado}, {self.accion}) = {self.valor:.4f}"
+
+
+class ContadorVersion(models.Model):
+    """Contador monotónico compartido entre procesos (invalidación de cachés)"""
+
+    nombre = models.CharField(max_length=50, primary_key=True)
+    valor = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "contador_version"
+        verbose_name = "Contador de versión"
+        verbose_name_plural = "Contadores de versión"
+
+    def __str__(self):
+        return f"{self.nombre} v{self.valor}"
+
+
+class Tarea(models.Model):
+    """Trabajo pesado encolado desde la API (lo ejecuta procesar_tareas)"""
+
+    ESTADO_PENDIENTE = "pendiente"
+    ESTADO_EN_CURSO = "en_curso"
+    ESTADO_COMPLETADA = "completada"
+    ESTADO_FALLIDA = "fallida"
+    ESTADO_CANCELADA = "cancelada"
+    ESTADOS = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_EN_CURSO, "En curso"),
+        (ESTADO_COMPLETADA, "Completada"),
+        (ESTADO_FALLIDA, "Fallida"),
+        (ESTADO_CANCELADA, "Cancelada"),
+    ]
+    ESTADOS_FINALES = (ESTADO_COMPLETADA, ESTADO_FALLIDA, ESTADO_CANCELADA)
+
+    tipo = models.CharField(max_length=50, verbose_name="Tipo de tarea")
+    parametros = models.JSONField(default=dict, verbose_name="Parámetros")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ESTADO_PENDIENTE)
+    progreso = models.FloatField(default=0.0, verbose_name="Progreso (0-1)")
+    mensaje = models.CharField(max_length=300, blank=True)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    cancelacion_solicitada = models.BooleanField(default=False)
+    # Worker que la reclamó (host:pid)
+    worker = models.CharField(max_length=100, blank=True)
+    # Veces que se reclamó (vuelve a la cola si su worker muere)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    # Última señal de vida del worker mientras está en curso
+    latido = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "tarea"
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ["-fecha_creacion"]
+        indexes = [
+            models.Index(fields=["estado", "fecha_creacion"], name="tarea_cola_idx")
+        ]
+
+    def __str__(self):
+        return f"Tarea {self.pk} {self.tipo} ({self.estado})"
@@ -0,0 +1,232 @@
+"""
+Paginación por cursor (keyset) de los listados de la API
+
+Ordena por el Meta.ordering del modelo (o el ?ordering= pedido) más la
+clave primaria como desempate, y el cursor guarda los valores de esas
+columnas en la última fila entregada. La página siguiente es un WHERE
+sobre esa tupla + LIMIT, así que la página 10.000 cuesta lo mismo que la
+primera: sin OFFSET y sin COUNT(*).
+
+Las columnas que admiten NULL se ordenan con los NULL al final, para que
+la comparación sea la misma en SQLite y PostgreSQL.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+import operator
+from decimal import Decimal
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _a_json(valor):
+    """Valor de columna → JSON sin perder precisión (μs, decimales)"""
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+class PaginacionKeyset(BasePagination):
+    """Paginación por cursor sobre el orden completo de la consulta"""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    cursor_invalido = "Cursor inválido"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.tamano = self._tamano(request)
+        self.orden = self._orden(queryset)
+        valores, atras = self._leer_cursor(request)
+
+        consulta = queryset.order_by(*self._order_by(invertir=atras))
+        if valores is not None:
+            consulta = consulta.filter(self._despues_de(valores, invertir=atras))
+        filas = list(consulta[: self.tamano + 1])
+        hay_mas = len(filas) > self.tamano
+        filas = filas[: self.tamano]
+
+        if atras:
+            filas.reverse()
+            self.hay_siguiente, self.hay_anterior = True, hay_mas
+        else:
+            self.hay_siguiente, self.hay_anterior = hay_mas, valores is not None
+        self.filas = filas
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not (self.hay_siguiente and self.filas):
+            return None
+        return self._enlace(self.filas[-1], atras=False)
+
+    def get_previous_link(self):
+        if not (self.hay_anterior and self.filas):
+            return None
+        return self._enlace(self.filas[0], atras=True)
+
+    # ── Orden y condición keyset ────────────────────────────
+
+    def _orden(self, queryset):
+        """[(ruta, descendente, campo)] del orden efectivo + pk"""
+        modelo = queryset.model
+        pk = modelo._meta.pk
+        pedido = [
+            c
+            for c in (queryset.query.order_by or modelo._meta.ordering)
+            if isinstance(c, str) and c != "?"
+        ]
+        orden = []
+        for columna in pedido:
+            ruta = columna.lstrip("-")
+            if ruta == "pk":
+                ruta = pk.name
+            campo = self._campo(modelo, ruta)
+            if campo.is_relation and "__" not in ruta:
+                ruta = campo.attname
+            if ruta not in (r for r, _, _ in orden):
+                orden.append((ruta, columna.startswith("-"), campo))
+        if not any(campo is pk for _, _, campo in orden):
+            orden.append((pk.attname, False, pk))
+        return orden
+
+    @staticmethod
+    def _campo(modelo, ruta):
+        campo = None
+        for parte in ruta.split("__"):
+            campo = modelo._meta.get_field(parte)
+            modelo = campo.related_model
+        return campo
+
+    def _order_by(self, invertir: bool):
+        expresiones = []
+        for ruta, descendente, campo in self.orden:
+            columna = F(ruta)
+            if descendente != invertir:
+                expresion = columna.desc
+            else:
+                expresion = columna.asc
+            if campo.null:
+                # NULL al final del orden normal (al principio si se invierte)
+                nulos = {"nulls_first": True} if invertir else {"nulls_last": True}
+                expresiones.append(expresion(**nulos))
+            else:
+                expresiones.append(expresion())
+        return expresiones
+
+    def _despues_de(self, valores, invertir: bool) -> Q:
+        """Filas posteriores (o anteriores si se invierte) a la tupla `valores`"""
+        alternativas = []
+        iguales = Q()
+        for (ruta, descendente, campo), valor in zip(self.orden, valores, strict=True):
+            if valor is None:
+                # NULL va al final: solo quedan antes los no nulos al invertir
+                estricto = Q(**{f"{ruta}__isnull": False}) if invertir else None
+                igual = Q(**{f"{ruta}__isnull": True})
+            else:
+                operador = "lt" if descendente != invertir else "gt"
+                estricto = Q(**{f"{ruta}__{operador}": valor})
+                if campo.null and not invertir:
+                    estricto |= Q(**{f"{ruta}__isnull": True})
+                igual = Q(**{ruta: valor})
+            if estricto is not None:
+                alternativas.append(iguales & estricto)
+            iguales &= igual
+        return reduce(operator.or_, alternativas, Q(pk__in=[]))
+
+    # ── Cursor ──────────────────────────────────────────────
+
+    def _valores(self, fila) -> list:
+        valores = []
+        for ruta, _, _ in self.orden:
+            valor = fila
+            for parte in ruta.split("__"):
+                valor = getattr(valor, parte) if valor is not None else None
+            valores.append(_a_json(valor))
+        return valores
+
+    def _enlace(self, fila, atras: bool) -> str:
+        datos = json.dumps({"v": self._valores(fila), "a": atras}).encode()
+        cursor = base64.urlsafe_b64encode(datos).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _leer_cursor(self, request):
+        """(valores convertidos, hacia_atras) o (None, False) sin cursor"""
+        crudo = request.query_params.get(self.cursor_query_param)
+        if not crudo:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(crudo.encode()))
+            valores = datos["v"]
+            if len(valores) != len(self.orden):
+                raise ValueError(valores)
+            convertidos = [
+                None if v is None else campo.to_python(v)
+                for (_, _, campo), v in zip(self.orden, valores, strict=True)
+            ]
+            return convertidos, bool(datos.get("a"))
+        except (
+            binascii.Error,
+            ValueError,
+            KeyError,
+            TypeError,
+            ValidationError,
+            FieldDoesNotExist,
+        ) as e:
+            raise NotFound(self.cursor_invalido) from e
+
+    def _tamano(self, request) -> int:
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(tamano, 1), self.max_page_size)
+
+    # ── Esquema OpenAPI ─────────────────────────────────────
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor de la página (tomado de next/previous)",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Filas por página (máximo {self.max_page_size})",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_paginated_response_schema(self, schema):
+        enlace = {"type": "string", "nullable": True, "format": "uri"}
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {"next": enlace, "previous": enlace, "results": schema},
+        }
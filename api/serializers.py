@@ -7,6 +7,7 @@ from .models import (
     DatoEntrenamiento,
     ModeloIA,
     Recomendacion,
+    Tarea,
 )
 
 
@@ -100,3 +101,9 @@ class RecomendacionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recomendacion
         fields = "__all__"
+
+
+class TareaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tarea
+        fields = "__all__"
@@ -1,9 +1,86 @@
-import random
-from datetime import timedelta
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
 from django.utils import timezone
-from django.db.models import Avg, F
+
+from api.constants import ESTADO_COMPLETADO, CategoriaEquipo
 from api.models import Equipo, Mantenimiento
 
+# Epoch de referencia para pasar fechas a enteros (microsegundos)
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROS_DIA = 86_400_000_000
+_CHUNK_HISTORIAL = 2000
+
+_ETIQUETAS_CATEGORIA = dict(CategoriaEquipo.choices)
+
+
+def _a_micros(fecha: datetime) -> int:
+    """Convierte un datetime aware a microsegundos desde epoch (exacto)"""
+    return (fecha - _EPOCH) // timedelta(microseconds=1)
+
+
+def historial_completados(equipos_ids=None, modelo=Mantenimiento):
+    """
+    Obtiene en UNA consulta ordenada las fechas de mantenimientos completados
+    de toda la flota (o de los ids indicados).
+
+    Args:
+        modelo: clase de Mantenimiento a consultar (la histórica en migraciones)
+
+    Returns:
+        (equipo_ids, micros) como arrays int64 ordenados por (equipo, fecha)
+    """
+    consulta = modelo.objects.filter(
+        estado=ESTADO_COMPLETADO, fecha_completada__isnull=False
+    )
+    if equipos_ids is not None:
+        consulta = consulta.filter(equipo_id__in=equipos_ids)
+
+    filas = consulta.order_by("equipo_id", "fecha_completada").values_list(
+        "equipo_id", "fecha_completada"
+    )
+
+    ids = []
+    micros = []
+    for equipo_id, fecha in filas.iterator(chunk_size=_CHUNK_HISTORIAL):
+        ids.append(equipo_id)
+        micros.append(_a_micros(fecha))
+
+    return np.array(ids, dtype=np.int64), np.array(micros, dtype=np.int64)
+
+
+def agrupar_intervalos(equipo_ids, micros):
+    """
+    Agrupa el historial por equipo y calcula, vectorizado, los intervalos
+    en días (floor, igual que timedelta.days) entre fechas consecutivas.
+
+    Returns:
+        Dict con arrays por grupo: ids, total, suma_intervalos, ultimo (micros)
+    """
+    if equipo_ids.size == 0:
+        vacio = np.array([], dtype=np.int64)
+        return {"ids": vacio, "total": vacio, "suma_intervalos": vacio, "ultimo": vacio}
+
+    inicios = np.flatnonzero(np.r_[True, equipo_ids[1:] != equipo_ids[:-1]])
+    finales = np.r_[inicios[1:], equipo_ids.size] - 1
+
+    # Intervalos solo entre filas del mismo equipo
+    mismo_equipo = equipo_ids[1:] == equipo_ids[:-1]
+    dias = np.where(mismo_equipo, np.diff(micros) // _MICROS_DIA, 0)
+    grupo_de_intervalo = np.searchsorted(
+        inicios, np.arange(1, equipo_ids.size), "right"
+    )
+    suma_intervalos = np.bincount(
+        grupo_de_intervalo - 1, weights=dias, minlength=inicios.size
+    ).astype(np.int64)
+
+    return {
+        "ids": equipo_ids[inicios],
+        "total": finales - inicios + 1,
+        "suma_intervalos": suma_intervalos,
+        "ultimo": micros[finales],
+    }
+
 
 class AnaliticaPredictiva:
     @staticmethod
@@ -11,77 +88,82 @@ class AnaliticaPredictiva:
         """
         Analiza todos los equipos y determina el riesgo de falla
         basado en sus mantenimientos históricos (MTBF).
+
+        Lee en una sola consulta los equipos junto con su fila precalculada
+        de EstadisticaEquipo; MTBF, días a falla y riesgo se calculan con
+        NumPy. El número de consultas no depende del tamaño de la flota.
         """
+        ahora = timezone.now()
+        ahora_micros = _a_micros(ahora)
+
+        equipos = list(
+            Equipo.objects.values_list(
+                "id",
+                "nombre",
+                "categoria",
+                "fecha_instalacion",
+                "estadistica__total_completados",
+                "estadistica__suma_intervalos_dias",
+                "estadistica__fecha_ultimo_completado",
+            )
+        )
+        if not equipos:
+            return []
+
+        ids = np.array([e[0] for e in equipos], dtype=np.int64)
+        instalacion = np.array([_a_micros(e[3]) for e in equipos], dtype=np.int64)
+        total = np.array([e[4] or 0 for e in equipos], dtype=np.int64)
+        suma_intervalos = np.array([e[5] or 0 for e in equipos], dtype=np.int64)
+        ultimo = np.array(
+            [_a_micros(e[6]) if e[6] else 0 for e in equipos], dtype=np.int64
+        )
+
+        con_historial = total >= 2
+        mtbf = np.divide(
+            suma_intervalos,
+            total - 1,
+            out=np.zeros(ids.size, dtype=np.float64),
+            where=con_historial,
+        )
+        dias_desde_ultimo = (ahora_micros - ultimo) // _MICROS_DIA
+        dias_restantes = np.maximum(0, mtbf - dias_desde_ultimo)
+
+        riesgo = np.select(
+            [dias_restantes < 7, dias_restantes < 30, dias_restantes < 60],
+            ["Crítico", "Alto", "Medio"],
+            default="Bajo",
+        )
+        score = np.select(
+            [dias_restantes < 7, dias_restantes < 30, dias_restantes < 60],
+            [0.95, 0.7, 0.4],
+            default=0.0,
+        )
+
+        # Si es equipo muy viejo también sube riesgo (fallback si no hay history)
+        antiguo = ~con_historial & (
+            (ahora_micros - instalacion) // _MICROS_DIA > 365 * 5
+        )
+        riesgo = np.where(con_historial, riesgo, np.where(antiguo, "Medio", "Bajo"))
+        score = np.where(con_historial, score, np.where(antiguo, 0.5, 0.0))
+
         resultados = []
-        equipos = Equipo.objects.all()
-
-        for eq in equipos:
-            # 1. Calcular MTBF (Tiempo medio entre fallas/mantenimientos)
-            mants = Mantenimiento.objects.filter(
-                equipo=eq,
-                estado=4,  # Falta Mantenimiento.ESTADO_COMPLETADO si no importo la flag, uso 4
-                fecha_completada__isnull=False,
-            ).order_by("fecha_completada")
-
-            riesgo = "Bajo"
-            score = 0.0
-            dias_prox_falla = None
-            mtbf = 0
-
-            if mants.count() >= 2:
-                # Calcular diferencias entre mantenimientos
-                fechas = [m.fecha_completada for m in mants]
-                diferencias = [
-                    (fechas[i + 1] - fechas[i]).days for i in range(len(fechas) - 1)
-                ]
-                if diferencias:
-                    mtbf = sum(diferencias) / len(diferencias)
-
-                    # Último mantenimiento
-                    ultimo_mant = fechas[-1]
-                    dias_desde_ultimo = (timezone.now() - ultimo_mant).days
-
-                    # Proyección
-                    dias_restantes = max(0, mtbf - dias_desde_ultimo)
-                    dias_prox_falla = int(dias_restantes)
-
-                    # Determinar Riesgo
-                    if dias_restantes < 7:
-                        riesgo = "Crítico"
-                        score = 0.95
-                    elif dias_restantes < 30:
-                        riesgo = "Alto"
-                        score = 0.7
-                    elif dias_restantes < 60:
-                        riesgo = "Medio"
-                        score = 0.4
-
-            # Si es equipo muy viejo también sube riesgo (fallback si no hay history)
-            elif (timezone.now().date() - eq.fecha_instalacion).days > 365 * 5:
-                riesgo = "Medio"
-                score = 0.5
+        for i in np.flatnonzero(riesgo != "Bajo"):
+            nombre, categoria = equipos[i][1:3]
+            if con_historial[i]:
+                dias_prox_falla = int(dias_restantes[i])
+            else:
                 dias_prox_falla = 30  # Estimado genérico
-
-            if riesgo in ["Crítico", "Alto", "Medio"]:
-                resultados.append(
-                    {
-                        "equipo_id": eq.id,
-                        "nombre": eq.nombre,
-                        "categoria": (
-                            eq.get_categoria_display()
-                            if hasattr(eq, "get_categoria_display")
-                            else eq.categoria
-                        ),
-                        "mtbf_dias": int(mtbf),
-                        "dias_prox_falla": (
-                            dias_prox_falla
-                            if dias_prox_falla is not None
-                            else "Desconocido"
-                        ),
-                        "riesgo": riesgo,
-                        "score": score,
-                    }
-                )
+            resultados.append(
+                {
+                    "equipo_id": int(ids[i]),
+                    "nombre": nombre,
+                    "categoria": _ETIQUETAS_CATEGORIA.get(categoria, categoria),
+                    "mtbf_dias": int(mtbf[i]),
+                    "dias_prox_falla": dias_prox_falla,
+                    "riesgo": str(riesgo[i]),
+                    "score": float(score[i]),
+                }
+            )
 
         # Ordenar por urgencia (score descendente)
         return sorted(resultados, key=lambda x: x["score"], reverse=True)
@@ -6,15 +6,20 @@ from api.servicios.optimizador_inventario import OptimizadorInventario
 
 class AutomataInteligente:
     @staticmethod
-    def ejecutar_ciclo_autonomo():
+    def ejecutar_ciclo_autonomo(progreso=None):
         """
         Ejecuta acciones correctivas automáticamente basado en predicciones.
+
+        progreso: callback opcional progreso(fraccion, mensaje) antes de
+        cada fase que escribe
         """
         acciones_tomadas = []
 
         # 1. Análisis de Riesgos (Equipos)
         analisis_equipos = AnaliticaPredictiva.analizar_riesgo_equipos()
         equipos_criticos = [e for e in analisis_equipos if e["riesgo"] == "Crítico"]
+        if progreso:
+            progreso(0.4, f"{len(equipos_criticos)} equipos en riesgo crítico")
 
         for eq_data in equipos_criticos:
             # Verificar si ya existe un mantenimiento pendiente para no duplicar
@@ -39,6 +44,8 @@ class AutomataInteligente:
         # 2. Análisis de Stock (Recursos)
         analisis_stock = OptimizadorInventario.analizar_stock()
         stock_critico = [s for s in analisis_stock if s["estado"] == "Crítico"]
+        if progreso:
+            progreso(0.8, f"{len(stock_critico)} recursos con stock crítico")
 
         for st_data in stock_critico:
             # Registrar Evento de Solicitud de Compra
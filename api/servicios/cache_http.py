@@ -0,0 +1,269 @@
+"""
+Caché HTTP en disco para el scraping
+
+Una entrada por URL (archivo <sha256 de la URL>.http en IA_CACHE_HTTP_DIR)
+con los validadores (ETag, Last-Modified), la fecha de guardado, el TTL y
+el cuerpo comprimido con zlib. Mientras la entrada está fresca se sirve
+sin red; vencida, se revalida con If-None-Match/If-Modified-Since y un 304
+solo renueva la fecha.
+
+Que una respuesta venga de la caché no dice si ya se usó. Quien procesa
+el contenido registra con marcar_procesado() la huella de lo que procesó
+(por consumidor) y la compara con procesado() en la próxima visita.
+
+El tamaño total se acota por LRU: cada lectura actualiza el mtime del
+archivo y al pasar IA_CACHE_HTTP_MAX_BYTES se borran los menos usados.
+Las escrituras son atómicas (temporal + os.replace), así que varios
+procesos pueden compartir el directorio.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import NamedTuple
+
+from django.conf import settings
+
+EXTENSION = ".http"
+# Tras pasar el máximo se recorta hasta esta fracción (evita recortar a cada escritura)
+FRACCION_RECORTE = 0.9
+_LARGO_META = struct.Struct(">I")
+
+
+def huella(cuerpo: bytes) -> str:
+    return hashlib.sha256(cuerpo).hexdigest()
+
+
+class Entrada(NamedTuple):
+    url: str
+    etag: str
+    last_modified: str
+    encoding: str
+    guardado: float
+    ttl: float
+    # False si solo se guardó el comienzo del cuerpo (descarga cortada)
+    completo: bool
+    digest: str
+    # Resultado ya procesado del cuerpo (lo define quien lo guarda)
+    extracto: dict
+    comprimido: bytes
+    # {consumidor: huella del contenido que ya procesó}
+    procesados: dict = None
+
+    def fresca(self) -> bool:
+        return time.time() - self.guardado < self.ttl
+
+    def cuerpo(self) -> bytes:
+        return zlib.decompress(self.comprimido)
+
+    def condicionales(self) -> dict:
+        """Cabeceras para revalidar la entrada"""
+        cabeceras = {}
+        if self.etag:
+            cabeceras["If-None-Match"] = self.etag
+        if self.last_modified:
+            cabeceras["If-Modified-Since"] = self.last_modified
+        return cabeceras
+
+
+class RespuestaCacheada(NamedTuple):
+    cuerpo: bytes
+    encoding: str
+    # Huella del cuerpo, para comparar con procesado()
+    huella: str
+
+
+def admite_cache(cabeceras) -> bool:
+    return "no-store" not in cabeceras.get("Cache-Control", "").lower()
+
+
+class CacheHTTP:
+    """Caché de respuestas HTTP por URL con revalidación y LRU por tamaño"""
+
+    def __init__(self, directorio=None, max_bytes=None, ttl=None):
+        self.directorio = str(directorio or settings.IA_CACHE_HTTP_DIR)
+        self.max_bytes = max_bytes or settings.IA_CACHE_HTTP_MAX_BYTES
+        self.ttl = settings.IA_CACHE_HTTP_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        # Tamaño ocupado estimado; None hasta recorrer el directorio
+        self._total = None
+
+    def _ruta(self, url: str) -> str:
+        nombre = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directorio, nombre + EXTENSION)
+
+    # ── Lectura y escritura ─────────────────────────────────
+
+    def obtener(self, url: str):
+        """Entrada guardada para la URL (None si no hay o está dañada)"""
+        ruta = self._ruta(url)
+        try:
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            (largo,) = _LARGO_META.unpack_from(datos)
+            meta = json.loads(datos[_LARGO_META.size : _LARGO_META.size + largo])
+            entrada = Entrada(comprimido=datos[_LARGO_META.size + largo :], **meta)
+            if entrada.url != url:
+                return None
+            # Uso reciente para el LRU
+            os.utime(ruta)
+        except (OSError, ValueError, TypeError, struct.error):
+            return None
+        return entrada
+
+    def guardar(
+        self,
+        url: str,
+        cuerpo: bytes,
+        etag: str = "",
+        last_modified: str = "",
+        encoding: str = "",
+        ttl: float = None,
+        completo: bool = True,
+        extracto: dict = None,
+        procesados: dict = None,
+    ) -> Entrada:
+        entrada = Entrada(
+            url=url,
+            etag=etag or "",
+            last_modified=last_modified or "",
+            encoding=encoding or "",
+            guardado=time.time(),
+            ttl=self.ttl if ttl is None else ttl,
+            completo=completo,
+            digest=huella(cuerpo),
+            extracto=extracto,
+            comprimido=zlib.compress(cuerpo),
+            procesados=procesados,
+        )
+        self._escribir(entrada)
+        return entrada
+
+    def revalidar(self, entrada: Entrada) -> Entrada:
+        """El servidor confirmó la entrada (304): vuelve a estar fresca"""
+        entrada = entrada._replace(guardado=time.time())
+        self._escribir(entrada)
+        return entrada
+
+    def con_extracto(self, entrada: Entrada, extracto: dict) -> Entrada:
+        entrada = entrada._replace(extracto=extracto)
+        self._escribir(entrada)
+        return entrada
+
+    def procesado(self, url: str, consumidor: str):
+        """Huella de lo que `consumidor` ya procesó de la URL (None si nada)"""
+        entrada = self.obtener(url)
+        if entrada is None:
+            return None
+        return (entrada.procesados or {}).get(consumidor)
+
+    def marcar_procesado(self, url: str, consumidor: str, digest: str):
+        """Registra que `consumidor` procesó el contenido con esa huella"""
+        entrada = self.obtener(url)
+        if entrada is None:
+            return
+        procesados = {**(entrada.procesados or {}), consumidor: digest}
+        self._escribir(entrada._replace(procesados=procesados))
+
+    def _escribir(self, entrada: Entrada):
+        meta = json.dumps(
+            {k: v for k, v in entrada._asdict().items() if k != "comprimido"}
+        ).encode()
+        os.makedirs(self.directorio, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_LARGO_META.pack(len(meta)))
+                f.write(meta)
+                f.write(entrada.comprimido)
+            os.replace(temporal, self._ruta(entrada.url))
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+        tamano = _LARGO_META.size + len(meta) + len(entrada.comprimido)
+        with self._lock:
+            if self._total is not None:
+                self._total += tamano
+            if self._total is None or self._total > self.max_bytes:
+                self._recortar()
+
+    def _recortar(self):
+        """Borra las entradas menos usadas hasta quedar bajo el máximo"""
+        archivos = []
+        for item in os.scandir(self.directorio):
+            if not item.name.endswith(EXTENSION):
+                continue
+            try:
+                info = item.stat()
+            except FileNotFoundError:
+                continue
+            archivos.append((info.st_mtime, info.st_size, item.path))
+
+        total = sum(tamano for _, tamano, _ in archivos)
+        if total > self.max_bytes:
+            objetivo = self.max_bytes * FRACCION_RECORTE
+            for _, tamano, ruta in sorted(archivos):
+                if total <= objetivo:
+                    break
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                total -= tamano
+        self._total = total
+
+    def tamano(self) -> int:
+        """Bytes ocupados (recorre el directorio)"""
+        with self._lock:
+            if not os.path.isdir(self.directorio):
+                return 0
+            self._recortar()
+            return self._total
+
+    # ── Descarga con caché ──────────────────────────────────
+
+    def descargar(self, sesion, url: str, timeout: float, **kwargs):
+        """
+        GET con caché del cuerpo completo. Devuelve RespuestaCacheada o None
+        si la respuesta no fue 200/304.
+        """
+        entrada = previa = self.obtener(url)
+        if entrada is not None and not entrada.completo:
+            entrada = None
+        if entrada is not None and entrada.fresca():
+            return RespuestaCacheada(entrada.cuerpo(), entrada.encoding, entrada.digest)
+
+        cabeceras = dict(kwargs.pop("headers", None) or {})
+        if entrada is not None:
+            cabeceras.update(entrada.condicionales())
+        respuesta = sesion.get(url, timeout=timeout, headers=cabeceras, **kwargs)
+
+        if respuesta.status_code == 304 and entrada is not None:
+            self.revalidar(entrada)
+            return RespuestaCacheada(entrada.cuerpo(), entrada.encoding, entrada.digest)
+        if respuesta.status_code != 200:
+            return None
+
+        cuerpo = respuesta.content
+        encoding = respuesta.encoding or "utf-8"
+        if admite_cache(respuesta.headers):
+            self.guardar(
+                url,
+                cuerpo,
+                etag=respuesta.headers.get("ETag"),
+                last_modified=respuesta.headers.get("Last-Modified"),
+                encoding=encoding,
+                procesados=previa.procesados if previa is not None else None,
+            )
+        return RespuestaCacheada(cuerpo, encoding, huella(cuerpo))
+
+
+# Instancia global
+cache_http = CacheHTTP()
@@ -1,5 +1,7 @@
+from django.db import transaction
+
 from api.constants import ESTADO_PENDIENTE, PRIORIDAD_ALTA
-from api.models import Mantenimiento, Equipo
+from api.models import Equipo, Mantenimiento
 
 
 class ServicioMantenimiento:
@@ -8,14 +10,42 @@ class ServicioMantenimiento:
     @staticmethod
     def sincronizar_prioridad(mantenimiento: Mantenimiento) -> Mantenimiento:
         """Sincroniza la prioridad de un mantenimiento usando IA"""
-        from .ia import ServicioIA
+        from .prioridad import calcular_prioridad
 
         if mantenimiento.descripcion:
-            prioridad = ServicioIA.calcular_prioridad(mantenimiento.descripcion)
+            prioridad = calcular_prioridad(mantenimiento.descripcion)
             if prioridad != mantenimiento.prioridad:
                 mantenimiento.prioridad = prioridad
         return mantenimiento
 
+    @staticmethod
+    def sincronizar_prioridades(mantenimientos) -> list:
+        """
+        Sincroniza la prioridad de muchos mantenimientos puntuando todas las
+        descripciones en una sola llamada y guarda los que cambiaron.
+
+        Cada uno se guarda con save() (no bulk_update) para que las señales
+        mantengan EstadisticaEquipo.suma_prioridad_pendientes al día.
+
+        Returns:
+            Los mantenimientos cuya prioridad cambió
+        """
+        from .prioridad import calcular_prioridad_lote
+
+        con_descripcion = [m for m in mantenimientos if m.descripcion]
+        prioridades = calcular_prioridad_lote(m.descripcion for m in con_descripcion)
+
+        cambiados = []
+        for mantenimiento, prioridad in zip(con_descripcion, prioridades, strict=True):
+            if prioridad != mantenimiento.prioridad:
+                mantenimiento.prioridad = prioridad
+                cambiados.append(mantenimiento)
+
+        with transaction.atomic():
+            for mantenimiento in cambiados:
+                mantenimiento.save(update_fields=["prioridad"])
+        return cambiados
+
 
 class ServicioGeneral:
     """Servicio general del sistema"""
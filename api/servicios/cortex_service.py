@@ -1,60 +1,233 @@
-from api.models import Equipo, Mantenimiento
-from api.cortex.neural_net import CortexNN
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
-import random
+
+from api.constants import ESTADO_COMPLETADO, ESTADO_PENDIENTE
+from api.cortex.neural_net import NUMPY_AVAILABLE, CortexNN
+from api.models import Equipo, Mantenimiento, ModeloIA
+
+from .analitica_predictiva import _MICROS_DIA, _a_micros
+
+# Registro en ModeloIA que apunta al archivo de pesos publicado
+NOMBRE_MODELO = "Cortex-NN"
+# Segundos entre comprobaciones del mtime del archivo de pesos
+INTERVALO_RECARGA = 5.0
+# Vigencia del ranking de flota en caché (los pendientes cambian sin reentrenar)
+CACHE_RANKING_SEGUNDOS = 300
 
 # Singleton instance placeholder
 _cortex_instance = None
+_lock = threading.Lock()
+_ruta_pesos = None
+_pesos_mtime = None
+_pesos_version = 0
+_ultimo_chequeo = 0.0
 
 
 class CortexService:
     @staticmethod
     def get_instance():
-        global _cortex_instance
-        if _cortex_instance is None:
-            # Input: [antiguedad_norm, categoria_norm, mant_pendientes_norm]
-            # Output: [probabilidad_falla]
-            _cortex_instance = CortexNN(input_size=3, hidden_size=5, output_size=1)
+        """
+        Red compartida del proceso. Los pesos publicados se cargan por mmap
+        (solo lectura, páginas compartidas entre workers) y se recargan si
+        el archivo cambia; el mtime se consulta como mucho cada
+        INTERVALO_RECARGA segundos.
+        """
+        global _cortex_instance, _ruta_pesos, _ultimo_chequeo
+        ahora = time.monotonic()
+        if _cortex_instance is not None and ahora - _ultimo_chequeo < INTERVALO_RECARGA:
+            return _cortex_instance
+
+        with _lock:
+            if _cortex_instance is None:
+                # Input: [antiguedad_norm, categoria_norm, mant_pendientes_norm]
+                # Output: [probabilidad_falla]
+                _cortex_instance = CortexNN(input_size=3, hidden_size=5, output_size=1)
+                _ruta_pesos = CortexService._ruta_registrada()
+            _ultimo_chequeo = ahora
+            CortexService._recargar_si_cambio()
         return _cortex_instance
 
+    @staticmethod
+    def version_pesos():
+        """Versión de los pesos cargados (0 = sin publicar)"""
+        CortexService.get_instance()
+        return _pesos_version
+
+    @staticmethod
+    def _ruta_registrada():
+        ruta = (
+            ModeloIA.objects.filter(nombre=NOMBRE_MODELO)
+            .values_list("modelo_path", flat=True)
+            .first()
+        )
+        return ruta or str(settings.CORTEX_WEIGHTS_PATH)
+
+    @staticmethod
+    def _recargar_si_cambio():
+        global _pesos_mtime, _pesos_version
+        if not NUMPY_AVAILABLE:
+            return
+        try:
+            mtime = os.stat(_ruta_pesos).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != _pesos_mtime:
+            _pesos_version = _cortex_instance.load_weights(_ruta_pesos, mmap=True)
+            _pesos_mtime = mtime
+
+    @staticmethod
+    def publicar_pesos(nn):
+        """
+        Guarda los pesos en un archivo versionado y registra la ruta y la
+        versión en ModeloIA. Los demás workers lo recargan al ver el mtime.
+        """
+        global _ruta_pesos, _pesos_mtime, _pesos_version
+        if not NUMPY_AVAILABLE:
+            return 0
+
+        with transaction.atomic():
+            modelo, _ = ModeloIA.objects.select_for_update().get_or_create(
+                nombre=NOMBRE_MODELO,
+                # activo marca el modelo ML del dashboard, no la red Cortex
+                defaults={"version": "0", "activo": False},
+            )
+            version = int(modelo.version or 0) + 1
+            ruta = modelo.modelo_path or str(settings.CORTEX_WEIGHTS_PATH)
+            nn.save_weights(ruta, version=version)
+
+            modelo.version = str(version)
+            modelo.modelo_path = ruta
+            modelo.estado = "completed"
+            modelo.fecha_ultimo_entrenamiento = timezone.now()
+            modelo.save()
+
+        with _lock:
+            _ruta_pesos = ruta
+            _pesos_mtime = os.stat(ruta).st_mtime_ns
+            _pesos_version = version
+        return version
+
     @staticmethod
     def vectorizar_equipo(equipo):
-        """Convierte un objeto Equipo en un vector numérico [0-1]"""
+        """
+        Convierte un objeto Equipo en un vector numérico [0-1]
+
+        Usa los campos de la instancia, así que sirve también para un
+        equipo aún no guardado (sin mantenimientos pendientes).
+        """
+        pendientes = (
+            0
+            if equipo.pk is None
+            else equipo.mantenimientos.filter(estado=ESTADO_PENDIENTE).count()
+        )
+        matriz = CortexService._vectorizar(
+            np.array([_a_micros(equipo.fecha_instalacion)], dtype=np.int64),
+            np.array([equipo.categoria], dtype=np.float64),
+            np.array([pendientes], dtype=np.float64),
+        )
+        return matriz[0].tolist()
+
+    @staticmethod
+    def vectorizar_equipos(equipos=None):
+        """
+        Vectoriza muchos equipos con una sola consulta anotada.
+
+        Returns:
+            (matriz, ids): matriz (n, 3) con una fila por equipo y el array
+            de ids en el mismo orden (ascendente)
+        """
+        equipos = Equipo.objects.all() if equipos is None else equipos
+        filas = list(
+            equipos.order_by("id")
+            .annotate(
+                pendientes=Count(
+                    "mantenimientos",
+                    filter=Q(mantenimientos__estado=ESTADO_PENDIENTE),
+                )
+            )
+            .values_list("id", "fecha_instalacion", "categoria", "pendientes")
+        )
+        ids = np.array([f[0] for f in filas], dtype=np.int64)
+        if not filas:
+            return np.empty((0, 3)), ids
+
+        return (
+            CortexService._vectorizar(
+                np.array([_a_micros(f[1]) for f in filas], dtype=np.int64),
+                np.array([f[2] for f in filas], dtype=np.float64),
+                np.array([f[3] for f in filas], dtype=np.float64),
+            ),
+            ids,
+        )
+
+    @staticmethod
+    def _vectorizar(instalacion, categoria, pendientes) -> np.ndarray:
+        """Matriz (n, 3) de features a partir de columnas ya extraídas"""
         # 1. Antiguedad (0 a 10 años normalizado)
-        dias_uso = (timezone.now().date() - equipo.fecha_instalacion).days
-        antiguedad = min(dias_uso / 3650, 1.0)  # max 10 años
+        dias_uso = (_a_micros(timezone.now()) - instalacion) // _MICROS_DIA
+        antiguedad = np.minimum(dias_uso / 3650, 1.0)  # max 10 años
 
         # 2. Categoría (Hash simple normalizado o one-hot simplificado)
         # Asumimos categorias 1-5
-        cat_norm = equipo.categoria / 5.0
+        cat_norm = categoria / 5.0
 
         # 3. Mantenimientos Pendientes (0 si clean, 1 si saturado)
-        pendientes = Mantenimiento.objects.filter(equipo=equipo, estado=1).count()
-        pend_norm = min(pendientes / 5.0, 1.0)  # max 5 pendientes
+        pend_norm = np.minimum(pendientes / 5.0, 1.0)  # max 5 pendientes
 
-        return [antiguedad, cat_norm, pend_norm]
+        return np.column_stack([antiguedad, cat_norm, pend_norm])
 
     @staticmethod
-    def entrenar_con_historia():
-        """Entrena la red usando historial de mantenimientos pasados"""
+    def entrenar_con_historia(epocas=1, batch_size=32, progreso=None):
+        """
+        Entrena la red usando historial de mantenimientos pasados
+
+        progreso: callback opcional progreso(epoca_actual); los pesos solo
+        se publican si se completan todas las épocas
+        """
         nn = CortexService.get_instance()
-        mantenimientos = Mantenimiento.objects.filter(
-            estado=4
+        historia = list(
+            Mantenimiento.objects.filter(estado=ESTADO_COMPLETADO).values_list(
+                "equipo_id", "tipo"
+            )
         )  # Completados (historia)
+        if not historia:
+            return 0.0
 
-        errores = []
-        for m in mantenimientos:
-            # Recrear estado "pasado" (simulado para este ejemplo)
-            # Inputvector: el estado del equipo
-            inputs = CortexService.vectorizar_equipo(m.equipo)
+        # Recrear estado "pasado" (simulado para este ejemplo)
+        # Inputvector: el estado del equipo, vectorizado una vez por equipo
+        matriz, ids = CortexService.vectorizar_equipos(
+            Equipo.objects.filter(
+                id__in=Mantenimiento.objects.filter(estado=ESTADO_COMPLETADO).values(
+                    "equipo_id"
+                )
+            )
+        )
+        equipo_ids = np.array([h[0] for h in historia], dtype=np.int64)
+        inputs = matriz[np.searchsorted(ids, equipo_ids)]
 
-            # Target: 1.0 si fue correctivo (falló), 0.0 si fue preventivo (no falló)
-            target = [1.0] if m.tipo == "Correctivo" else [0.0]
+        # Target: 1.0 si fue correctivo (falló), 0.0 si fue preventivo (no falló)
+        targets = np.array(
+            [
+                [1.0 if tipo == Mantenimiento.TIPO_CORRECTIVO else 0.0]
+                for _, tipo in historia
+            ]
+        )
 
-            loss = nn.train(inputs, target)
-            errores.append(loss)
-
-        return sum(errores) / len(errores) if errores else 0.0
+        loss = 0.0
+        for epoca in range(epocas):
+            loss = nn.train_batch(inputs, targets, batch_size=batch_size, epochs=1)
+            if progreso:
+                progreso(epoca + 1)
+        CortexService.publicar_pesos(nn)
+        return loss
 
     @staticmethod
     def predecir_riesgo_neuronal(equipo):
@@ -62,3 +235,34 @@ class CortexService:
         vec = CortexService.vectorizar_equipo(equipo)
         output = nn.forward(vec)
         return output[0]  # Probabilidad entre 0 y 1
+
+    @staticmethod
+    def predecir_riesgo_neuronal_lote(equipos=None):
+        """
+        Probabilidad de falla de muchos equipos en un solo forward batch.
+
+        Returns:
+            (ids, scores) como arrays alineados, ids ascendentes
+        """
+        matriz, ids = CortexService.vectorizar_equipos(equipos)
+        if not ids.size:
+            return ids, np.empty(0)
+        return ids, CortexService.get_instance().forward(matriz)[:, 0]
+
+    @staticmethod
+    def ranking_riesgo_neuronal():
+        """
+        Scores de toda la flota ordenados de mayor a menor riesgo.
+        Se cachea por versión de pesos: publicar pesos nuevos invalida.
+
+        Returns:
+            (ids, scores) ordenados por score descendente (empate: id)
+        """
+        clave = f"cortex_ranking_v{CortexService.version_pesos()}"
+        ranking = cache.get(clave)
+        if ranking is None:
+            ids, scores = CortexService.predecir_riesgo_neuronal_lote()
+            orden = np.lexsort((ids, -scores))
+            ranking = (ids[orden], scores[orden])
+            cache.set(clave, ranking, timeout=CACHE_RANKING_SEGUNDOS)
+        return ranking
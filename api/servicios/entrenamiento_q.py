@@ -0,0 +1,186 @@
+"""
+Entrenamiento offline de la Q-table con todo el historial completado
+
+Una sola consulta values_list trae (categoria, tipo, prioridad, técnico,
+fechas, costo) de cada mantenimiento completado; las recompensas se
+calculan sobre arrays y la actualización Q-learning se aplica por grupos
+(estado, acción) en forma cerrada: k actualizaciones seguidas de un mismo
+par equivalen a
+
+    q_k = (1 - α)^k · q_0 + Σ α (1 - α)^(k-1-i) · (r_i + γ · max Q(s'))
+
+así que cada barrido es un bincount ponderado, con el mismo resultado que
+recorrer las filas una a una. Al final se vuelca la tabla una sola vez.
+
+El endpoint /sistema/entrenar/ lo encola como Tarea "entrenar_q" (ver
+servicios/tareas.py).
+"""
+
+import numpy as np
+
+from api.constants import ESTADO_COMPLETADO
+from api.models import Mantenimiento
+
+from .analitica_predictiva import _MICROS_DIA, _a_micros
+
+# Factor de costo esperado que usaba el entrenamiento fila a fila
+FACTOR_COSTO_ESPERADO = 1.1
+
+
+class EntrenadorQ:
+    """Entrenador por lotes de la Q-table de SistemaIA"""
+
+    @staticmethod
+    def cargar_experiencias(mantenimientos=None) -> dict:
+        """
+        Historial de mantenimientos completados como arrays
+
+        Omite (igual que antes) los que no tienen fecha de cierre.
+        """
+        if mantenimientos is None:
+            mantenimientos = Mantenimiento.objects.filter(estado=ESTADO_COMPLETADO)
+        filas = list(
+            mantenimientos.filter(fecha_completada__isnull=False)
+            .order_by("-prioridad", "fecha_programada", "id")
+            .values_list(
+                "equipo__categoria",
+                "tipo",
+                "prioridad",
+                "tecnico_asignado",
+                "fecha_programada",
+                "fecha_completada",
+                "costo",
+            )
+        )
+
+        estados = [f"cat_{f[0]}_tipo_{f[1]}_pri_{f[2]}" for f in filas]
+        acciones = [f"tecnico_{f[3]}" for f in filas]
+        programadas = np.array([_a_micros(f[4]) for f in filas], dtype=np.int64)
+        completadas = np.array([_a_micros(f[5]) for f in filas], dtype=np.int64)
+        # Misma semántica que timedelta.days (redondeo hacia abajo)
+        dias = (completadas - programadas) // _MICROS_DIA
+        costos = np.array([float(f[6]) for f in filas])
+
+        return {
+            "estados": estados,
+            "acciones": acciones,
+            "dias": np.maximum(dias, 1),
+            "costo_real": costos,
+            "costo_esperado": costos * FACTOR_COSTO_ESPERADO,
+        }
+
+    @staticmethod
+    def entrenar(sistema=None, barridos: int = 1, mantenimientos=None, progreso=None):
+        """
+        Aplica Q-learning sobre todo el historial `barridos` veces
+
+        Args:
+            sistema: SistemaIA a entrenar (por defecto la instancia global)
+            barridos: Pasadas completas sobre el historial
+            mantenimientos: QuerySet a usar (por defecto los completados)
+            progreso: Callback opcional progreso(barrido_actual)
+
+        Returns:
+            Dict con experiencias, pares (estado, acción) y recompensa media
+        """
+        if sistema is None:
+            from .ia_core import ia_sistema as sistema
+
+        datos = EntrenadorQ.cargar_experiencias(mantenimientos)
+        n = len(datos["estados"])
+        if n == 0:
+            return {"entrenados": 0, "pares": 0, "recompensa_media": 0.0}
+
+        recompensas = sistema._calcular_recompensas_lote(
+            np.ones(n, dtype=bool),
+            datos["dias"],
+            datos["costo_real"],
+            datos["costo_esperado"],
+        )
+
+        pares = EntrenadorQ.aplicar_lote(
+            sistema,
+            datos["estados"],
+            datos["acciones"],
+            recompensas,
+            barridos=barridos,
+            progreso=progreso,
+        )
+        sistema.flush()
+
+        aplicadas = n * barridos
+        sistema.metricas["decisiones_totales"] += aplicadas
+        sistema.metricas["decisiones_correctas"] += aplicadas
+        sistema.metricas["recompensa_acumulada"] += float(recompensas.sum()) * barridos
+        sistema.metricas["precision_actual"] = sistema.metricas[
+            "decisiones_correctas"
+        ] / max(sistema.metricas["decisiones_totales"], 1)
+
+        return {
+            "entrenados": n,
+            "pares": pares,
+            "recompensa_media": float(recompensas.mean()),
+        }
+
+    @staticmethod
+    def aplicar_lote(
+        sistema, estados, acciones, recompensas, barridos: int = 1, progreso=None
+    ) -> int:
+        """
+        Actualización Q-learning de un lote, en orden, sin volcar
+
+        Args:
+            sistema: SistemaIA cuya q_table se actualiza
+            estados, acciones: Secuencias de strings (una por experiencia)
+            recompensas: Array de recompensas
+            barridos: Veces que se aplica el lote completo
+            progreso: Callback opcional progreso(barrido_actual)
+
+        Returns:
+            Pares (estado, acción) distintos actualizados
+        """
+        recompensas = np.asarray(recompensas, dtype=np.float64)
+        n = len(recompensas)
+        if n == 0:
+            return 0
+
+        # Grupos (estado, acción) en orden de primera aparición
+        grupos = {}
+        g = np.fromiter(
+            (
+                grupos.setdefault(par, len(grupos))
+                for par in zip(estados, acciones, strict=True)
+            ),
+            dtype=np.intp,
+            count=n,
+        )
+        pares = list(grupos)
+        total = np.bincount(g, minlength=len(pares))
+
+        # Cuántas filas del mismo grupo vienen después de cada una
+        orden = np.argsort(g, kind="stable")
+        inicio_grupo = np.cumsum(total) - total
+        posicion = np.empty(n, dtype=np.int64)
+        posicion[orden] = np.arange(n) - inicio_grupo[g[orden]]
+        restantes = total[g] - 1 - posicion
+
+        alfa, gamma = sistema.learning_rate, sistema.discount_factor
+        pesos = alfa * (1 - alfa) ** restantes
+        decaimiento = (1 - alfa) ** total
+
+        tabla = sistema.q_table
+        q = np.array([tabla.valor(e, a) for e, a in pares])
+        for barrido in range(barridos):
+            siguiente = np.array(
+                [tabla.max_estado(f"{e}_completado") for e, _ in pares]
+            )
+            objetivo = recompensas + gamma * siguiente[g]
+            q = decaimiento * q + np.bincount(
+                g, weights=pesos * objetivo, minlength=len(pares)
+            )
+            if progreso:
+                progreso(barrido + 1)
+
+        for (estado, accion), valor in zip(pares, q, strict=True):
+            tabla.asignar(estado, accion, float(valor))
+        return len(pares)
@@ -0,0 +1,265 @@
+"""
+Estadísticas de confiabilidad por equipo
+
+Mantiene la tabla desnormalizada EstadisticaEquipo de forma incremental
+(una fila por equipo) para que la analítica lea filas precalculadas en vez
+de recorrer el historial de mantenimientos.
+"""
+
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from api.constants import ESTADO_COMPLETADO, ESTADO_PENDIENTE
+from api.models import Equipo, EstadisticaEquipo, Mantenimiento
+
+from .analitica_predictiva import _EPOCH, agrupar_intervalos, historial_completados
+
+CAMPOS_APORTE = ("equipo_id", "estado", "fecha_completada", "costo", "prioridad")
+_CENTAVO = Decimal("0.01")
+_LOTE_RECONSTRUCCION = 1000
+
+
+def _dias(desde, hasta) -> int:
+    """Días completos entre dos fechas (igual que timedelta.days)"""
+    return (hasta - desde).days
+
+
+def _iso(fecha: datetime) -> str:
+    return fecha.astimezone(UTC).isoformat()
+
+
+def _aporte(datos: dict) -> dict:
+    """Normaliza los campos de un mantenimiento que afectan a la estadística"""
+    fecha = datos["fecha_completada"]
+    return {
+        "equipo_id": datos["equipo_id"],
+        "estado": datos["estado"],
+        "fecha": fecha if datos["estado"] == ESTADO_COMPLETADO else None,
+        "costo": Decimal(str(datos["costo"] or 0)).quantize(_CENTAVO),
+        "prioridad": datos["prioridad"] or 0,
+    }
+
+
+class ServicioEstadisticas:
+    """Mantenimiento incremental y reconstrucción de EstadisticaEquipo"""
+
+    @staticmethod
+    def aporte_de_instancia(mantenimiento: Mantenimiento) -> dict:
+        return _aporte(
+            {campo: getattr(mantenimiento, campo) for campo in CAMPOS_APORTE}
+        )
+
+    @staticmethod
+    def aporte_guardado(pk) -> dict | None:
+        """Aporte del mantenimiento tal como está en BD (antes de guardarlo)"""
+        datos = Mantenimiento.objects.filter(pk=pk).values(*CAMPOS_APORTE).first()
+        return _aporte(datos) if datos else None
+
+    @staticmethod
+    def actualizar(pk, previo: dict | None, nuevo: dict | None):
+        """
+        Aplica el cambio de un mantenimiento a las estadísticas.
+
+        Args:
+            pk: id del mantenimiento (se excluye al buscar vecinos)
+            previo: aporte antes del cambio (None si es nuevo)
+            nuevo: aporte después del cambio (None si se eliminó)
+        """
+        if previo == nuevo:
+            return
+
+        with transaction.atomic():
+            if previo:
+                stats = ServicioEstadisticas._bloquear(previo["equipo_id"], crear=False)
+                if stats:
+                    ServicioEstadisticas._quitar(stats, previo, pk)
+                    stats.save()
+            if nuevo:
+                stats = ServicioEstadisticas._bloquear(nuevo["equipo_id"], crear=True)
+                ServicioEstadisticas._agregar(stats, nuevo, pk)
+                stats.save()
+
+    @staticmethod
+    def _bloquear(equipo_id, crear: bool):
+        consulta = EstadisticaEquipo.objects.select_for_update()
+        stats = consulta.filter(equipo_id=equipo_id).first()
+        if stats is None and crear:
+            stats, _ = EstadisticaEquipo.objects.get_or_create(equipo_id=equipo_id)
+        return stats
+
+    @staticmethod
+    def _vecinos(equipo_id, fecha, excluir_pk):
+        """Fechas completadas inmediatamente anterior y posterior a `fecha`"""
+        completados = (
+            Mantenimiento.objects.filter(
+                equipo_id=equipo_id,
+                estado=ESTADO_COMPLETADO,
+                fecha_completada__isnull=False,
+            )
+            .exclude(pk=excluir_pk)
+            .values_list("fecha_completada", flat=True)
+        )
+        anterior = (
+            completados.filter(fecha_completada__lte=fecha)
+            .order_by("-fecha_completada")
+            .first()
+        )
+        siguiente = (
+            completados.filter(fecha_completada__gte=fecha)
+            .order_by("fecha_completada")
+            .first()
+        )
+        return anterior, siguiente
+
+    @staticmethod
+    def _delta_intervalos(fecha, anterior, siguiente) -> int:
+        """Cambio en la suma de intervalos al insertar `fecha` entre vecinos"""
+        delta = 0
+        if anterior is not None:
+            delta += _dias(anterior, fecha)
+        if siguiente is not None:
+            delta += _dias(fecha, siguiente)
+        if anterior is not None and siguiente is not None:
+            delta -= _dias(anterior, siguiente)
+        return delta
+
+    @staticmethod
+    def _agregar(stats, aporte, pk):
+        stats.total_mantenimientos += 1
+        stats.costo_total += aporte["costo"]
+        if aporte["estado"] == ESTADO_PENDIENTE:
+            stats.pendientes += 1
+            stats.suma_prioridad_pendientes += aporte["prioridad"]
+
+        fecha = aporte["fecha"]
+        if fecha is None:
+            return
+
+        anterior, siguiente = ServicioEstadisticas._vecinos(stats.equipo_id, fecha, pk)
+        stats.suma_intervalos_dias += ServicioEstadisticas._delta_intervalos(
+            fecha, anterior, siguiente
+        )
+        stats.total_completados += 1
+        if siguiente is None:
+            stats.fecha_ultimo_completado = fecha
+
+        fechas = [datetime.fromisoformat(f) for f in stats.ultimas_fechas]
+        fechas.append(fecha)
+        fechas.sort(reverse=True)
+        stats.ultimas_fechas = [
+            _iso(f) for f in fechas[: EstadisticaEquipo.VENTANA_FECHAS]
+        ]
+
+    @staticmethod
+    def _quitar(stats, aporte, pk):
+        stats.total_mantenimientos -= 1
+        stats.costo_total -= aporte["costo"]
+        if aporte["estado"] == ESTADO_PENDIENTE:
+            stats.pendientes -= 1
+            stats.suma_prioridad_pendientes -= aporte["prioridad"]
+
+        fecha = aporte["fecha"]
+        if fecha is None:
+            return
+
+        anterior, siguiente = ServicioEstadisticas._vecinos(stats.equipo_id, fecha, pk)
+        stats.suma_intervalos_dias -= ServicioEstadisticas._delta_intervalos(
+            fecha, anterior, siguiente
+        )
+        stats.total_completados -= 1
+        if siguiente is None:
+            stats.fecha_ultimo_completado = anterior
+
+        ventana = [datetime.fromisoformat(f) for f in stats.ultimas_fechas]
+        if ventana and fecha >= ventana[-1]:
+            # La fecha salía en la ventana: recargar los más recientes
+            stats.ultimas_fechas = [
+                _iso(f)
+                for f in Mantenimiento.objects.filter(
+                    equipo_id=stats.equipo_id,
+                    estado=ESTADO_COMPLETADO,
+                    fecha_completada__isnull=False,
+                )
+                .exclude(pk=pk)
+                .order_by("-fecha_completada")
+                .values_list("fecha_completada", flat=True)[
+                    : EstadisticaEquipo.VENTANA_FECHAS
+                ]
+            ]
+
+    @staticmethod
+    def reconstruir(apps=None) -> int:
+        """
+        Recalcula la tabla completa a partir del historial.
+
+        Usa agregaciones por equipo y el historial ordenado en streaming,
+        por lo que el número de consultas no depende de la flota.
+
+        Args:
+            apps: registro de modelos históricos cuando se llama desde una
+                migración (por defecto, los modelos actuales)
+
+        Returns:
+            Número de filas escritas
+        """
+        if apps is None:
+            equipos, mantenimientos, estadisticas = (
+                Equipo,
+                Mantenimiento,
+                EstadisticaEquipo,
+            )
+        else:
+            equipos = apps.get_model("api", "Equipo")
+            mantenimientos = apps.get_model("api", "Mantenimiento")
+            estadisticas = apps.get_model("api", "EstadisticaEquipo")
+
+        agregados = {
+            fila["equipo_id"]: fila
+            for fila in mantenimientos.objects.values("equipo_id")
+            .order_by()
+            .annotate(
+                total=Count("id"),
+                costo=Sum("costo"),
+                pendientes=Count("id", filter=Q(estado=ESTADO_PENDIENTE)),
+                suma_prioridad=Sum("prioridad", filter=Q(estado=ESTADO_PENDIENTE)),
+            )
+        }
+
+        equipo_ids, micros = historial_completados(modelo=mantenimientos)
+        grupos = agrupar_intervalos(equipo_ids, micros)
+        inicios = {int(eid): i for i, eid in enumerate(grupos["ids"])}
+        finales = (grupos["total"].cumsum() - 1) if grupos["ids"].size else []
+
+        filas = []
+        for equipo_id in equipos.objects.values_list("id", flat=True).order_by("id"):
+            agregado = agregados.get(equipo_id, {})
+            stats = estadisticas(
+                equipo_id=equipo_id,
+                total_mantenimientos=agregado.get("total", 0),
+                costo_total=agregado.get("costo") or 0,
+                pendientes=agregado.get("pendientes", 0),
+                suma_prioridad_pendientes=agregado.get("suma_prioridad") or 0,
+            )
+            grupo = inicios.get(equipo_id)
+            if grupo is not None:
+                total = int(grupos["total"][grupo])
+                fin = int(finales[grupo])
+                inicio = fin - min(total, EstadisticaEquipo.VENTANA_FECHAS) + 1
+                ventana = [
+                    _EPOCH + timedelta(microseconds=int(m))
+                    for m in micros[inicio : fin + 1][::-1]
+                ]
+                stats.total_completados = total
+                stats.suma_intervalos_dias = int(grupos["suma_intervalos"][grupo])
+                stats.fecha_ultimo_completado = ventana[0]
+                stats.ultimas_fechas = [_iso(f) for f in ventana]
+            filas.append(stats)
+
+        with transaction.atomic():
+            estadisticas.objects.all().delete()
+            estadisticas.objects.bulk_create(filas, batch_size=_LOTE_RECONSTRUCCION)
+
+        return len(filas)
@@ -0,0 +1,249 @@
+"""
+Buffer circular de experiencias para el aprendizaje diferido de SistemaIA
+
+Las experiencias (estado, acción, recompensa) se guardan en un archivo de
+registros de tamaño fijo mapeado en memoria: agregar es O(1) y no toca la
+base de datos, así que el endpoint de aprendizaje solo encola. Un worker
+(manage.py procesar_experiencias) las drena por mini-lotes y actualiza la
+Q-table. Si el buffer se llena se descartan las más antiguas.
+
+Layout del archivo: cabecera (_CABECERA) seguida de `capacidad` registros
+(REGISTRO). Los procesos se coordinan con flock sobre un archivo .lock
+cuando fcntl está disponible (en Windows solo hay exclusión entre hilos).
+
+Estado y acción se guardan como UTF-8 en campos de bytes fijos; agregar()
+rechaza lo que no entra en vez de cortarlo (un corte daría otra clave de
+la Q-table). La lectura no consume: leer() devuelve un lote desde una
+posición y confirmar() avanza el puntero recién cuando lo aplicado quedó
+guardado, así una caída a mitad de camino no pierde experiencias (se
+vuelven a aplicar). Drena un solo proceso a la vez.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    from k_ia import calculate_discounted_reward
+
+    RUST_AVAILABLE = True
+except ImportError:
+    RUST_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0xE7B0
+FORMATO = 2
+CAPACIDAD = 10_000
+
+# Bytes UTF-8 para los largos de ValorQ.estado (200) y ValorQ.accion (150)
+# con caracteres de hasta 2 bytes (tildes, ñ)
+REGISTRO = np.dtype(
+    [
+        ("estado", "S400"),
+        ("accion", "S300"),
+        ("recompensa", "<f8"),
+        ("exitoso", "?"),
+    ]
+)
+# Registros del formato 1: se convierten al abrir
+_REGISTRO_V1 = np.dtype(
+    [
+        ("estado", "S200"),
+        ("accion", "S100"),
+        ("recompensa", "<f8"),
+        ("exitoso", "?"),
+    ]
+)
+_CABECERA = np.dtype(
+    [
+        ("magic", "<i8"),
+        ("formato", "<i8"),
+        ("capacidad", "<i8"),
+        ("escritos", "<i8"),
+        ("leidos", "<i8"),
+        ("descartados", "<i8"),
+    ]
+)
+
+
+def retorno_descontado(recompensas, gamma: float) -> float:
+    """
+    Suma descontada de las recompensas con más peso a las últimas
+    (r_n + γ·r_n-1 + γ²·r_n-2 + ...)
+    """
+    if len(recompensas) == 0:
+        return 0.0
+    recientes_primero = np.asarray(recompensas, dtype=np.float64)[::-1]
+    if RUST_AVAILABLE:
+        return calculate_discounted_reward(recientes_primero.tolist(), gamma)[0]
+    pesos = gamma ** np.arange(len(recientes_primero))
+    return float(pesos @ recientes_primero)
+
+
+class BufferExperiencias:
+    """Cola FIFO acotada de experiencias respaldada por un archivo mmap"""
+
+    def __init__(self, ruta=None, capacidad=CAPACIDAD):
+        self.ruta = str(ruta or settings.IA_EXPERIENCIAS_PATH)
+        self.capacidad = capacidad
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd_lock = None
+        self._cabecera = None
+        self._registros = None
+
+    # ── Archivo y bloqueo ───────────────────────────────────
+
+    @contextmanager
+    def _bloqueo(self):
+        with self._lock:
+            self._abrir()
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._fd_lock, fcntl.LOCK_UN)
+
+    def _abrir(self):
+        """Mapea el archivo (una vez por proceso; flock no se hereda bien)"""
+        if self._pid == os.getpid():
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        self._fd_lock = os.open(f"{self.ruta}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self._fd_lock, fcntl.LOCK_EX)
+        try:
+            if not os.path.exists(self.ruta) or os.path.getsize(self.ruta) == 0:
+                self._crear()
+            cabecera = np.memmap(self.ruta, dtype=_CABECERA, mode="r+", shape=(1,))
+            if cabecera["magic"][0] == MAGIC and cabecera["formato"][0] == 1:
+                del cabecera
+                self._convertir_v1()
+                cabecera = np.memmap(self.ruta, dtype=_CABECERA, mode="r+", shape=(1,))
+            if cabecera["magic"][0] != MAGIC or cabecera["formato"][0] != FORMATO:
+                raise ValueError(f"Archivo de experiencias no soportado: {self.ruta}")
+            # Manda la capacidad con la que se creó el archivo
+            self.capacidad = int(cabecera["capacidad"][0])
+            self._cabecera = cabecera
+            self._registros = np.memmap(
+                self.ruta,
+                dtype=REGISTRO,
+                mode="r+",
+                offset=_CABECERA.itemsize,
+                shape=(self.capacidad,),
+            )
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd_lock, fcntl.LOCK_UN)
+        self._pid = os.getpid()
+
+    def _crear(self, pendientes=None, descartados: int = 0):
+        cabecera = np.zeros(1, dtype=_CABECERA)
+        cabecera["magic"] = MAGIC
+        cabecera["formato"] = FORMATO
+        cabecera["capacidad"] = self.capacidad
+        cabecera["descartados"] = descartados
+        registros = np.zeros(0, dtype=REGISTRO)
+        if pendientes is not None:
+            registros = pendientes.astype(REGISTRO)
+            cabecera["escritos"] = len(registros)
+        with open(self.ruta, "wb") as f:
+            f.write(cabecera.tobytes())
+            f.write(registros.tobytes())
+            f.truncate(_CABECERA.itemsize + self.capacidad * REGISTRO.itemsize)
+
+    def _convertir_v1(self):
+        """Reescribe un archivo del formato 1 conservando las pendientes"""
+        with open(self.ruta, "rb") as f:
+            cabecera = np.frombuffer(f.read(_CABECERA.itemsize), dtype=_CABECERA)[0]
+            registros = np.frombuffer(f.read(), dtype=_REGISTRO_V1)
+        self.capacidad = int(cabecera["capacidad"])
+        escritos, leidos = int(cabecera["escritos"]), int(cabecera["leidos"])
+        posiciones = np.arange(leidos, escritos) % self.capacidad
+        self._crear(registros[posiciones], int(cabecera["descartados"]))
+
+    def _contadores(self):
+        c = self._cabecera[0]
+        return int(c["escritos"]), int(c["leidos"])
+
+    # ── Operaciones ─────────────────────────────────────────
+
+    def agregar(
+        self, estado: str, accion: str, recompensa: float, exitoso: bool = True
+    ) -> int:
+        """
+        Encola una experiencia. Devuelve cuántas quedan pendientes.
+        ValueError si estado o acción no entran en el registro.
+        """
+        claves = estado.encode(), accion.encode()
+        for campo, clave in zip(("estado", "accion"), claves, strict=True):
+            if len(clave) > REGISTRO[campo].itemsize:
+                logger.warning(
+                    "Experiencia rechazada: %s de %s bytes", campo, len(clave)
+                )
+                raise ValueError(
+                    f"{campo} ocupa {len(clave)} bytes "
+                    f"(máximo {REGISTRO[campo].itemsize})"
+                )
+        with self._bloqueo():
+            escritos, leidos = self._contadores()
+            if escritos - leidos >= self.capacidad:
+                # Lleno: se pisa la más antigua
+                leidos += 1
+                self._cabecera["leidos"] = leidos
+                self._cabecera["descartados"] += 1
+            self._registros[escritos % self.capacidad] = (*claves, recompensa, exitoso)
+            self._cabecera["escritos"] = escritos + 1
+            return escritos + 1 - leidos
+
+    def leer(self, maximo: int, desde: int = None) -> tuple:
+        """
+        Hasta `maximo` experiencias en orden de llegada (copia), sin
+        sacarlas. `desde` es la posición de un leer() anterior más lo que
+        devolvió; por defecto, la primera pendiente.
+
+        Returns:
+            (posición del primer registro, registros)
+        """
+        with self._bloqueo():
+            escritos, leidos = self._contadores()
+            # Las más viejas pueden haberse pisado mientras tanto
+            desde = leidos if desde is None else max(desde, leidos)
+            cantidad = max(0, min(maximo, escritos - desde))
+            posiciones = (desde + np.arange(cantidad)) % self.capacidad
+            return desde, np.array(self._registros[posiciones])
+
+    def confirmar(self, hasta: int):
+        """Marca como procesadas las experiencias anteriores a `hasta`"""
+        with self._bloqueo():
+            escritos, leidos = self._contadores()
+            self._cabecera["leidos"] = min(max(leidos, hasta), escritos)
+
+    def pendientes(self) -> int:
+        with self._bloqueo():
+            escritos, leidos = self._contadores()
+            return escritos - leidos
+
+    def estadisticas(self) -> dict:
+        with self._bloqueo():
+            escritos, leidos = self._contadores()
+            return {
+                "capacidad": self.capacidad,
+                "pendientes": escritos - leidos,
+                "escritos": escritos,
+                "descartados": int(self._cabecera["descartados"][0]),
+            }
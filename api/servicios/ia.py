@@ -12,13 +12,11 @@ from api.constants import (
     CATEGORIA_GENERAL,
     ESTADO_PENDIENTE,
     ESTADO_EN_PROGRESO,
-    PALABRAS_CLAVE_PRIORIDAD,
     PRIORIDAD_ALTA,
     PRIORIDAD_BAJA,
     PRIORIDAD_MEDIA,
-    UMBRAL_PRIORIDAD_ALTA,
-    UMBRAL_PRIORIDAD_MEDIA,
 )
+from api.servicios.prioridad import matcher_prioridad
 
 
 class ServicioIA:
@@ -53,19 +51,12 @@ class ServicioIA:
     @staticmethod
     def calcular_prioridad(texto: str) -> int:
         """Calcula la prioridad basándose en palabras clave"""
-        texto_lower = texto.lower()
-        score = 0
+        return matcher_prioridad.calcular(texto)
 
-        for palabra in PALABRAS_CLAVE_PRIORIDAD:
-            if palabra in texto_lower:
-                score += 10
-
-        if score >= UMBRAL_PRIORIDAD_ALTA:
-            return PRIORIDAD_ALTA
-        elif score >= UMBRAL_PRIORIDAD_MEDIA:
-            return PRIORIDAD_MEDIA
-        else:
-            return PRIORIDAD_BAJA
+    @staticmethod
+    def calcular_prioridad_lote(textos) -> list:
+        """Calcula la prioridad de muchos textos con el mismo matcher"""
+        return matcher_prioridad.calcular_lote(textos)
 
     @staticmethod
     def buscar_tecnico(especialidad: str = None) -> dict:
@@ -157,6 +148,15 @@ class ServicioIA:
     @staticmethod
     def _entrenar_modelo_thread(epochs: int, n_samples: int):
         """Hilo de entrenamiento del modelo"""
+        try:
+            ServicioIA._entrenar_modelo(epochs, n_samples)
+        except Exception:
+            # Ya quedó registrado en _training_state (status y logs)
+            pass
+
+    @staticmethod
+    def _entrenar_modelo(epochs: int, n_samples: int, progreso=None):
+        """Entrena el modelo; progreso(epoca_actual) tras cada época"""
         try:
             ServicioIA._training_state["status"] = "training"
             ServicioIA._training_state["total_epochs"] = epochs
@@ -211,6 +211,9 @@ class ServicioIA:
                     f"Época {epoch+1}/{epochs} - Train Acc: {train_acc:.4f}, Val Acc: {val_acc:.4f}"
                 )
 
+                if progreso:
+                    progreso(epoch + 1)
+
                 time.sleep(0.5)
 
             ServicioIA._update_step(5, "completed")
@@ -243,6 +246,7 @@ class ServicioIA:
         except Exception as e:
             ServicioIA._training_state["status"] = "error"
             ServicioIA._log(f"Error en entrenamiento: {str(e)}")
+            raise
 
     @staticmethod
     def iniciar_entrenamiento(epochs: int = 10, n_samples: int = 1000):
@@ -253,6 +257,38 @@ class ServicioIA:
                 "mensaje": "Ya hay un entrenamiento en progreso",
             }
 
+        ServicioIA._reiniciar_estado_entrenamiento()
+        ServicioIA._training_thread = threading.Thread(
+            target=ServicioIA._entrenar_modelo_thread, args=(epochs, n_samples)
+        )
+        ServicioIA._training_thread.start()
+
+        return {"status": "iniciado", "epochs": epochs}
+
+    @staticmethod
+    def entrenar(epochs: int = 10, n_samples: int = 1000, progreso=None):
+        """
+        Entrena el modelo en el hilo actual (p. ej. dentro de una Tarea).
+
+        progreso: callback opcional progreso(epoca_actual). Los errores, y
+        la cancelación que lance el callback, se propagan al llamador.
+        """
+        if ServicioIA._training_state["status"] == "training":
+            return {
+                "status": "ya_entrenando",
+                "mensaje": "Ya hay un entrenamiento en progreso",
+            }
+
+        ServicioIA._reiniciar_estado_entrenamiento()
+        ServicioIA._entrenar_modelo(epochs, n_samples, progreso)
+        return {
+            "status": ServicioIA._training_state["status"],
+            "epochs": epochs,
+            "test_acc": ServicioIA._training_state["metrics"]["test_acc"],
+        }
+
+    @staticmethod
+    def _reiniciar_estado_entrenamiento():
         ServicioIA._stop_training = False
         ServicioIA._training_state["metrics"] = {
             "train_acc": [],
@@ -264,13 +300,6 @@ class ServicioIA:
         for step in ServicioIA._training_state["pipeline_steps"]:
             step["status"] = "pending"
 
-        ServicioIA._training_thread = threading.Thread(
-            target=ServicioIA._entrenar_modelo_thread, args=(epochs, n_samples)
-        )
-        ServicioIA._training_thread.start()
-
-        return {"status": "iniciado", "epochs": epochs}
-
     @staticmethod
     def detener_entrenamiento():
         """Detiene el entrenamiento en progreso"""
@@ -3,16 +3,21 @@ Sistema de IA Principal
 Integra: ML Training + Reinforcement Learning + Web Scraping + Decisiones Inteligentes
 """
 
+import atexit
 import random
 import pickle
 import os
 import numpy as np
-import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from django.core.cache import cache
 from django.utils import timezone
 
+from .entrenamiento_q import EntrenadorQ
+from .experiencias import BufferExperiencias, retorno_descontado
+from .indice_tecnicos import TecnicosCargados, indice_tecnicos
+from .prioridad import calcular_prioridad, calcular_prioridad_lote, normalizar_texto
+from .persistencia_q import PersistenciaQ
+from .tabla_q import TablaQ
+
 # Importar RL de Rust si está disponible
 try:
     from k_ia import calc_p_rust, update_q_value as rust_update_q
@@ -36,8 +41,11 @@ class SistemaIA:
     def __init__(self):
         self.estado = "idle"
 
-        # RL Configuration
-        self.q_table = self._cargar_conocimiento()
+        # RL Configuration (Q-table cargada al primer uso, no al importar)
+        self._persistencia = PersistenciaQ()
+        self._q_table = None
+        # Experiencias encoladas por el endpoint, drenadas por un worker
+        self.experiencias = BufferExperiencias()
         self.learning_rate = 0.1
         self.discount_factor = 0.95
         self.epsilon = 0.1  # Exploración
@@ -51,11 +59,24 @@ class SistemaIA:
             "aprendizajes_web": 0,
         }
 
+    @property
+    def q_table(self) -> TablaQ:
+        if self._q_table is None:
+            self._q_table = self._cargar_conocimiento()
+        else:
+            # Trae lo aprendido por otros workers (throttled)
+            self._persistencia.sincronizar(self._q_table)
+        return self._q_table
+
+    @q_table.setter
+    def q_table(self, tabla: TablaQ):
+        self._q_table = tabla
+
     # ═══════════════════════════════════════════════════════
     # DECISIONES INTELIGENTES
     # ═══════════════════════════════════════════════════════
 
-    def decidir_prioridad(self, descripcion: str, contexto: Dict = None) -> int:
+    def decidir_prioridad(self, descripcion: str, contexto: dict = None) -> int:
         """
         Decide prioridad combinando IA + RL
 
@@ -67,7 +88,8 @@ class SistemaIA:
 
         # Paso 1: Cálculo base
         if RUST_AVAILABLE:
-            prioridad_base = calc_p_rust(descripcion)
+            # Rust recibe el texto ya normalizado (sin tildes): mismo resultado
+            prioridad_base = calc_p_rust(normalizar_texto(descripcion))
         else:
             prioridad_base = self._calcular_prioridad_python(descripcion)
 
@@ -81,9 +103,38 @@ class SistemaIA:
 
         return prioridad_base
 
+    def decidir_prioridades_lote(self, descripciones: list, contextos: list) -> list:
+        """
+        decidir_prioridad() para muchos textos: la prioridad base sale de
+        una sola llamada al matcher (calc_p_batch si está Rust) y el ajuste
+        RL resuelve las columnas de la Q-table una vez para todo el lote.
+        """
+        from api.constants import PRIORIDAD_ALTA, PRIORIDAD_MEDIA, PRIORIDAD_BAJA
+
+        prioridades = [int(p) for p in calcular_prioridad_lote(descripciones)]
+
+        if any(contextos) and self.q_table:
+            acciones = [PRIORIDAD_BAJA, PRIORIDAD_MEDIA, PRIORIDAD_ALTA]
+            columnas = self.q_table.columnas([str(a) for a in acciones])
+            for i, contexto in enumerate(contextos):
+                if not contexto:
+                    continue
+                q_values = self.q_table.valores_columnas(
+                    self._crear_estado(contexto), columnas
+                )
+                prioridad_ajustada = self._elegir_por_q(acciones, q_values)
+                if prioridad_ajustada:
+                    prioridades[i] = int(prioridad_ajustada)
+
+        return prioridades
+
     def decidir_tecnico(
-        self, mantenimiento, tecnicos_disponibles: List
-    ) -> Optional[Dict]:
+        self,
+        mantenimiento,
+        tecnicos_disponibles: list = None,
+        especialidad: str = None,
+        top_k: int = 3,
+    ) -> dict | None:
         """
         Decide qué técnico asignar usando RL
 
@@ -91,40 +142,76 @@ class SistemaIA:
         - Tiempo de resolución
         - Costo
         - Éxito de la tarea
+
+        Sin lista explícita usa el índice en memoria de técnicos disponibles
+        (filtrado por especialidad si la hay). Incluye las `top_k`
+        alternativas con mejor Q.
         """
-        if not tecnicos_disponibles:
+        if tecnicos_disponibles is not None:
+            datos = TecnicosCargados(
+                [
+                    (t.id, t.nombre, t.especialidad, t.calificacion)
+                    for t in tecnicos_disponibles
+                ],
+                version=None,
+            )
+        else:
+            datos = indice_tecnicos.datos()
+        return self._decidir_tecnico_en(datos, mantenimiento, especialidad, top_k)
+
+    def decidir_tecnicos_lote(
+        self, mantenimientos: list, especialidades: list = None, top_k: int = 3
+    ) -> list:
+        """decidir_tecnico() para muchos mantenimientos con una sola instantánea"""
+        datos = indice_tecnicos.datos()
+        especialidades = especialidades or [None] * len(mantenimientos)
+        return [
+            self._decidir_tecnico_en(datos, mantenimiento, especialidad, top_k)
+            for mantenimiento, especialidad in zip(
+                mantenimientos, especialidades, strict=True
+            )
+        ]
+
+    def _decidir_tecnico_en(
+        self, datos, mantenimiento, especialidad: str, top_k: int
+    ) -> dict | None:
+        candidatos = datos.candidatos(especialidad)
+        if not len(candidatos):
             return None
 
         # Crear estado
-        estado = f"cat_{mantenimiento.equipo.categoria}_tipo_{mantenimiento.tipo}_pri_{mantenimiento.prioridad}"
-
-        # Acciones = técnicos disponibles
-        acciones = [f"tecnico_{t.id}" for t in tecnicos_disponibles]
+        estado = self._estado_mantenimiento(mantenimiento)
 
-        # Elegir mejor
-        mejor_accion = self._elegir_mejor_accion(estado, acciones)
+        # Q de todos los candidatos; empates por calificación (orden del índice)
+        q_values = datos.valores_q(self.q_table, estado, candidatos)
+        ranking = np.argsort(-q_values, kind="stable")
 
-        if mejor_accion:
-            tecnico_id = int(mejor_accion.split("_")[1])
-            tecnico = next(
-                (t for t in tecnicos_disponibles if t.id == tecnico_id), None
-            )
-            return {
-                "tecnico": tecnico,
-                "confianza": self._obtener_confianza(estado, mejor_accion),
-            }
+        # Epsilon-greedy, aleatorio si aún no hay experiencia
+        if np.random.random() < self.epsilon or q_values.max() == 0:
+            elegido = np.random.randint(len(candidatos))
+        else:
+            elegido = ranking[0]
 
-        # Fallback: técnico con mejor calificación
+        confianzas = np.clip(q_values / 100.0, 0.0, 1.0)
+        alternativas = [i for i in ranking[: top_k + 1] if i != elegido][:top_k]
         return {
-            "tecnico": max(tecnicos_disponibles, key=lambda t: t.calificacion),
-            "confianza": 0.5,
+            "tecnico": datos.tecnico(candidatos[elegido]),
+            "confianza": float(confianzas[elegido]),
+            "alternativas": [
+                {
+                    "tecnico": datos.tecnico(candidatos[i]),
+                    "q_valor": float(q_values[i]),
+                    "confianza": float(confianzas[i]),
+                }
+                for i in alternativas
+            ],
         }
 
     # ═══════════════════════════════════════════════════════
     # APRENDIZAJE CONTINUO
     # ═══════════════════════════════════════════════════════
 
-    def aprender_de_resultado(self, mantenimiento, resultado: Dict) -> Dict:
+    def aprender_de_resultado(self, mantenimiento, resultado: dict) -> dict:
         """
         Aprende de un resultado y actualiza conocimiento
 
@@ -141,7 +228,7 @@ class SistemaIA:
             Dict con info del aprendizaje
         """
         # Crear estado y acción
-        estado = f"cat_{mantenimiento.equipo.categoria}_tipo_{mantenimiento.tipo}_pri_{mantenimiento.prioridad}"
+        estado = self._estado_mantenimiento(mantenimiento)
         accion = f"tecnico_{mantenimiento.tecnico_asignado}"
 
         # Calcular recompensa
@@ -149,7 +236,7 @@ class SistemaIA:
 
         # Actualizar Q-value
         next_estado = f"{estado}_completado"
-        q_anterior = self.q_table.get(estado, {}).get(accion, 0.0)
+        q_anterior = self.q_table.valor(estado, accion)
         q_nuevo = self._actualizar_q_value(estado, accion, recompensa, next_estado)
 
         # Actualizar métricas
@@ -172,22 +259,115 @@ class SistemaIA:
             "precision_sistema": self.metricas["precision_actual"],
         }
 
-    def aprender_de_web(self, tema: str, max_resultados: int = 5) -> Dict:
+    def registrar_experiencia(self, mantenimiento, resultado: dict) -> dict:
+        """
+        Encola un resultado para aprendizaje diferido (O(1), sin tocar la BD)
+
+        Mismo estado, acción y recompensa que aprender_de_resultado; la
+        Q-table se actualiza después con procesar_experiencias(). ValueError
+        si las claves no entran en el buffer.
+        """
+        estado = self._estado_mantenimiento(mantenimiento)
+        accion = f"tecnico_{mantenimiento.tecnico_asignado}"
+        recompensa = self._calcular_recompensa(resultado)
+        exitoso = bool(resultado.get("fue_exitoso"))
+
+        pendientes = self.experiencias.agregar(estado, accion, recompensa, exitoso)
+
+        self.metricas["decisiones_totales"] += 1
+        if exitoso:
+            self.metricas["decisiones_correctas"] += 1
+        self.metricas["recompensa_acumulada"] += recompensa
+        self.metricas["precision_actual"] = self.metricas["decisiones_correctas"] / max(
+            self.metricas["decisiones_totales"], 1
+        )
+
+        return {
+            "recompensa": recompensa,
+            "pendientes": pendientes,
+            "precision_sistema": self.metricas["precision_actual"],
+        }
+
+    def procesar_experiencias(self, lote: int = 256, maximo: int = None) -> dict:
+        """
+        Drena el buffer de experiencias por mini-lotes y vuelca una vez
+
+        Args:
+            lote: Experiencias por mini-lote
+            maximo: Tope de experiencias a procesar (por defecto todas)
+
+        Returns:
+            Dict con procesadas, lotes y la recompensa descontada reciente
+        """
+        procesadas = lotes = 0
+        recompensas = []
+        desde = None
+        while maximo is None or procesadas < maximo:
+            cantidad = lote if maximo is None else min(lote, maximo - procesadas)
+            posicion, registros = self.experiencias.leer(cantidad, desde)
+            if not len(registros):
+                break
+            EntrenadorQ.aplicar_lote(
+                self,
+                [e.decode() for e in registros["estado"]],
+                [a.decode() for a in registros["accion"]],
+                registros["recompensa"],
+            )
+            recompensas.append(registros["recompensa"])
+            desde = posicion + len(registros)
+            procesadas += len(registros)
+            lotes += 1
+
+        if procesadas:
+            # Recién con la Q-table guardada se sacan del buffer
+            self.flush()
+            self.experiencias.confirmar(desde)
+        todas = np.concatenate(recompensas) if recompensas else np.zeros(0)
+        return {
+            "procesadas": procesadas,
+            "lotes": lotes,
+            "pendientes": self.experiencias.pendientes(),
+            "retorno_descontado": retorno_descontado(todas, self.discount_factor),
+        }
+
+    def aprender_de_web(
+        self, tema: str, max_resultados: int = 5, progreso=None
+    ) -> dict:
         """
         Busca en web, guarda conocimiento y genera recomendaciones
+
+        progreso: callback opcional progreso(resultado_actual, total), antes
+        de procesar cada resultado
         """
         from .scraping import ServicioScraping
+        from .scraping_async import cliente_scraping
         from api.models import BaseConocimiento, Recomendacion, Equipo
 
         # 1. Scraping Real
         resultados = ServicioScraping.buscar_web(tema, max_resultados)
 
+        # Lo ya procesado se marca en la caché HTTP por tema (el Q-value
+        # depende del tema), con la huella del texto extraído
+        cache = cliente_scraping.cache
+        consumidor = f"aprender_web:{tema}"
+        procesados = []
+
         nuevos_conocimientos = 0
         nuevas_recomendaciones = 0
+        sin_cambios = 0
 
-        for r in resultados:
+        for i, r in enumerate(resultados):
+            if progreso:
+                progreso(i, len(resultados))
             if "error" in r:
                 continue
+            url, huella = r.get("url"), r.get("huella")
+            # Mismo texto que el que se procesó la vez anterior
+            if huella and cache.procesado(url, consumidor) == huella:
+                sin_cambios += 1
+                continue
+            if huella:
+                procesados.append((url, huella))
 
             # 2. Guardar Conocimiento (Base de Datos)
             # Evitar duplicados por título
@@ -237,12 +417,16 @@ class SistemaIA:
 
         self.metricas["aprendizajes_web"] += nuevos_conocimientos
         self._guardar_conocimiento()
+        # Recién ahora: si algo falló antes, se vuelve a procesar
+        for url, huella in procesados:
+            cache.marcar_procesado(url, consumidor, huella)
 
         return {
             "tema": tema,
             "resultados_encontrados": len(resultados),
             "conocimientos_guardados": nuevos_conocimientos,
             "recomendaciones_generadas": nuevas_recomendaciones,
+            "sin_cambios": sin_cambios,
         }
 
     # ═══════════════════════════════════════════════════════
@@ -251,52 +435,45 @@ class SistemaIA:
 
     def _calcular_prioridad_python(self, texto: str) -> int:
         """Cálculo de prioridad en Python (fallback)"""
-        from api.constants import (
-            PALABRAS_CLAVE_PRIORIDAD,
-            PRIORIDAD_ALTA,
-            PRIORIDAD_MEDIA,
-            PRIORIDAD_BAJA,
-            UMBRAL_PRIORIDAD_ALTA,
-            UMBRAL_PRIORIDAD_MEDIA,
+        return calcular_prioridad(texto)
+
+    @staticmethod
+    def _estado_mantenimiento(mantenimiento) -> str:
+        """Estado de asignación de técnico de un mantenimiento"""
+        return (
+            f"cat_{mantenimiento.equipo.categoria}_tipo_{mantenimiento.tipo}"
+            f"_pri_{mantenimiento.prioridad}"
         )
 
-        texto_lower = texto.lower()
-        score = sum(
-            10 for palabra in PALABRAS_CLAVE_PRIORIDAD if palabra in texto_lower
-        )
-
-        if score >= UMBRAL_PRIORIDAD_ALTA:
-            return PRIORIDAD_ALTA
-        elif score >= UMBRAL_PRIORIDAD_MEDIA:
-            return PRIORIDAD_MEDIA
-        else:
-            return PRIORIDAD_BAJA
-
-    def _crear_estado(self, contexto: Dict) -> str:
+    def _crear_estado(self, contexto: dict) -> str:
         """Crea representación de estado"""
         return f"cat_{contexto.get('categoria', 0)}_tipo_{contexto.get('tipo', 'unknown')}_pri_{contexto.get('prioridad', 0)}"
 
-    def _elegir_mejor_accion(self, estado: str, acciones: List) -> any:
+    def _elegir_mejor_accion(self, estado: str, acciones: list) -> any:
         """Elige mejor acción usando epsilon-greedy"""
         if not acciones:
             return None
 
+        return self._elegir_por_q(
+            acciones, self.q_table.valores(estado, [str(a) for a in acciones])
+        )
+
+    def _elegir_por_q(self, acciones: list, q_values: np.ndarray) -> any:
+        """Epsilon-greedy sobre Q ya leídos (uno por acción)"""
         # Epsilon-greedy: exploración vs explotación
         if np.random.random() < self.epsilon:
             # Exploración: acción aleatoria
             return np.random.choice(acciones)
 
         # Explotación: mejor acción conocida
-        q_values = [self.q_table.get(estado, {}).get(str(a), 0.0) for a in acciones]
-
-        if max(q_values) == 0:
+        if q_values.max() == 0:
             # Si no hay experiencia, elegir aleatoriamente
             return np.random.choice(acciones)
 
-        max_idx = np.argmax(q_values)
+        max_idx = int(q_values.argmax())
         return acciones[max_idx]
 
-    def _calcular_recompensa(self, resultado: Dict) -> float:
+    def _calcular_recompensa(self, resultado: dict) -> float:
         """Calcula recompensa total basada en resultado"""
         reward = 0.0
 
@@ -324,18 +501,30 @@ class SistemaIA:
 
         return reward
 
+    def _calcular_recompensas_lote(
+        self, exitosos, dias, costo_real, costo_esperado
+    ) -> np.ndarray:
+        """Mismas reglas que _calcular_recompensa sobre arrays (una por fila)"""
+        exitosos = np.asarray(exitosos, dtype=bool)
+        dias = np.asarray(dias)
+        costo_real = np.asarray(costo_real, dtype=np.float64)
+        costo_esperado = np.asarray(costo_esperado, dtype=np.float64)
+
+        reward = np.where(exitosos, 10.0, -15.0)
+        reward += np.select([dias < 7, dias > 30], [5.0, -5.0], 0.0)
+        reward += np.select(
+            [costo_real < costo_esperado * 0.8, costo_real > costo_esperado * 1.5],
+            [3.0, -3.0],
+            0.0,
+        )
+        return reward
+
     def _actualizar_q_value(
         self, estado: str, accion: str, reward: float, next_estado: str
     ) -> float:
         """Actualiza Q-value usando Q-Learning"""
-        # Inicializar si no existe
-        if estado not in self.q_table:
-            self.q_table[estado] = {}
-        if accion not in self.q_table[estado]:
-            self.q_table[estado][accion] = 0.0
-
-        current_q = self.q_table[estado][accion]
-        next_max_q = max(self.q_table.get(next_estado, {}).values(), default=0.0)
+        current_q = self.q_table.valor(estado, accion)
+        next_max_q = self.q_table.max_estado(next_estado)
 
         # Q-Learning update
         if RUST_AVAILABLE:
@@ -347,31 +536,41 @@ class SistemaIA:
                 reward + self.discount_factor * next_max_q - current_q
             )
 
-        self.q_table[estado][accion] = new_q
+        self.q_table.asignar(estado, accion, new_q)
         return new_q
 
     def _obtener_confianza(self, estado: str, accion: str) -> float:
         """Obtiene confianza en una decisión (0-1)"""
-        q_value = self.q_table.get(estado, {}).get(accion, 0.0)
+        q_value = self.q_table.valor(estado, accion)
         # Normalizar a 0-1
         return min(max(q_value / 100.0, 0.0), 1.0)
 
-    def _cargar_conocimiento(self) -> Dict:
-        """Carga conocimiento desde cache"""
-        cached = cache.get("ia_sistema_q_table")
-        return json.loads(cached) if cached else {}
+    def _cargar_conocimiento(self) -> TablaQ:
+        """Carga conocimiento desde la tabla ValorQ"""
+        return self._persistencia.cargar()
 
     def _guardar_conocimiento(self):
-        """Guarda conocimiento en cache"""
-        cache.set("ia_sistema_q_table", json.dumps(self.q_table), timeout=None)
+        """Vuelca cambios pendientes si se superó el umbral o el intervalo"""
+        self._persistencia.registrar(self.q_table)
+
+    def flush(self) -> int:
+        """Fuerza el volcado de todos los cambios pendientes"""
+        if self._q_table is None:
+            return 0
+        return self._persistencia.flush(self._q_table)
+
+    def exportar_q_table(self) -> dict:
+        """Q-table en el formato JSON histórico {estado: {accion: q}}"""
+        return self.q_table.exportar()
 
-    def obtener_estadisticas(self) -> Dict:
+    def obtener_estadisticas(self) -> dict:
         """Estadísticas completas del sistema"""
         return {
             "estado": self.estado,
             "rust_habilitado": RUST_AVAILABLE,
             "total_estados": len(self.q_table),
-            "total_acciones": sum(len(actions) for actions in self.q_table.values()),
+            "total_acciones": self.q_table.total_acciones,
+            "memoria_q_bytes": self.q_table.memoria_bytes(),
             "metricas": self.metricas,
             "configuracion": {
                 "learning_rate": self.learning_rate,
@@ -380,10 +579,11 @@ class SistemaIA:
             },
         }
 
-    def reiniciar_conocimiento(self) -> Dict:
+    def reiniciar_conocimiento(self) -> dict:
         """Reinicia el conocimiento (usar con precaución)"""
         old_size = len(self.q_table)
-        self.q_table = {}
+        self._persistencia.borrar_todo()
+        self.q_table = TablaQ()
         self.metricas = {
             "decisiones_totales": 0,
             "decisiones_correctas": 0,
@@ -398,6 +598,15 @@ class SistemaIA:
 
 # Instancia global única
 ia_sistema = SistemaIA()
+
+
+@atexit.register
+def _volcar_al_salir():
+    """Persiste lo que quede pendiente al terminar el proceso"""
+    if ia_sistema._q_table is not None:
+        ia_sistema._persistencia.flush_seguro(ia_sistema._q_table)
+
+
 # Auto-learning methods para ia_core.py
 
 
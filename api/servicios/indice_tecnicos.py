@@ -0,0 +1,150 @@
+"""
+Índice en memoria de técnicos disponibles para asignación por RL
+
+Los técnicos disponibles se cargan una vez en arrays (ordenados por
+calificación descendente) agrupados por especialidad, junto con su acción
+"tecnico_{id}" y la columna que esa acción ocupa en la Q-table. Elegir
+técnico es entonces una lectura vectorizada de Q sobre los candidatos,
+sin consultas ni strings por request.
+
+Las señales de Recurso invalidan el índice del proceso y suben el contador
+de versión "tecnicos"; los demás procesos lo comparan cada
+INTERVALO_SINCRONIZACION segundos. Los update() masivos no disparan
+señales: llamar a notificar_cambio() después.
+"""
+
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+
+from api.models import Recurso
+
+from .versiones import incrementar_version, leer_version
+
+CONTADOR = "tecnicos"
+# Segundos entre comprobaciones del contador de versión
+INTERVALO_SINCRONIZACION = 2.0
+
+
+class Tecnico(NamedTuple):
+    id: int
+    nombre: str
+    especialidad: str
+    calificacion: float
+
+
+class TecnicosCargados:
+    """Instantánea inmutable del índice (se reemplaza entera al recargar)"""
+
+    def __init__(self, filas, version):
+        self.version = version
+        ids, nombres, especialidades, calificaciones = (
+            zip(*filas, strict=True) if filas else ((), (), (), ())
+        )
+        self.ids = np.array(ids, dtype=np.int64)
+        self.calificaciones = np.array(calificaciones, dtype=np.float64)
+        self.nombres = list(nombres)
+        self.especialidades = list(especialidades)
+        self.acciones = [f"tecnico_{i}" for i in ids]
+        self.todos = np.arange(len(filas), dtype=np.intp)
+
+        # Posiciones estables: cada grupo sigue ordenado por calificación
+        self.grupos = {}
+        if filas:
+            etiquetas, grupo = np.unique(
+                np.array(especialidades, dtype=object), return_inverse=True
+            )
+            orden = np.argsort(grupo, kind="stable")
+            cortes = np.cumsum(np.bincount(grupo))[:-1]
+            self.grupos = dict(zip(etiquetas, np.split(orden, cortes), strict=True))
+        self._columnas = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def tecnico(self, posicion: int) -> Tecnico:
+        return Tecnico(
+            int(self.ids[posicion]),
+            self.nombres[posicion],
+            self.especialidades[posicion],
+            float(self.calificaciones[posicion]),
+        )
+
+    def candidatos(self, especialidad: str = None) -> np.ndarray:
+        """
+        Posiciones de los técnicos de la especialidad (todos si no hay
+        ninguno con ella), por calificación descendente
+        """
+        if especialidad and especialidad in self.grupos:
+            return self.grupos[especialidad]
+        return self.todos
+
+    def columnas_q(self, tabla) -> np.ndarray:
+        """
+        Columna de cada técnico en el bloque de técnicos de la Q-table
+        (cacheada mientras el bloque no crezca ni se vacíe la tabla)
+        """
+        bloque = tabla.tecnicos
+        cache = self._columnas
+        if cache is not None and cache[0] is bloque:
+            if cache[1] == bloque.total_columnas:
+                return cache[2]
+            # Solo pueden haber aparecido las acciones que faltaban
+            columnas = cache[2].copy()
+            faltan = np.flatnonzero(columnas < 0)
+            columnas[faltan] = bloque.columnas([self.acciones[i] for i in faltan])
+        else:
+            columnas = bloque.columnas(self.acciones)
+        self._columnas = (bloque, bloque.total_columnas, columnas)
+        return columnas
+
+    def valores_q(self, tabla, estado: str, candidatos: np.ndarray) -> np.ndarray:
+        """Q(estado, tecnico) de cada candidato en una lectura vectorizada"""
+        columnas = self.columnas_q(tabla)[candidatos]
+        return tabla.tecnicos.valores_columnas(estado, columnas)
+
+
+class IndiceTecnicos:
+    """Mantiene al día la instantánea de técnicos disponibles"""
+
+    def __init__(self, intervalo=INTERVALO_SINCRONIZACION):
+        self.intervalo = intervalo
+        self._datos = None
+        self._sucio = True
+        self._ultima_comprobacion = 0.0
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        """Fuerza la recarga en el próximo uso (este proceso)"""
+        self._sucio = True
+
+    def notificar_cambio(self):
+        """Invalida aquí y, al confirmar la transacción, en los demás procesos"""
+        self.invalidar()
+        transaction.on_commit(lambda: incrementar_version(CONTADOR))
+
+    def datos(self) -> TecnicosCargados:
+        """Instantánea vigente (recarga si cambió la versión)"""
+        ahora = time.monotonic()
+        if not self._sucio and ahora - self._ultima_comprobacion < self.intervalo:
+            return self._datos
+        with self._lock:
+            self._ultima_comprobacion = ahora
+            version = leer_version(CONTADOR)
+            if self._sucio or self._datos is None or version != self._datos.version:
+                # Antes de leer: un cambio durante la carga vuelve a ensuciar
+                self._sucio = False
+                filas = list(
+                    Recurso.objects.filter(tipo=Recurso.TIPO_TECNICO, disponible=True)
+                    .order_by("-calificacion", "id")
+                    .values_list("id", "nombre", "especialidad", "calificacion")
+                )
+                self._datos = TecnicosCargados(filas, version)
+            return self._datos
+
+
+# Instancia global
+indice_tecnicos = IndiceTecnicos()
@@ -0,0 +1,233 @@
+"""
+Persistencia write-behind de la Q-table de SistemaIA, compartida entre workers
+
+Las actualizaciones solo acumulan deltas en TablaQ; se vuelcan a la tabla
+ValorQ por lotes al superar un umbral de cambios o un intervalo de tiempo,
+o con flush() explícito. El volcado es un upsert aditivo
+(INSERT ... ON CONFLICT DO UPDATE SET valor = valor + delta), así que los
+workers que aprenden en paralelo no se pisan. Cada volcado publica una
+versión nueva del contador "q_table"; los demás procesos la comparan cada
+INTERVALO_SINCRONIZACION segundos y traen solo las filas más nuevas.
+
+Borrar filas no deja versión que traer, así que borrar_todo() publica
+además una generación nueva (contador "q_table_reinicio"). Un proceso que
+ve otra generación vacía su TablaQ y la recarga; sus deltas pendientes
+son de la tabla borrada y se descartan, también si llega a volcarlos
+antes de sincronizar.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import ValorQ
+
+from .tabla_q import TablaQ
+from .versiones import incrementar_version, leer_version, leer_versiones
+
+logger = logging.getLogger(__name__)
+
+# Cambios acumulados que fuerzan un volcado
+UMBRAL_SUCIOS = 500
+# Segundos máximos entre volcados mientras haya actividad
+INTERVALO_FLUSH = 5.0
+# Segundos entre comprobaciones del contador de versión
+INTERVALO_SINCRONIZACION = 2.0
+CHUNK_CARGA = 2000
+# Claves más largas no caben en ValorQ (PostgreSQL rechaza el lote entero)
+MAX_ESTADO = ValorQ._meta.get_field("estado").max_length
+MAX_ACCION = ValorQ._meta.get_field("accion").max_length
+CONTADOR = "q_table"
+CONTADOR_REINICIO = "q_table_reinicio"
+# Vale 1 cuando algún proceso ya importó el snapshot legado
+CONTADOR_LEGADO = "q_table_legado"
+# Snapshot JSON anterior (se importa una vez si la tabla ValorQ está vacía)
+CLAVE_CACHE_LEGADA = "ia_sistema_q_table"
+
+
+def _sql_upsert_aditivo() -> str:
+    tabla = connection.ops.quote_name(ValorQ._meta.db_table)
+    return (
+        f"INSERT INTO {tabla} (estado, accion, valor, version, fecha_actualizacion) "
+        "VALUES (%s, %s, %s, %s, %s) "
+        "ON CONFLICT (estado, accion) DO UPDATE SET "
+        f"valor = {tabla}.valor + excluded.valor, "
+        "version = excluded.version, "
+        "fecha_actualizacion = excluded.fecha_actualizacion"
+    )
+
+
+class PersistenciaQ:
+    """Volcado incremental de TablaQ a ValorQ y refresco entre procesos"""
+
+    def __init__(
+        self,
+        umbral=UMBRAL_SUCIOS,
+        intervalo=INTERVALO_FLUSH,
+        intervalo_sincronizacion=INTERVALO_SINCRONIZACION,
+    ):
+        self.umbral = umbral
+        self.intervalo = intervalo
+        self.intervalo_sincronizacion = intervalo_sincronizacion
+        self.version = 0
+        self.generacion = 0
+        self._ultimo_flush = time.monotonic()
+        self._ultima_sincronizacion = time.monotonic()
+        self._lock = threading.Lock()
+
+    def cargar(self) -> TablaQ:
+        """Carga la Q-table completa leyendo ValorQ por bloques"""
+        tabla = TablaQ()
+        self._recargar(tabla)
+
+        if not len(tabla):
+            legado = cache.get(CLAVE_CACHE_LEGADA)
+            if legado:
+                self._importar_legado(json.loads(legado))
+                self._recargar(tabla)
+        return tabla
+
+    def _importar_legado(self, datos: dict):
+        """
+        Escribe el snapshot JSON anterior en ValorQ. Lo hace un solo
+        proceso: bajo el bloqueo del contador se comprueba y se pone la
+        marca CONTADOR_LEGADO, y las filas se insertan tal cual (no con el
+        upsert aditivo, que lo sumaría una vez por proceso).
+        """
+        with transaction.atomic():
+            version = incrementar_version(CONTADOR)
+            if leer_version(CONTADOR_LEGADO):
+                return
+            ValorQ.objects.bulk_create(
+                [
+                    ValorQ(estado=estado, accion=accion, valor=valor, version=version)
+                    for estado, acciones in datos.items()
+                    for accion, valor in acciones.items()
+                ],
+                batch_size=CHUNK_CARGA,
+                ignore_conflicts=True,
+            )
+            incrementar_version(CONTADOR_LEGADO)
+
+    def _recargar(self, tabla: TablaQ):
+        """Vacía `tabla` y la llena con el contenido actual de ValorQ"""
+        # Versión leída antes que las filas: lo que llegue después se refresca
+        self.version, self.generacion = leer_versiones(CONTADOR, CONTADOR_REINICIO)
+        self._ultima_sincronizacion = time.monotonic()
+
+        tabla.vaciar()
+        filas = ValorQ.objects.order_by().values_list("estado", "accion", "valor")
+        for estado, accion, valor in filas.iterator(chunk_size=CHUNK_CARGA):
+            tabla.asignar(estado, accion, valor, marcar=False)
+
+    def sincronizar(self, tabla: TablaQ, forzar: bool = False) -> int:
+        """
+        Trae las filas escritas por otros procesos desde la última versión
+        vista. Sin cambios cuesta una consulta cada intervalo_sincronizacion.
+
+        Returns:
+            Filas refrescadas
+        """
+        ahora = time.monotonic()
+        transcurrido = ahora - self._ultima_sincronizacion
+        if not forzar and transcurrido < self.intervalo_sincronizacion:
+            return 0
+        self._ultima_sincronizacion = ahora
+
+        version, generacion = leer_versiones(CONTADOR, CONTADOR_REINICIO)
+        if generacion != self.generacion:
+            with self._lock:
+                self._recargar(tabla)
+            return tabla.total_acciones
+        if version == self.version:
+            return 0
+
+        filas = (
+            ValorQ.objects.filter(version__gt=self.version, version__lte=version)
+            .order_by()
+            .values_list("estado", "accion", "valor")
+        )
+        refrescadas = 0
+        with self._lock:
+            for estado, accion, valor in filas.iterator(chunk_size=CHUNK_CARGA):
+                tabla.sincronizar(estado, accion, valor)
+                refrescadas += 1
+            self.version = version
+        return refrescadas
+
+    def registrar(self, tabla: TablaQ):
+        """Llamar tras cada aprendizaje: vuelca si toca por tamaño o tiempo"""
+        vencido = time.monotonic() - self._ultimo_flush >= self.intervalo
+        if tabla.total_sucios >= self.umbral or (vencido and tabla.total_sucios):
+            self.flush(tabla)
+
+    def flush(self, tabla: TablaQ) -> int:
+        """Suma los deltas pendientes en ValorQ. Devuelve cuántos se escribieron"""
+        with self._lock:
+            self._ultimo_flush = time.monotonic()
+            cambios = self._descartar_invalidos(tabla.tomar_sucios())
+            if not cambios:
+                return 0
+            try:
+                fecha = connection.ops.adapt_datetimefield_value(timezone.now())
+                with transaction.atomic():
+                    # Bloquea el contador hasta el commit: versiones en orden
+                    # (borrar_todo lo toma antes de borrar)
+                    version = incrementar_version(CONTADOR)
+                    reiniciada = leer_version(CONTADOR_REINICIO) != self.generacion
+                    if not reiniciada:
+                        with connection.cursor() as cursor:
+                            cursor.executemany(
+                                _sql_upsert_aditivo(),
+                                [(e, a, d, version, fecha) for e, a, d in cambios],
+                            )
+            except Exception:
+                tabla.marcar_sucios(cambios)
+                raise
+            if reiniciada:
+                logger.info(
+                    "Q-table reiniciada por otro proceso: %s cambios descartados",
+                    len(cambios),
+                )
+                self._recargar(tabla)
+                return 0
+        return len(cambios)
+
+    @staticmethod
+    def _descartar_invalidos(cambios: list) -> list:
+        """
+        Quita (y registra) las celdas que nunca se podrían escribir: si se
+        devolvieran a pendientes harían fallar todos los volcados siguientes.
+        """
+        validos = []
+        for cambio in cambios:
+            estado, accion, _ = cambio
+            if len(estado) > MAX_ESTADO or len(accion) > MAX_ACCION:
+                logger.error(
+                    "Q(%r, %r) descartado: clave más larga que la columna",
+                    estado[:50],
+                    accion[:50],
+                )
+                continue
+            validos.append(cambio)
+        return validos
+
+    def flush_seguro(self, tabla: TablaQ):
+        """flush() que solo registra el error (para atexit)"""
+        try:
+            self.flush(tabla)
+        except Exception:
+            logger.exception("No se pudo volcar la Q-table")
+
+    def borrar_todo(self):
+        """Vacía ValorQ y publica una generación nueva para los demás procesos"""
+        with transaction.atomic():
+            self.version = incrementar_version(CONTADOR)
+            ValorQ.objects.all().delete()
+            self.generacion = incrementar_version(CONTADOR_REINICIO)
+        cache.delete(CLAVE_CACHE_LEGADA)
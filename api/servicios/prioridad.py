@@ -0,0 +1,117 @@
+"""
+Cálculo de prioridad por palabras clave
+
+Un único matcher precompilado a partir de PALABRAS_CLAVE_PRIORIDAD: una
+regex de alternancia dentro de un lookahead encuentra todas las palabras
+presentes en una sola pasada (mismas semánticas que `palabra in texto`).
+El texto se normaliza sin tildes ni mayúsculas antes de comparar.
+
+Si la extensión k_ia está compilada, el matcher global configura en Rust
+el mismo automata (mismos pesos y umbrales) y los lotes se resuelven con
+calc_p_batch, sin el GIL.
+"""
+
+import re
+import unicodedata
+
+from api.constants import (
+    PALABRAS_CLAVE_PRIORIDAD,
+    PRIORIDAD_ALTA,
+    PRIORIDAD_BAJA,
+    PRIORIDAD_MEDIA,
+    UMBRAL_PRIORIDAD_ALTA,
+    UMBRAL_PRIORIDAD_MEDIA,
+)
+
+try:
+    from k_ia import calc_p_batch, configurar_prioridad
+
+    RUST_AVAILABLE = True
+except ImportError:
+    RUST_AVAILABLE = False
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas y sin tildes ("Crítico" -> "critico")"""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class MatcherPrioridad:
+    """Puntaje de prioridad con un matcher compilado una sola vez"""
+
+    def __init__(
+        self,
+        palabras_clave=PALABRAS_CLAVE_PRIORIDAD,
+        umbral_alta=UMBRAL_PRIORIDAD_ALTA,
+        umbral_media=UMBRAL_PRIORIDAD_MEDIA,
+        usar_rust=False,
+    ):
+        self.umbral_alta = umbral_alta
+        self.umbral_media = umbral_media
+        self.pesos = {
+            normalizar_texto(palabra): peso
+            for palabras in palabras_clave.values()
+            for palabra, peso in palabras
+        }
+
+        # En cada posición gana la palabra más larga; las que son
+        # subcadenas de ella quedan implícitas (cierre precalculado)
+        self.implicadas = {
+            palabra: [otra for otra in self.pesos if otra in palabra]
+            for palabra in self.pesos
+        }
+        alternancia = "|".join(
+            re.escape(p) for p in sorted(self.pesos, key=len, reverse=True)
+        )
+        self.patron = re.compile(f"(?=({alternancia}))") if self.pesos else None
+
+        self.usar_rust = usar_rust and RUST_AVAILABLE
+        if self.usar_rust:
+            configurar_prioridad(
+                list(self.pesos.items()),
+                umbral_alta,
+                umbral_media,
+                (PRIORIDAD_ALTA, PRIORIDAD_MEDIA, PRIORIDAD_BAJA),
+            )
+
+    def palabras_encontradas(self, texto: str) -> set:
+        """Palabras clave contenidas en el texto"""
+        if self.patron is None:
+            return set()
+        encontradas = set()
+        for coincidencia in self.patron.finditer(normalizar_texto(texto)):
+            encontradas.update(self.implicadas[coincidencia.group(1)])
+        return encontradas
+
+    def puntaje(self, texto: str) -> int:
+        """Suma de pesos de las palabras clave presentes (una vez cada una)"""
+        return sum(self.pesos[p] for p in self.palabras_encontradas(texto))
+
+    def calcular(self, texto: str) -> int:
+        """Prioridad (ALTA/MEDIA/BAJA) según los umbrales configurados"""
+        score = self.puntaje(texto or "")
+        if score >= self.umbral_alta:
+            return PRIORIDAD_ALTA
+        elif score >= self.umbral_media:
+            return PRIORIDAD_MEDIA
+        else:
+            return PRIORIDAD_BAJA
+
+    def calcular_lote(self, textos) -> list:
+        """Prioridad de muchos textos (una sola llamada a Rust si está)"""
+        if self.usar_rust:
+            return calc_p_batch([normalizar_texto(t or "") for t in textos])
+        return [self.calcular(texto) for texto in textos]
+
+
+# Instancia global
+matcher_prioridad = MatcherPrioridad(usar_rust=True)
+
+
+def calcular_prioridad(texto: str) -> int:
+    return matcher_prioridad.calcular(texto)
+
+
+def calcular_prioridad_lote(textos) -> list:
+    return matcher_prioridad.calcular_lote(textos)
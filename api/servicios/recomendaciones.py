@@ -2,9 +2,28 @@
 Motor de Recomendaciones Proactivas
 """
 
+import time
 from datetime import datetime, timedelta
-from django.db.models import Avg, Count, Q
-from api.models import Equipo, Mantenimiento, Recomendacion, BaseConocimiento
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from api.constants import ESTADO_PENDIENTE
+from api.models import (
+    Equipo,
+    EstadisticaEquipo,
+    Mantenimiento,
+    Recomendacion,
+)
+
+from .analitica_predictiva import _EPOCH, _MICROS_DIA, _a_micros, agrupar_intervalos
+
+# Último costo por encima del promedio que dispara la recomendación (+30%)
+UMBRAL_SOBRECOSTO = Decimal("1.3")
+CENTAVO = Decimal("0.01")
 
 
 class MotorRecomendaciones:
@@ -41,75 +60,88 @@ class MotorRecomendaciones:
     @staticmethod
     def _predecir_mantenimiento(equipo):
         """Predice cuándo necesitará mantenimiento"""
-        # Obtener historial
-        mantenimientos = Mantenimiento.objects.filter(
-            equipo=equipo, estado=4, fecha_completada__isnull=False  # 4 = completado
-        ).order_by("-fecha_completada")[:5]
-
-        if mantenimientos.count() < 2:
+        # Historial precalculado (últimos completados, más reciente primero)
+        estadistica = EstadisticaEquipo.objects.filter(equipo=equipo).first()
+        if estadistica is None or len(estadistica.ultimas_fechas) < 2:
             return None
 
+        fechas = [datetime.fromisoformat(f) for f in estadistica.ultimas_fechas]
+
         # Calcular promedio de días entre mantenimientos
         intervalos = []
-        for i in range(len(mantenimientos) - 1):
-            delta = (
-                mantenimientos[i].fecha_completada
-                - mantenimientos[i + 1].fecha_completada
-            ).days
+        for i in range(len(fechas) - 1):
+            delta = (fechas[i] - fechas[i + 1]).days
             intervalos.append(delta)
 
         if not intervalos:
             return None
 
         promedio_dias = sum(intervalos) / len(intervalos)
-        ultimo = mantenimientos[0]
-        dias_desde_ultimo = (
-            datetime.now().date() - ultimo.fecha_completada.date()
-        ).days
+        dias_desde_ultimo = (datetime.now().date() - fechas[0].date()).days
 
+        rec = MotorRecomendaciones._construir_prediccion(
+            equipo.id, promedio_dias, dias_desde_ultimo, timezone.now()
+        )
+        if rec:
+            rec.save()
+        return rec
+
+    @staticmethod
+    def _construir_prediccion(equipo_id, promedio_dias, dias_desde_ultimo, ahora):
+        """Regla de mantenimiento preventivo (sin guardar)"""
         # Si está cerca del promedio, recomendar
-        if dias_desde_ultimo >= promedio_dias * 0.8:
-            confianza = min(dias_desde_ultimo / promedio_dias, 1.0)
-            from django.utils import timezone
-
-            return Recomendacion.objects.create(
-                equipo=equipo,
-                tipo=Recomendacion.TIPO_MANTENIMIENTO,
-                prioridad=(
-                    Recomendacion.PRIORIDAD_ALTA
-                    if confianza > 0.9
-                    else Recomendacion.PRIORIDAD_MEDIA
-                ),
-                titulo=f"Mantenimiento preventivo recomendado",
-                descripcion=f"Basado en historial, este equipo necesitará mantenimiento en ~{int(promedio_dias - dias_desde_ultimo)} días",
-                accion_sugerida="Programar mantenimiento preventivo",
-                confianza=confianza,
-                fecha_estimada=timezone.now()
-                + timedelta(days=int(promedio_dias - dias_desde_ultimo)),
-            )
+        if dias_desde_ultimo < promedio_dias * 0.8:
+            return None
 
-        return None
+        # Mantenimientos el mismo día: promedio 0, confianza máxima
+        confianza = (
+            min(dias_desde_ultimo / promedio_dias, 1.0) if promedio_dias else 1.0
+        )
+        dias_restantes = int(promedio_dias - dias_desde_ultimo)
+
+        return Recomendacion(
+            equipo_id=equipo_id,
+            tipo=Recomendacion.TIPO_MANTENIMIENTO,
+            prioridad=(
+                Recomendacion.PRIORIDAD_ALTA
+                if confianza > 0.9
+                else Recomendacion.PRIORIDAD_MEDIA
+            ),
+            titulo="Mantenimiento preventivo recomendado",
+            descripcion=f"Basado en historial, este equipo necesitará mantenimiento en ~{dias_restantes} días",
+            accion_sugerida="Programar mantenimiento preventivo",
+            confianza=confianza,
+            fecha_estimada=ahora + timedelta(days=dias_restantes),
+        )
 
     @staticmethod
     def _generar_alerta_critica(equipo):
         """Genera alerta para equipos críticos"""
         # Verificar si tiene mantenimientos pendientes
         pendientes = Mantenimiento.objects.filter(
-            equipo=equipo, estado=1  # 1 = pendiente (ESTADO_PENDIENTE)
+            equipo=equipo, estado=ESTADO_PENDIENTE
         ).count()
 
-        if pendientes > 2:
-            return Recomendacion.objects.create(
-                equipo=equipo,
-                tipo=Recomendacion.TIPO_ALERTA,
-                prioridad=Recomendacion.PRIORIDAD_CRITICA,
-                titulo="Equipo crítico con múltiples tareas pendientes",
-                descripcion=f"Este equipo crítico tiene {pendientes} mantenimientos pendientes",
-                accion_sugerida="Priorizar y asignar recursos inmediatamente",
-                confianza=1.0,
-            )
+        rec = MotorRecomendaciones._construir_alerta(equipo.id, pendientes)
+        if rec:
+            rec.save()
+        return rec
 
-        return None
+    @staticmethod
+    def _construir_alerta(equipo_id, pendientes):
+        """Regla de equipo crítico con tareas acumuladas (sin guardar)"""
+        if pendientes <= 2:
+            return None
+
+        return Recomendacion(
+            equipo_id=equipo_id,
+            tipo=Recomendacion.TIPO_ALERTA,
+            prioridad=Recomendacion.PRIORIDAD_CRITICA,
+            titulo="Equipo crítico con múltiples tareas pendientes",
+            descripcion=f"Este equipo crítico tiene {pendientes} mantenimientos pendientes",
+            accion_sugerida="Priorizar y asignar recursos inmediatamente",
+            confianza=1.0,
+        )
 
     @staticmethod
     def _optimizar_costos(equipo):
@@ -125,33 +157,188 @@ class MotorRecomendaciones:
         costo_promedio = mantenimientos.aggregate(Avg("costo"))["costo__avg"]
         ultimo_costo = mantenimientos.order_by("-fecha_completada").first().costo
 
-        if ultimo_costo and ultimo_costo > costo_promedio * 1.3:
-            ahorro = ultimo_costo - costo_promedio
-
-            return Recomendacion.objects.create(
-                equipo=equipo,
-                tipo=Recomendacion.TIPO_COSTO,
-                prioridad=Recomendacion.PRIORIDAD_MEDIA,
-                titulo="Oportunidad de optimización de costos",
-                descripcion=f"Último mantenimiento costó ${ultimo_costo}, 30% más que el promedio (${costo_promedio:.2f})",
-                accion_sugerida="Revisar proveedores o técnicos asignados",
-                confianza=0.75,
-                ahorro_estimado=ahorro,
-            )
+        rec = MotorRecomendaciones._construir_costo(
+            equipo.id, ultimo_costo, costo_promedio
+        )
+        if rec:
+            rec.save()
+        return rec
 
-        return None
+    @staticmethod
+    def _construir_costo(equipo_id, ultimo_costo, costo_promedio):
+        """Regla de sobrecosto respecto al promedio (sin guardar)"""
+        if not ultimo_costo or ultimo_costo <= costo_promedio * UMBRAL_SOBRECOSTO:
+            return None
+
+        return Recomendacion(
+            equipo_id=equipo_id,
+            tipo=Recomendacion.TIPO_COSTO,
+            prioridad=Recomendacion.PRIORIDAD_MEDIA,
+            titulo="Oportunidad de optimización de costos",
+            descripcion=f"Último mantenimiento costó ${ultimo_costo}, 30% más que el promedio (${costo_promedio:.2f})",
+            accion_sugerida="Revisar proveedores o técnicos asignados",
+            confianza=0.75,
+            ahorro_estimado=ultimo_costo - costo_promedio,
+        )
 
     @staticmethod
     def generar_todas_recomendaciones():
         """Genera recomendaciones para todos los equipos"""
-        equipos = Equipo.objects.all()
-        total = 0
+        return MotorRecomendaciones.generar_recomendaciones_lote()["total"]
+
+    @staticmethod
+    def generar_recomendaciones_lote(equipos=None, ahora=None, batch_size=500):
+        """
+        Genera recomendaciones para muchos equipos en modo masivo
+
+        Carga el historial de todos los equipos en una consulta agregada,
+        evalúa las tres reglas sobre arrays en memoria y escribe con
+        bulk_create por bloques, omitiendo las que ya existen sin ver
+        (mismo equipo y tipo).
+
+        Args:
+            equipos: QuerySet de Equipo a procesar (por defecto todos)
+            ahora: Instante de referencia (por defecto timezone.now())
+            batch_size: Tamaño de bloque para bulk_create
+
+        Returns:
+            Dict con total creado, omitidas, equipos y tiempos por fase
+        """
+        ahora = ahora or timezone.now()
+        hoy = timezone.localtime(ahora).date()
+        equipos = Equipo.objects.all() if equipos is None else equipos
+        tiempos = {}
+
+        # Fase 1: carga agregada
+        inicio = time.perf_counter()
+        ultimo_costo = (
+            Mantenimiento.objects.filter(equipo_id=OuterRef("pk"), costo__isnull=False)
+            .order_by("-fecha_completada")
+            .values("costo")[:1]
+        )
+        filas = list(
+            equipos.order_by("id")
+            .annotate(
+                n_costos=Count("mantenimientos__costo"),
+                costo_promedio=Avg("mantenimientos__costo"),
+                n_pendientes=Count(
+                    "mantenimientos", filter=Q(mantenimientos__estado=ESTADO_PENDIENTE)
+                ),
+                ultimo_costo=Subquery(ultimo_costo),
+            )
+            .values_list(
+                "id",
+                "es_critico",
+                "n_pendientes",
+                "n_costos",
+                "costo_promedio",
+                "ultimo_costo",
+                "estadistica__ultimas_fechas",
+            )
+        )
+        existentes = set(
+            Recomendacion.objects.filter(
+                vista=False, equipo__in=equipos.values("id")
+            ).values_list("equipo_id", "tipo")
+        )
+        tiempos["carga"] = time.perf_counter() - inicio
 
-        for equipo in equipos:
-            recs = MotorRecomendaciones.generar_recomendaciones_equipo(equipo.id)
-            total += len(recs)
+        # Fase 2: evaluación vectorizada de reglas
+        inicio = time.perf_counter()
+        nuevas = []
+        if filas:
+            ids = np.array([f[0] for f in filas], dtype=np.int64)
+            criticos = np.array([f[1] for f in filas], dtype=bool)
+            pendientes = np.array([f[2] for f in filas], dtype=np.int64)
+            n_costos = np.array([f[3] for f in filas], dtype=np.int64)
+            promedio = np.array([float(f[4] or 0) for f in filas])
+            ultimo = np.array([float(f[5] or 0) for f in filas])
 
-        return total
+            # Historial: ventana de últimas fechas aplanada por equipo
+            grupos_ids = []
+            micros = []
+            for equipo_id, *_, fechas in filas:
+                for fecha in reversed(fechas or []):
+                    grupos_ids.append(equipo_id)
+                    micros.append(_a_micros(datetime.fromisoformat(fecha)))
+            grupos = agrupar_intervalos(
+                np.array(grupos_ids, dtype=np.int64), np.array(micros, dtype=np.int64)
+            )
+            con_historial = grupos["total"] >= 2
+            g_ids = grupos["ids"][con_historial]
+            g_promedio = grupos["suma_intervalos"][con_historial] / (
+                grupos["total"][con_historial] - 1
+            )
+            g_dias = hoy.toordinal() - (
+                _EPOCH.date().toordinal()
+                + grupos["ultimo"][con_historial] // _MICROS_DIA
+            )
+            predecir = g_dias >= g_promedio * 0.8
+
+            alertar = criticos & (pendientes > 2)
+            sobrecosto = (
+                (n_costos >= 3)
+                & (ultimo != 0)
+                & (ultimo > promedio * float(UMBRAL_SOBRECOSTO))
+            )
+
+            for i in np.flatnonzero(predecir):
+                nuevas.append(
+                    MotorRecomendaciones._construir_prediccion(
+                        int(g_ids[i]), float(g_promedio[i]), int(g_dias[i]), ahora
+                    )
+                )
+            for i in np.flatnonzero(alertar):
+                nuevas.append(
+                    MotorRecomendaciones._construir_alerta(
+                        int(ids[i]), int(pendientes[i])
+                    )
+                )
+            for i in np.flatnonzero(sobrecosto):
+                nuevas.append(
+                    MotorRecomendaciones._construir_costo(
+                        # Subquery no cuantiza en todos los motores (SQLite)
+                        int(ids[i]),
+                        Decimal(filas[i][5]).quantize(CENTAVO),
+                        filas[i][4],
+                    )
+                )
+        nuevas = [r for r in nuevas if r is not None]
+        a_crear = [r for r in nuevas if (r.equipo_id, r.tipo) not in existentes]
+        tiempos["evaluacion"] = time.perf_counter() - inicio
+
+        # Fase 3: escritura por bloques
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            for i in range(0, len(a_crear), batch_size):
+                Recomendacion.objects.bulk_create(a_crear[i : i + batch_size])
+        tiempos["escritura"] = time.perf_counter() - inicio
+
+        return {
+            "total": len(a_crear),
+            "omitidas": len(nuevas) - len(a_crear),
+            "equipos": len(filas),
+            "tiempos": tiempos,
+        }
+
+    @staticmethod
+    def rangos_equipos(partes):
+        """
+        Divide el espacio de ids de Equipo en rangos contiguos (inclusive)
+        con un número similar de equipos cada uno.
+
+        Returns:
+            Lista de tuplas (desde, hasta), como máximo `partes`
+        """
+        ids = np.fromiter(
+            Equipo.objects.order_by("id").values_list("id", flat=True),
+            dtype=np.int64,
+        )
+        return [
+            (int(tramo[0]), int(tramo[-1]))
+            for tramo in np.array_split(ids, max(1, min(partes, ids.size)))
+            if tramo.size
+        ]
 
 
 # Instancia global
@@ -1,7 +1,14 @@
-import requests
-from bs4 import BeautifulSoup
 import re
 
+from bs4 import BeautifulSoup
+
+from .scraping_async import TIMEOUT, cliente_scraping
+
+URL_BUSQUEDA = "https://html.duckduckgo.com/html/"
+# Segundos para visitar todos los resultados de una búsqueda
+PRESUPUESTO_VISITAS = 8.0
+MAX_CONTENIDO = 5000
+
 
 class ServicioScraping:
     """Servicio de web scraping para recolección de datos de entrenamiento"""
@@ -11,6 +18,10 @@ class ServicioScraping:
         """
         Busca información en la web usando DuckDuckGo
 
+        Los sitios de los resultados se visitan en paralelo (ver
+        scraping_async) con un presupuesto total de PRESUPUESTO_VISITAS
+        segundos; los que no responden a tiempo usan el snippet.
+
         Args:
             consulta: Término de búsqueda
             max_resultados: Máximo de resultados a retornar
@@ -22,47 +33,51 @@ class ServicioScraping:
 
         try:
             # Búsqueda con DuckDuckGo (no requiere API key)
-            url = f"https://html.duckduckgo.com/html/?q={consulta}"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-
-            response = requests.get(url, headers=headers, timeout=10)
+            response = cliente_scraping.sesion.get(
+                URL_BUSQUEDA, params={"q": consulta}, timeout=10
+            )
             soup = BeautifulSoup(response.text, "html.parser")
 
             # Extraer resultados
+            encontrados = []
             for resultado in soup.select(".result")[:max_resultados]:
                 titulo = resultado.select_one(".result__title")
                 snippet = resultado.select_one(".result__snippet")
                 enlace = resultado.select_one("a.result__a")
 
                 if titulo and enlace:
-                    url_destino = enlace.get("href")
-                    titulo_texto = titulo.get_text(strip=True)
-
-                    # Navegar al link real para extraer contenido profundo
-                    contenido_profundo = ServicioScraping.visitar_sitio(url_destino)
-
-                    # Si falló la visita, usar el snippet como fallback
-                    contenido_final = (
-                        contenido_profundo
-                        if contenido_profundo
-                        else snippet.get_text(strip=True)
+                    encontrados.append(
+                        (
+                            titulo.get_text(strip=True),
+                            enlace.get("href"),
+                            snippet.get_text(strip=True) if snippet else "",
+                        )
                     )
 
-                    resultados.append(
-                        {
-                            "titulo": titulo_texto,
-                            "url": url_destino,
-                            "descripcion": (
-                                snippet.get_text(strip=True) if snippet else ""
-                            ),
-                            "contenido": contenido_final,
-                            "features": ServicioScraping.extraer_features(
-                                contenido_final
-                            ),
-                        }
-                    )
+            # Navegar a los links reales para extraer contenido profundo
+            paginas = cliente_scraping.visitar_sitios(
+                [url for _, url, _ in encontrados],
+                presupuesto=PRESUPUESTO_VISITAS,
+            )
+
+            for (titulo_texto, url_destino, descripcion), pagina in zip(
+                encontrados, paginas, strict=True
+            ):
+                # Si falló la visita, usar el snippet como fallback
+                contenido_final = (
+                    pagina.texto[:MAX_CONTENIDO] if pagina else descripcion
+                )
+                resultados.append(
+                    {
+                        "titulo": titulo_texto,
+                        "url": url_destino,
+                        "descripcion": descripcion,
+                        "contenido": contenido_final,
+                        "features": ServicioScraping.extraer_features(contenido_final),
+                        # Para saber si este contenido ya se procesó
+                        "huella": pagina.huella if pagina else None,
+                    }
+                )
 
         except Exception as e:
             return [{"error": str(e)}]
@@ -72,24 +87,11 @@ class ServicioScraping:
     @staticmethod
     def visitar_sitio(url: str) -> str:
         """
-        Navega a la URL y extrae el texto principal de los párrafos.
+        Navega a la URL y extrae el texto de los primeros párrafos.
         """
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            resp = requests.get(url, headers=headers, timeout=4)
-            if resp.status_code == 200:
-                s = BeautifulSoup(resp.text, "html.parser")
-                # Extraer parrafos para tener texto real
-                parrafos = s.find_all("p")
-                texto_completo = "\n".join([p.get_text() for p in parrafos])
-
-                # Limitar tamaño para no saturar BD
-                return texto_completo[:5000] if texto_completo else None
-        except:
-            return None
-        return None
+        pagina = cliente_scraping.visitar_sitios([url], presupuesto=TIMEOUT)[0]
+        # Limitar tamaño para no saturar BD
+        return pagina.texto[:MAX_CONTENIDO] if pagina else None
 
     @staticmethod
     def extraer_features(texto: str) -> dict:
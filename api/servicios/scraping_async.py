@@ -0,0 +1,269 @@
+"""
+Descarga concurrente de páginas para el scraping
+
+asyncio coordina las visitas y limita la concurrencia: un semáforo global
+(tamaño del pool de conexiones) y uno por host. Cada descarga corre en un
+hilo del pool con requests en modo stream, y el HTML se parsea a medida
+que llega: al juntar los primeros N párrafos se corta la conexión sin
+bajar el resto. Todo el lote tiene un presupuesto de tiempo; lo que no
+termina a tiempo queda como None.
+
+Las páginas pasan por la caché HTTP (cache_http): una entrada fresca o
+revalidada con 304 no se descarga, y si ya tiene los párrafos extraídos
+tampoco se vuelve a parsear. Se guarda solo la parte del HTML leída.
+Cada Pagina lleva la huella de los párrafos extraídos (no del HTML, que
+puede cortarse en distinto punto con el mismo contenido) para que quien
+la procese la compare con cache_http.procesado().
+
+visitar_sitios() es la API síncrona (envuelve asyncio.run).
+"""
+
+import asyncio
+import codecs
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache_http import admite_cache, cache_http, huella
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+MAX_CONEXIONES = 8
+MAX_POR_HOST = 2
+# Segundos por descarga y para el lote completo
+TIMEOUT = 4.0
+PRESUPUESTO = 10.0
+MAX_PARRAFOS = 20
+# Tope de HTML leído por página aunque no se junten los párrafos
+MAX_BYTES = 512 * 1024
+TAMANO_BLOQUE = 8192
+
+
+class ExtractorParrafos(HTMLParser):
+    """Junta el texto de los <p> hasta `max_parrafos` (parser incremental)"""
+
+    IGNORADAS = {"script", "style", "noscript"}
+
+    def __init__(self, max_parrafos: int = MAX_PARRAFOS):
+        super().__init__()
+        self.max_parrafos = max_parrafos
+        self.parrafos = []
+        self._actual = None
+        self._ignorando = 0
+
+    @property
+    def completo(self) -> bool:
+        return len(self.parrafos) >= self.max_parrafos
+
+    def _cerrar_parrafo(self):
+        if self._actual is not None:
+            self.parrafos.append("".join(self._actual))
+            self._actual = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.IGNORADAS:
+            self._ignorando += 1
+        elif tag == "p" and not self.completo:
+            # Un <p> dentro de otro cierra el anterior (como los navegadores)
+            self._cerrar_parrafo()
+            self._actual = []
+
+    def handle_endtag(self, tag):
+        if tag in self.IGNORADAS:
+            self._ignorando = max(0, self._ignorando - 1)
+        elif tag == "p":
+            self._cerrar_parrafo()
+
+    def handle_data(self, data):
+        if self._actual is not None and not self._ignorando:
+            self._actual.append(data)
+
+    def close(self):
+        super().close()
+        self._cerrar_parrafo()
+        del self.parrafos[self.max_parrafos :]
+
+    def texto(self) -> str:
+        return "\n".join(self.parrafos)
+
+
+def _extracto(parser: ExtractorParrafos) -> dict:
+    """Párrafos ya extraídos que se guardan junto al HTML en la caché"""
+    return {
+        "max_parrafos": parser.max_parrafos,
+        "parrafos": len(parser.parrafos),
+        "texto": parser.texto(),
+    }
+
+
+class Pagina(NamedTuple):
+    texto: str
+    # Huella del texto extraído
+    huella: str
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "Pagina":
+        return cls(texto, huella(texto.encode()))
+
+
+class ClienteScraping:
+    """Pool de conexiones compartido + límites de concurrencia por host"""
+
+    def __init__(
+        self,
+        max_conexiones: int = MAX_CONEXIONES,
+        max_por_host: int = MAX_POR_HOST,
+        timeout: float = TIMEOUT,
+        max_bytes: int = MAX_BYTES,
+        cache=None,
+    ):
+        self.cache = cache or cache_http
+        self.max_conexiones = max_conexiones
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+        self.sesion = requests.Session()
+        self.sesion.headers["User-Agent"] = USER_AGENT
+        adaptador = HTTPAdapter(
+            pool_connections=max_conexiones, pool_maxsize=max_conexiones
+        )
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self._hilos = ThreadPoolExecutor(
+            max_workers=max_conexiones, thread_name_prefix="scraping"
+        )
+
+    def extraer_parrafos(self, url: str, max_parrafos: int, limite: float):
+        """
+        Descarga bloqueante (corre en el pool): parsea mientras lee y corta
+        al juntar los párrafos, al pasar max_bytes o al vencer `limite`
+        (time.monotonic()). Devuelve una Pagina o None.
+        """
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            return None
+        entrada = previa = self.cache.obtener(url)
+        if entrada is not None and not self._alcanza(entrada, max_parrafos):
+            entrada = None
+        if entrada is not None and entrada.fresca():
+            return self._desde_cache(entrada, max_parrafos)
+
+        respuesta = self.sesion.get(
+            url,
+            stream=True,
+            timeout=min(self.timeout, restante),
+            headers=entrada.condicionales() if entrada is not None else None,
+        )
+        try:
+            if respuesta.status_code == 304 and entrada is not None:
+                return self._desde_cache(self.cache.revalidar(entrada), max_parrafos)
+            if respuesta.status_code != 200:
+                return None
+            encoding = respuesta.encoding or "utf-8"
+            decodificador = codecs.getincrementaldecoder(encoding)(errors="replace")
+            parser = ExtractorParrafos(max_parrafos)
+            bloques = []
+            leidos = 0
+            completo = True
+            for bloque in respuesta.iter_content(TAMANO_BLOQUE):
+                parser.feed(decodificador.decode(bloque))
+                bloques.append(bloque)
+                leidos += len(bloque)
+                if (
+                    parser.completo
+                    or leidos >= self.max_bytes
+                    or time.monotonic() >= limite
+                ):
+                    completo = False
+                    break
+            parser.close()
+        finally:
+            respuesta.close()
+
+        cuerpo = b"".join(bloques)
+        if admite_cache(respuesta.headers):
+            self.cache.guardar(
+                url,
+                cuerpo,
+                etag=respuesta.headers.get("ETag"),
+                last_modified=respuesta.headers.get("Last-Modified"),
+                encoding=encoding,
+                completo=completo,
+                extracto=_extracto(parser),
+                procesados=previa.procesados if previa is not None else None,
+            )
+        return Pagina.de_texto(parser.texto())
+
+    @staticmethod
+    def _alcanza(entrada, max_parrafos: int) -> bool:
+        """Si el HTML guardado (quizá solo el comienzo) da los párrafos pedidos"""
+        if entrada.completo:
+            return True
+        extracto = entrada.extracto or {}
+        return extracto.get("parrafos", 0) >= max_parrafos
+
+    def _desde_cache(self, entrada, max_parrafos: int) -> Pagina:
+        """Pagina desde una entrada vigente, sin parsear si ya estaba extraída"""
+        extracto = entrada.extracto
+        if extracto and extracto["max_parrafos"] == max_parrafos:
+            return Pagina.de_texto(extracto["texto"])
+        parser = ExtractorParrafos(max_parrafos)
+        parser.feed(entrada.cuerpo().decode(entrada.encoding, errors="replace"))
+        parser.close()
+        self.cache.con_extracto(entrada, _extracto(parser))
+        return Pagina.de_texto(parser.texto())
+
+    async def visitar_todos(
+        self, urls, max_parrafos: int = MAX_PARRAFOS, presupuesto: float = PRESUPUESTO
+    ) -> list:
+        """Pagina de cada URL (None si falló, no llegó a tiempo o no tiene texto)"""
+        loop = asyncio.get_running_loop()
+        limite = time.monotonic() + presupuesto
+        global_ = asyncio.Semaphore(self.max_conexiones)
+        por_host = {}
+
+        async def visitar(url):
+            host = urlsplit(url).netloc
+            semaforo_host = por_host.setdefault(
+                host, asyncio.Semaphore(self.max_por_host)
+            )
+            async with semaforo_host, global_:
+                try:
+                    pagina = await loop.run_in_executor(
+                        self._hilos, self.extraer_parrafos, url, max_parrafos, limite
+                    )
+                except (requests.RequestException, OSError, ValueError, LookupError):
+                    return None
+            return pagina if pagina and pagina.texto else None
+
+        tareas = [asyncio.ensure_future(visitar(url)) for url in urls]
+        if not tareas:
+            return []
+        await asyncio.wait(tareas, timeout=max(0.0, limite - time.monotonic()))
+        resultados = []
+        for tarea in tareas:
+            if tarea.done():
+                resultados.append(tarea.result())
+            else:
+                # El hilo termina solo: su timeout no pasa del límite
+                tarea.cancel()
+                resultados.append(None)
+        return resultados
+
+    def visitar_sitios(
+        self, urls, max_parrafos: int = MAX_PARRAFOS, presupuesto: float = PRESUPUESTO
+    ) -> list:
+        """Versión síncrona de visitar_todos"""
+        return asyncio.run(self.visitar_todos(urls, max_parrafos, presupuesto))
+
+
+# Instancia global
+cliente_scraping = ClienteScraping()
@@ -8,6 +8,9 @@ from bs4 import BeautifulSoup
 import random
 from typing import List, Dict
 
+from .cache_http import cache_http
+from .scraping_async import cliente_scraping
+
 
 class ScrapingInteligente:
     """Scraping real de datos técnicos"""
@@ -70,12 +73,12 @@ class ScrapingInteligente:
     def extraer_conocimiento(url: str) -> Dict:
         """Extrae conocimiento de una URL"""
         try:
-            response = requests.get(
-                url, timeout=5, headers={"User-Agent": "Mozilla/5.0"}
-            )
+            respuesta = cache_http.descargar(cliente_scraping.sesion, url, timeout=5)
 
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
+            if respuesta is not None:
+                soup = BeautifulSoup(
+                    respuesta.cuerpo, "html.parser", from_encoding=respuesta.encoding
+                )
 
                 # Extraer párrafos
                 paragraphs = soup.find_all("p")
@@ -92,6 +95,7 @@ class ScrapingInteligente:
                     "texto": texto[:500],
                     "keywords": keywords,
                     "exito": True,
+                    "huella": respuesta.huella,
                 }
         except Exception as e:
             return {"url": url, "error": str(e), "exito": False}
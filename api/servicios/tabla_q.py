@@ -0,0 +1,278 @@
+"""
+Q-table para el aprendizaje por refuerzo de SistemaIA
+
+Estados y acciones se internan una vez (clave -> índice) y los valores
+viven en matrices NumPy float64 que crecen duplicando su capacidad. Una
+máscara booleana distingue los pares (estado, acción) aprendidos de los
+ceros de relleno, así que la exportación sigue siendo el mismo dict de
+dicts que antes.
+
+Las acciones van en dos bloques separados:
+
+- general: prioridades, "extraer", etc. Pocas columnas para todos los
+  estados.
+- tecnicos: las acciones "tecnico_{id}", una por técnico. Solo tienen
+  fila los estados en los que se aprendió alguna asignación (los de
+  categoría/tipo/prioridad de un mantenimiento), no los de prioridad,
+  web o "_completado", que son la mayoría.
+
+Así la fila ancha (una columna por técnico, 9 bytes cada una con la
+máscara) se paga solo en los estados de asignación, y decidir_tecnico
+sigue leyendo de una vez el Q de todos los candidatos. memoria_bytes()
+informa el total en las estadísticas.
+
+Cada escritura acumula su delta (valor nuevo - anterior) por celda; la
+capa de persistencia vuelca solo esos deltas (write-behind) y los suma
+atómicamente a lo que hayan escrito otros procesos.
+"""
+
+import numpy as np
+
+PREFIJO_TECNICO = "tecnico_"
+
+
+class BloqueQ:
+    """Matriz densa estados × acciones de un grupo de acciones"""
+
+    def __init__(self, capacidad_estados: int, capacidad_acciones: int):
+        self.filas = {}
+        self._columnas = {}
+        self.nombres_acciones = []
+        self.q = np.zeros((capacidad_estados, capacidad_acciones))
+        self.presente = np.zeros((capacidad_estados, capacidad_acciones), dtype=bool)
+
+    def fila(self, estado: str, crear: bool = False):
+        fila = self.filas.get(estado)
+        if fila is None and crear:
+            fila = len(self.filas)
+            self.filas[estado] = fila
+            self._asegurar_capacidad(fila + 1, self.q.shape[1])
+        return fila
+
+    def columna(self, accion: str, crear: bool = False):
+        columna = self._columnas.get(accion)
+        if columna is None and crear:
+            columna = len(self.nombres_acciones)
+            self._columnas[accion] = columna
+            self.nombres_acciones.append(accion)
+            self._asegurar_capacidad(self.q.shape[0], columna + 1)
+        return columna
+
+    def _asegurar_capacidad(self, filas: int, columnas: int):
+        """Duplica la capacidad en el eje que se quedó corto"""
+        capacidad_f, capacidad_c = self.q.shape
+        if filas <= capacidad_f and columnas <= capacidad_c:
+            return
+        while capacidad_f < filas:
+            capacidad_f *= 2
+        while capacidad_c < columnas:
+            capacidad_c *= 2
+
+        q = np.zeros((capacidad_f, capacidad_c))
+        presente = np.zeros((capacidad_f, capacidad_c), dtype=bool)
+        viejo_f, viejo_c = self.q.shape
+        q[:viejo_f, :viejo_c] = self.q
+        presente[:viejo_f, :viejo_c] = self.presente
+        self.q, self.presente = q, presente
+
+    def celda(self, estado: str, accion: str):
+        """(fila, columna) si el par está aprendido, si no None"""
+        fila = self.filas.get(estado)
+        columna = self._columnas.get(accion)
+        if fila is None or columna is None or not self.presente[fila, columna]:
+            return None
+        return fila, columna
+
+    def max_fila(self, estado: str):
+        """Máximo Q de las acciones aprendidas en `estado` (None si no hay)"""
+        fila = self.filas.get(estado)
+        if fila is None:
+            return None
+        columnas = self.presente[fila]
+        if not columnas.any():
+            return None
+        return float(self.q[fila, columnas].max())
+
+    @property
+    def total_columnas(self) -> int:
+        """Acciones internadas (los índices existentes nunca cambian)"""
+        return len(self.nombres_acciones)
+
+    def columnas(self, acciones) -> np.ndarray:
+        """Índice de columna de cada acción (-1 si no se conoce)"""
+        return np.fromiter(
+            (self._columnas.get(a, -1) for a in acciones),
+            dtype=np.intp,
+            count=len(acciones),
+        )
+
+    def valores_columnas(self, estado: str, columnas: np.ndarray) -> np.ndarray:
+        """Vector de Q para columnas ya resueltas (0.0 donde no hay experiencia)"""
+        resultado = np.zeros(len(columnas))
+        fila = self.filas.get(estado)
+        if fila is None:
+            return resultado
+
+        conocidas = columnas >= 0
+        columnas = columnas[conocidas]
+        resultado[conocidas] = np.where(
+            self.presente[fila, columnas], self.q[fila, columnas], 0.0
+        )
+        return resultado
+
+    def exportar_fila(self, estado: str) -> dict:
+        fila = self.filas.get(estado)
+        if fila is None:
+            return {}
+        return {
+            self.nombres_acciones[c]: float(self.q[fila, c])
+            for c in np.flatnonzero(self.presente[fila])
+        }
+
+    def memoria_bytes(self) -> int:
+        return self.q.nbytes + self.presente.nbytes
+
+
+class TablaQ:
+    """Q-table con índice internado de estados/acciones en dos bloques densos"""
+
+    def __init__(
+        self,
+        capacidad_estados: int = 64,
+        capacidad_acciones: int = 16,
+        capacidad_estados_tecnicos: int = 8,
+        capacidad_tecnicos: int = 64,
+    ):
+        self._capacidad_inicial = (
+            capacidad_estados,
+            capacidad_acciones,
+            capacidad_estados_tecnicos,
+            capacidad_tecnicos,
+        )
+        self.vaciar()
+
+    def vaciar(self):
+        """Deja la tabla sin estados, acciones ni deltas pendientes"""
+        estados, acciones, estados_tecnicos, tecnicos = self._capacidad_inicial
+        self.general = BloqueQ(estados, acciones)
+        self.tecnicos = BloqueQ(estados_tecnicos, tecnicos)
+        # Todos los estados conocidos, en orden de aparición
+        self._estados = {}
+        self._total_acciones = 0
+        self._deltas = {}
+
+    def _bloque(self, accion: str) -> BloqueQ:
+        return self.tecnicos if accion.startswith(PREFIJO_TECNICO) else self.general
+
+    # ── Lectura ─────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._estados)
+
+    def __contains__(self, estado: str) -> bool:
+        return estado in self._estados
+
+    @property
+    def total_acciones(self) -> int:
+        """Pares (estado, acción) aprendidos"""
+        return self._total_acciones
+
+    def valor(self, estado: str, accion: str, defecto: float = 0.0) -> float:
+        bloque = self._bloque(accion)
+        celda = bloque.celda(estado, accion)
+        if celda is None:
+            return defecto
+        return float(bloque.q[celda])
+
+    def max_estado(self, estado: str, defecto: float = 0.0) -> float:
+        """Máximo Q de las acciones aprendidas en `estado`"""
+        maximos = [
+            m
+            for m in (self.general.max_fila(estado), self.tecnicos.max_fila(estado))
+            if m is not None
+        ]
+        return max(maximos) if maximos else defecto
+
+    def valores(self, estado: str, acciones) -> np.ndarray:
+        """Vector de Q para `acciones` (0.0 donde no hay experiencia)"""
+        return np.fromiter(
+            (self.valor(estado, a) for a in acciones),
+            dtype=np.float64,
+            count=len(acciones),
+        )
+
+    # Lecturas vectorizadas de acciones generales (los técnicos, por
+    # self.tecnicos)
+
+    @property
+    def total_columnas(self) -> int:
+        return self.general.total_columnas
+
+    def columnas(self, acciones) -> np.ndarray:
+        return self.general.columnas(acciones)
+
+    def valores_columnas(self, estado: str, columnas: np.ndarray) -> np.ndarray:
+        return self.general.valores_columnas(estado, columnas)
+
+    # ── Escritura ───────────────────────────────────────────
+
+    def asignar(self, estado: str, accion: str, valor: float, marcar: bool = True):
+        bloque = self._bloque(accion)
+        self._estados.setdefault(estado, None)
+        fila = bloque.fila(estado, crear=True)
+        columna = bloque.columna(accion, crear=True)
+        if not bloque.presente[fila, columna]:
+            bloque.presente[fila, columna] = True
+            self._total_acciones += 1
+        if marcar:
+            celda = (estado, accion)
+            anterior = bloque.q[fila, columna]
+            self._deltas[celda] = self._deltas.get(celda, 0.0) + valor - anterior
+        bloque.q[fila, columna] = valor
+
+    def sincronizar(self, estado: str, accion: str, valor_compartido: float):
+        """Toma el valor del almacén compartido sin perder deltas locales"""
+        pendiente = self._deltas.get((estado, accion), 0.0)
+        self.asignar(estado, accion, valor_compartido + pendiente, marcar=False)
+
+    # ── Cambios pendientes de persistir ─────────────────────
+
+    @property
+    def total_sucios(self) -> int:
+        return len(self._deltas)
+
+    def tomar_sucios(self) -> list:
+        """Devuelve [(estado, accion, delta)] pendientes y los limpia"""
+        deltas, self._deltas = self._deltas, {}
+        return [(e, a, float(delta)) for (e, a), delta in deltas.items()]
+
+    def marcar_sucios(self, cambios):
+        """Devuelve a pendientes los deltas cuyo volcado falló"""
+        for estado, accion, delta in cambios:
+            celda = (estado, accion)
+            self._deltas[celda] = self._deltas.get(celda, 0.0) + delta
+
+    # ── Exportación ─────────────────────────────────────────
+
+    def exportar(self) -> dict:
+        """Formato histórico: {estado: {accion: q}}"""
+        return {
+            estado: {
+                **self.general.exportar_fila(estado),
+                **self.tecnicos.exportar_fila(estado),
+            }
+            for estado in self._estados
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "TablaQ":
+        tabla = cls()
+        for estado, acciones in datos.items():
+            tabla._estados.setdefault(estado, None)
+            for accion, valor in acciones.items():
+                tabla.asignar(estado, accion, valor)
+        return tabla
+
+    def memoria_bytes(self) -> int:
+        """Bytes de los arrays de valores, incluida la capacidad de reserva"""
+        return self.general.memoria_bytes() + self.tecnicos.memoria_bytes()
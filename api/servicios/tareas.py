@@ -0,0 +1,357 @@
+"""
+Cola de tareas en base de datos
+
+Los endpoints pesados (generar datos, pipeline, aprendizaje web,
+entrenamientos, autómata) encolan una Tarea y responden 202; el comando
+procesar_tareas las ejecuta fuera de los workers web. Pueden correr varios
+workers a la vez: cada uno reclama una tarea pendiente con un UPDATE
+condicional (pendiente → en_curso) que solo uno puede ganar, sin depender
+de SELECT ... FOR UPDATE (SQLite no lo tiene).
+
+Los manejadores se registran con @manejador("tipo") y reciben los
+parámetros y un ContextoTarea; avisar() guarda el progreso y corta con
+TareaCancelada si se pidió cancelar la tarea.
+
+Mientras una tarea corre, su worker renueva `latido` (en cada avisar() y
+desde un hilo aparte, para los manejadores que no avisan). Si el worker
+muere, la tarea queda en curso sin latido: pasado PLAZO_LATIDO, reclamar()
+la devuelve a la cola, o la da por fallida tras MAX_INTENTOS.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.models import Tarea
+
+logger = logging.getLogger(__name__)
+
+# Pendientes que se intentan reclamar por pasada (si otro worker gana una)
+CANDIDATOS_RECLAMO = 10
+# Sin latido por más que esto, el worker de una tarea en curso se da por muerto
+PLAZO_LATIDO = timedelta(minutes=5)
+# Reclamos de una misma tarea antes de darla por fallida
+MAX_INTENTOS = 3
+
+MANEJADORES = {}
+
+
+def manejador(tipo: str):
+    """Registra la función que ejecuta las tareas de `tipo`"""
+
+    def registrar(funcion):
+        MANEJADORES[tipo] = funcion
+        return funcion
+
+    return registrar
+
+
+class TareaCancelada(Exception):
+    """La tarea se canceló mientras corría"""
+
+
+class ContextoTarea:
+    """Lo que recibe un manejador para informar avance"""
+
+    def __init__(self, tarea_id: int):
+        self.tarea_id = tarea_id
+
+    def avisar(self, progreso: float, mensaje: str = ""):
+        """Guarda el progreso (0-1), renueva el latido y corta si se pidió cancelar"""
+        Tarea.objects.filter(pk=self.tarea_id).update(
+            progreso=min(max(float(progreso), 0.0), 1.0),
+            mensaje=mensaje[:300],
+            latido=timezone.now(),
+        )
+        if Tarea.objects.filter(pk=self.tarea_id, cancelacion_solicitada=True).exists():
+            raise TareaCancelada()
+
+
+class Latido(threading.Thread):
+    """Renueva el latido de una tarea cada `intervalo` segundos hasta detener()"""
+
+    def __init__(self, tarea_id: int, intervalo: float = None):
+        super().__init__(name=f"latido-{tarea_id}", daemon=True)
+        self.tarea_id = tarea_id
+        self.intervalo = intervalo or PLAZO_LATIDO.total_seconds() / 3
+        self._fin = threading.Event()
+
+    def run(self):
+        try:
+            while not self._fin.wait(self.intervalo):
+                try:
+                    Tarea.objects.filter(
+                        pk=self.tarea_id, estado=Tarea.ESTADO_EN_CURSO
+                    ).update(latido=timezone.now())
+                except DatabaseError:
+                    # Base ocupada (p. ej. SQLite bloqueada): reintentar en
+                    # el siguiente intervalo en vez de dejar de latir
+                    logger.warning("No se pudo renovar el latido de %s", self.tarea_id)
+        finally:
+            # Conexión propia del hilo
+            connection.close()
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+
+
+def identificador_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ServicioTareas:
+    """Encolado, reclamo y ejecución de tareas"""
+
+    @staticmethod
+    def encolar(tipo: str, parametros: dict = None) -> Tarea:
+        if tipo not in MANEJADORES:
+            raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+        return Tarea.objects.create(tipo=tipo, parametros=parametros or {})
+
+    @staticmethod
+    def recuperar_abandonadas() -> int:
+        """
+        Tareas en curso cuyo worker dejó de latir: vuelven a la cola, o
+        quedan fallidas tras MAX_INTENTOS (canceladas si se había pedido).
+        Cada UPDATE exige todavía en_curso, así que dos workers no
+        recuperan la misma.
+        """
+        ahora = timezone.now()
+        limite = ahora - PLAZO_LATIDO
+        abandonadas = Tarea.objects.filter(
+            Q(latido__lt=limite) | Q(latido__isnull=True, fecha_inicio__lt=limite),
+            estado=Tarea.ESTADO_EN_CURSO,
+        )
+        recuperadas = abandonadas.filter(cancelacion_solicitada=True).update(
+            estado=Tarea.ESTADO_CANCELADA, fecha_fin=ahora
+        )
+        recuperadas += abandonadas.filter(intentos__gte=MAX_INTENTOS).update(
+            estado=Tarea.ESTADO_FALLIDA,
+            fecha_fin=ahora,
+            error=f"El worker dejó de responder ({MAX_INTENTOS} intentos)",
+        )
+        recuperadas += abandonadas.update(
+            estado=Tarea.ESTADO_PENDIENTE,
+            worker="",
+            fecha_inicio=None,
+            latido=None,
+            progreso=0.0,
+            mensaje="",
+        )
+        if recuperadas:
+            logger.warning("%s tareas recuperadas de workers sin latido", recuperadas)
+        return recuperadas
+
+    @staticmethod
+    def reclamar(worker: str = None):
+        """Toma la pendiente más antigua (None si no hay)"""
+        worker = worker or identificador_worker()
+        ServicioTareas.recuperar_abandonadas()
+        candidatos = (
+            Tarea.objects.filter(estado=Tarea.ESTADO_PENDIENTE)
+            .order_by("fecha_creacion", "id")
+            .values_list("id", flat=True)[:CANDIDATOS_RECLAMO]
+        )
+        for tarea_id in list(candidatos):
+            ahora = timezone.now()
+            # Solo un worker ve la fila todavía pendiente
+            ganada = Tarea.objects.filter(
+                pk=tarea_id, estado=Tarea.ESTADO_PENDIENTE
+            ).update(
+                estado=Tarea.ESTADO_EN_CURSO,
+                worker=worker,
+                intentos=F("intentos") + 1,
+                fecha_inicio=ahora,
+                latido=ahora,
+            )
+            if ganada:
+                return Tarea.objects.get(pk=tarea_id)
+        return None
+
+    @staticmethod
+    def ejecutar(tarea: Tarea) -> Tarea:
+        """Corre una tarea ya reclamada y guarda su resultado"""
+        funcion = MANEJADORES.get(tarea.tipo)
+        latido = Latido(tarea.pk)
+        latido.start()
+        try:
+            if funcion is None:
+                raise ValueError(f"Tipo de tarea desconocido: {tarea.tipo}")
+            resultado = funcion(tarea.parametros, ContextoTarea(tarea.pk))
+        except TareaCancelada:
+            ServicioTareas._finalizar(tarea, Tarea.ESTADO_CANCELADA)
+        except Exception as e:
+            logger.exception("Error en la tarea %s (%s)", tarea.pk, tarea.tipo)
+            ServicioTareas._finalizar(tarea, Tarea.ESTADO_FALLIDA, error=str(e))
+        else:
+            ServicioTareas._finalizar(
+                tarea, Tarea.ESTADO_COMPLETADA, progreso=1.0, resultado=resultado
+            )
+        finally:
+            latido.detener()
+        tarea.refresh_from_db()
+        return tarea
+
+    @staticmethod
+    def _finalizar(tarea: Tarea, estado: str, **campos):
+        Tarea.objects.filter(pk=tarea.pk).update(
+            estado=estado, fecha_fin=timezone.now(), **campos
+        )
+
+    @staticmethod
+    def procesar_siguiente(worker: str = None):
+        """Reclama y ejecuta una tarea; None si la cola está vacía"""
+        tarea = ServicioTareas.reclamar(worker)
+        if tarea is None:
+            return None
+        return ServicioTareas.ejecutar(tarea)
+
+    @staticmethod
+    def cancelar(tarea_id: int):
+        """
+        Una pendiente se cancela en el acto; una en curso se marca y su
+        manejador corta en el próximo avisar() (si su worker murió, la
+        cancela recuperar_abandonadas()). None si no existe.
+        """
+        ahora = timezone.now()
+        Tarea.objects.filter(pk=tarea_id, estado=Tarea.ESTADO_PENDIENTE).update(
+            estado=Tarea.ESTADO_CANCELADA,
+            cancelacion_solicitada=True,
+            fecha_fin=ahora,
+        )
+        Tarea.objects.filter(pk=tarea_id, estado=Tarea.ESTADO_EN_CURSO).update(
+            cancelacion_solicitada=True
+        )
+        return Tarea.objects.filter(pk=tarea_id).first()
+
+
+# ═══════════════════════════════════════════════════════
+# MANEJADORES
+# ═══════════════════════════════════════════════════════
+
+
+def _totales() -> dict:
+    from api.models import Equipo, Mantenimiento
+
+    return {
+        "equipos": Equipo.objects.count(),
+        "mantenimientos": Mantenimiento.objects.count(),
+    }
+
+
+@manejador("generar_datos")
+def _generar_datos(parametros, contexto):
+    from django.core.management import call_command
+
+    salida = StringIO()
+    cantidad = parametros.get("cantidad", 50)
+    contexto.avisar(0.0, f"Generando {cantidad} registros")
+    call_command("generar_datos", cantidad=cantidad, stdout=salida)
+    contexto.avisar(0.9, "Registros generados")
+    return {
+        "mensaje": f"{cantidad} registros generados exitosamente",
+        "cantidad": cantidad,
+        "totales": _totales(),
+        "salida": salida.getvalue(),
+    }
+
+
+@manejador("pipeline_auto")
+def _pipeline_auto(parametros, contexto):
+    from django.core.management import call_command
+
+    busquedas = parametros.get("busquedas", 5)
+    generar = parametros.get("generar", 30)
+    pasos = []
+
+    # Web scraping + generacion
+    contexto.avisar(0.0, "Scraping y generación de datos")
+    call_command(
+        "aprender_web", busquedas=busquedas, generar=generar, stdout=StringIO()
+    )
+    pasos.append(f"Web scraping: {busquedas} busquedas")
+    pasos.append(f"Datos generados: {generar}")
+    contexto.avisar(0.7, "Scraping y generación completados")
+
+    # Entrenar IA dentro de la tarea (no en un hilo aparte que la
+    # sobreviva), para que su progreso y cancelación sean los de la tarea
+    if parametros.get("entrenar", True):
+        from api.servicios.ia import ServicioIA
+
+        epocas = 5
+        ServicioIA.entrenar(
+            epochs=epocas,
+            n_samples=50,
+            progreso=lambda e: contexto.avisar(
+                0.7 + 0.3 * e / epocas, f"Entrenamiento: época {e} de {epocas}"
+            ),
+        )
+        pasos.append("IA entrenada")
+
+    return {
+        "mensaje": "Pipeline completado exitosamente",
+        "pasos": pasos,
+        "totales": _totales(),
+    }
+
+
+@manejador("aprender_web")
+def _aprender_web(parametros, contexto):
+    from api.servicios.ia_core import ia_sistema
+
+    tema = parametros["tema"]
+    contexto.avisar(0.0, f"Buscando en la web: {tema}")
+    return {
+        "mensaje": f"Aprendizaje completado sobre: {tema}",
+        "resultados": ia_sistema.aprender_de_web(
+            tema,
+            max_resultados=parametros.get("max_resultados", 3),
+            progreso=lambda i, total: contexto.avisar(
+                0.2 + 0.8 * i / total, f"Resultado {i + 1} de {total}"
+            ),
+        ),
+    }
+
+
+@manejador("entrenar_q")
+def _entrenar_q(parametros, contexto):
+    from api.servicios.entrenamiento_q import EntrenadorQ
+
+    barridos = parametros.get("barridos", 1)
+    return EntrenadorQ.entrenar(
+        barridos=barridos,
+        progreso=lambda b: contexto.avisar(b / barridos, f"Barrido {b} de {barridos}"),
+    )
+
+
+@manejador("entrenar_cortex")
+def _entrenar_cortex(parametros, contexto):
+    from api.servicios.cortex_service import CortexService
+
+    epocas = parametros.get("epocas", 1)
+    contexto.avisar(0.0, "Cargando historial")
+    loss = CortexService.entrenar_con_historia(
+        epocas=epocas,
+        progreso=lambda e: contexto.avisar(e / epocas, f"Época {e} de {epocas}"),
+    )
+    return {
+        "mensaje": "Núcleo Cortex re-calibrado",
+        "loss_final": f"{loss:.4f}",
+        "estado": "Red Neuronal Operativa",
+    }
+
+
+@manejador("ejecutar_automata")
+def _ejecutar_automata(parametros, contexto):
+    from api.servicios.automata import AutomataInteligente
+
+    contexto.avisar(0.0, "Analizando riesgos")
+    return AutomataInteligente.ejecutar_ciclo_autonomo(progreso=contexto.avisar)
@@ -0,0 +1,41 @@
+"""
+Contadores de versión compartidos entre workers
+
+Cada proceso compara el contador con la versión que tiene en memoria para
+saber si debe refrescar su caché local. El incremento toma el bloqueo de
+la fila hasta el commit, así que las versiones se publican en orden.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from api.models import ContadorVersion
+
+
+def incrementar_version(nombre: str) -> int:
+    """Incrementa el contador y devuelve la versión nueva (usar dentro de atomic)"""
+    with transaction.atomic():
+        ContadorVersion.objects.bulk_create(
+            [ContadorVersion(nombre=nombre)], ignore_conflicts=True
+        )
+        ContadorVersion.objects.filter(nombre=nombre).update(valor=F("valor") + 1)
+        return ContadorVersion.objects.get(nombre=nombre).valor
+
+
+def leer_version(nombre: str) -> int:
+    valor = (
+        ContadorVersion.objects.filter(nombre=nombre)
+        .values_list("valor", flat=True)
+        .first()
+    )
+    return valor or 0
+
+
+def leer_versiones(*nombres: str) -> tuple:
+    """Varios contadores en una consulta, en el orden pedido (0 si no existen)"""
+    valores = dict(
+        ContadorVersion.objects.filter(nombre__in=nombres).values_list(
+            "nombre", "valor"
+        )
+    )
+    return tuple(valores.get(nombre, 0) for nombre in nombres)
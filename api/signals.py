@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from api.models import Mantenimiento
+from api.models import Mantenimiento, Recurso
+from api.servicios.estadisticas import ServicioEstadisticas
+from api.servicios.indice_tecnicos import indice_tecnicos
 
 @receiver(post_save, sender=Mantenimiento)
 def auto_learning_hook(sender, instance, **kwargs):
@@ -9,3 +11,40 @@ def auto_learning_hook(sender, instance, **kwargs):
         try:
             ia_sistema.auto_aprender(instance, {'fue_exitoso': True})
         except: pass
+
+
+@receiver(pre_save, sender=Mantenimiento)
+def capturar_estadistica_previa(sender, instance, raw=False, **kwargs):
+    """Guarda el aporte previo del mantenimiento para el cálculo incremental"""
+    if raw or instance.pk is None:
+        instance._aporte_estadistica = None
+        return
+    instance._aporte_estadistica = ServicioEstadisticas.aporte_guardado(instance.pk)
+
+
+@receiver(post_save, sender=Mantenimiento)
+def actualizar_estadistica_equipo(sender, instance, raw=False, **kwargs):
+    """Actualiza EstadisticaEquipo con el mantenimiento guardado"""
+    if raw:
+        return
+    nuevo = ServicioEstadisticas.aporte_de_instancia(instance)
+    ServicioEstadisticas.actualizar(
+        instance.pk, getattr(instance, "_aporte_estadistica", None), nuevo
+    )
+    instance._aporte_estadistica = nuevo
+
+
+@receiver(post_delete, sender=Mantenimiento)
+def quitar_estadistica_equipo(sender, instance, **kwargs):
+    """Descuenta de EstadisticaEquipo el mantenimiento eliminado"""
+    ServicioEstadisticas.actualizar(
+        instance.pk, ServicioEstadisticas.aporte_de_instancia(instance), None
+    )
+
+
+@receiver(post_save, sender=Recurso)
+@receiver(post_delete, sender=Recurso)
+def refrescar_indice_tecnicos(sender, instance, **kwargs):
+    """Alta, baja o cambio de un técnico: recargar el índice de asignación"""
+    if instance.tipo == Recurso.TIPO_TECNICO:
+        indice_tecnicos.notificar_cambio()
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.constants import (
+    CATEGORIA_ELECTRICO,
+    CATEGORIA_MECANICO,
+    ESTADO_COMPLETADO,
+    PRIORIDAD_MEDIA,
+)
+from api.models import Equipo, Mantenimiento
+from api.servicios.analitica_predictiva import AnaliticaPredictiva
+
+
+def _crear_flota(cantidad, dias_completados=(90, 60, 30)):
+    ahora = timezone.now()
+    for i in range(cantidad):
+        eq = Equipo.objects.create(
+            nombre=f"Bomba-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_ELECTRICO,
+            numero_serie=f"SN-{cantidad}-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=ahora - timedelta(days=400),
+        )
+        for dias in dias_completados:
+            Mantenimiento.objects.create(
+                equipo=eq,
+                tipo=Mantenimiento.TIPO_PREVENTIVO,
+                prioridad=PRIORIDAD_MEDIA,
+                estado=ESTADO_COMPLETADO,
+                fecha_programada=ahora - timedelta(days=dias),
+                fecha_completada=ahora - timedelta(days=dias),
+                descripcion="revision",
+            )
+
+
+def _contar_consultas():
+    with CaptureQueriesContext(connection) as ctx:
+        AnaliticaPredictiva.analizar_riesgo_equipos()
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestAnaliticaPredictiva:
+    def test_consultas_constantes_en_tamano_de_flota(self):
+        _crear_flota(3)
+        pequena = _contar_consultas()
+
+        _crear_flota(40)
+        grande = _contar_consultas()
+
+        assert pequena == grande == 1
+
+    def test_mtbf_y_riesgo(self):
+        _crear_flota(1)
+
+        resultados = AnaliticaPredictiva.analizar_riesgo_equipos()
+
+        assert resultados == [
+            {
+                "equipo_id": Equipo.objects.get().id,
+                "nombre": "Bomba-0",
+                "categoria": "Eléctrico",
+                "mtbf_dias": 30,
+                "dias_prox_falla": 0,
+                "riesgo": "Crítico",
+                "score": 0.95,
+            }
+        ]
+
+    def test_equipo_antiguo_sin_historial(self):
+        Equipo.objects.create(
+            nombre="Motor viejo",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie="SN-viejo",
+            ubicacion="Planta 2",
+            fecha_instalacion=timezone.now() - timedelta(days=365 * 6),
+        )
+
+        (resultado,) = AnaliticaPredictiva.analizar_riesgo_equipos()
+
+        assert resultado["riesgo"] == "Medio"
+        assert resultado["dias_prox_falla"] == 30
+        assert resultado["categoria"] == "Mecánico"
+
+    def test_sin_riesgo_no_se_reporta(self):
+        _crear_flota(2, dias_completados=(200, 100, 1))
+
+        assert AnaliticaPredictiva.analizar_riesgo_equipos() == []
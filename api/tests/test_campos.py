@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_MECANICO, PRIORIDAD_MEDIA
+from api.models import Equipo, Evento, Mantenimiento, Recurso
+from api.views import MantenimientoViewSet
+
+
+@pytest.fixture
+def datos():
+    ahora = timezone.now()
+    equipo = Equipo.objects.create(
+        nombre="Bomba",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-campos",
+        ubicacion="Planta 1",
+        fecha_instalacion=ahora,
+        metadatos={"manual": "x" * 1000},
+    )
+    for i in range(7):
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_PREVENTIVO,
+            prioridad=PRIORIDAD_MEDIA,
+            fecha_programada=ahora + timedelta(hours=i),
+            descripcion="descripcion larga " * 50,
+            resultado="resultado largo " * 50,
+        )
+        Evento.objects.create(
+            tipo=Evento.TIPO_INCIDENTE,
+            equipo=equipo if i % 2 else None,
+            descripcion="falla",
+        )
+    Recurso.objects.create(
+        tipo=Recurso.TIPO_REPUESTO, nombre="Sello", stock=1, stock_minimo=3
+    )
+    return equipo
+
+
+def _pedir(url, params):
+    with CaptureQueriesContext(connection) as consultas:
+        respuesta = APIClient().get(url, params)
+    return respuesta, " ".join(c["sql"] for c in consultas)
+
+
+@pytest.mark.django_db
+class TestCamposPedidos:
+    def test_fields_elige_campos_y_columnas(self, datos):
+        respuesta, sql = _pedir(
+            "/api/mantenimientos/", {"fields": "id,tipo_display,equipo_nombre"}
+        )
+        filas = respuesta.json()["results"]
+        assert filas[0] == {
+            "id": filas[0]["id"],
+            "tipo_display": "Mantenimiento Preventivo",
+            "equipo_nombre": "Bomba",
+        }
+        assert '"descripcion"' not in sql and '"resultado"' not in sql
+        assert "JOIN" in sql
+
+    def test_omit(self, datos):
+        respuesta, sql = _pedir("/api/equipos/", {"omit": "metadatos,ubicacion"})
+        fila = respuesta.json()["results"][0]
+        assert "metadatos" not in fila and "ubicacion" not in fila
+        assert fila["nombre"] == "Bomba"
+        assert '"metadatos"' not in sql
+
+    def test_detalle_y_campos_calculados(self, datos):
+        recurso = Recurso.objects.get()
+        respuesta, sql = _pedir(
+            f"/api/recursos/{recurso.pk}/", {"fields": "nombre,necesita_reposicion"}
+        )
+        assert respuesta.json() == {"nombre": "Sello", "necesita_reposicion": True}
+        assert '"metadatos"' not in sql
+
+    def test_relacion_nula(self, datos):
+        respuesta, _ = _pedir("/api/eventos/", {"fields": "equipo_nombre"})
+        nombres = [f["equipo_nombre"] for f in respuesta.json()["results"]]
+        assert sorted(map(str, nombres)) == ["Bomba"] * 3 + ["None"] * 4
+
+    def test_campo_desconocido(self, datos):
+        respuesta, _ = _pedir("/api/mantenimientos/", {"fields": "id,clave"})
+        assert respuesta.status_code == 400
+        assert "clave" in respuesta.json()["fields"]
+
+    def test_listado_rapido_igual_y_paginado(self, datos, monkeypatch):
+        """El orden (prioridad, fecha) se lee aunque no se pida"""
+        cliente = APIClient()
+
+        def paginas():
+            contenidos = []
+            url, params = "/api/mantenimientos/", {"fields": "tipo", "page_size": 3}
+            while url:
+                respuesta = cliente.get(url, params)
+                contenidos.append(respuesta.content)
+                url, params = respuesta.json()["next"], None
+            return contenidos
+
+        rapido = paginas()
+        assert len(rapido) == 3
+        monkeypatch.setattr(MantenimientoViewSet, "listado_rapido", None)
+        assert rapido == paginas()
+
+    def test_escrituras_usan_todos_los_campos(self, datos):
+        respuesta = APIClient().post(
+            "/api/eventos/?fields=id",
+            {"tipo": Evento.TIPO_FLUJO, "descripcion": "nuevo"},
+            format="json",
+        )
+        assert respuesta.status_code == 201
+        assert respuesta.json()["descripcion"] == "nuevo"
@@ -0,0 +1,102 @@
+"""Presupuesto de consultas por endpoint: no crece con la cantidad de filas"""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_MECANICO, PRIORIDAD_MEDIA
+from api.models import Equipo, Evento, Mantenimiento, Recomendacion, Recurso
+
+LISTADOS = {
+    "/api/equipos/": 1,
+    "/api/mantenimientos/": 1,
+    "/api/recursos/": 1,
+    "/api/eventos/": 1,
+    "/api/v1/mantenimientos/": 1,
+    "/api/v1/eventos/": 1,
+    "/api/v2/mantenimientos/": 1,
+    "/api/v2/eventos/": 1,
+    "/api/v2/recomendaciones/": 1,
+    "/api/analytics/eventos_recientes/": 1,
+}
+
+
+def _crear(cantidad: int, desde: int = 0):
+    ahora = timezone.now()
+    for i in range(desde, desde + cantidad):
+        equipo = Equipo.objects.create(
+            nombre=f"Bomba-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie=f"SN-q-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=ahora - timedelta(days=100),
+        )
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_PREVENTIVO,
+            prioridad=PRIORIDAD_MEDIA,
+            fecha_programada=ahora,
+            descripcion="revision",
+        )
+        Evento.objects.create(
+            tipo=Evento.TIPO_INCIDENTE, equipo=equipo, descripcion="falla"
+        )
+        Evento.objects.create(tipo=Evento.TIPO_TELEMETRIA, descripcion="sin equipo")
+        Recurso.objects.create(tipo=Recurso.TIPO_TECNICO, nombre=f"Tecnico-{i}")
+        Recomendacion.objects.create(
+            equipo=equipo, titulo="Revisar", descripcion="x", confianza=0.5
+        )
+
+
+def _consultas(cliente, url) -> int:
+    with CaptureQueriesContext(connection) as consultas:
+        respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, url
+    return len(consultas)
+
+
+@pytest.mark.django_db
+class TestPresupuestoConsultas:
+    @pytest.mark.parametrize("url,presupuesto", LISTADOS.items())
+    def test_listado(self, url, presupuesto):
+        cliente = APIClient()
+        _crear(2)
+        assert _consultas(cliente, url) == presupuesto
+        _crear(20, desde=2)
+        assert _consultas(cliente, url) == presupuesto
+
+    def test_detalle(self):
+        _crear(1)
+        cliente = APIClient()
+        mantenimiento = Mantenimiento.objects.get()
+        evento = Evento.objects.filter(equipo__isnull=False).get()
+        for url in (
+            f"/api/mantenimientos/{mantenimiento.pk}/",
+            f"/api/eventos/{evento.pk}/",
+        ):
+            assert _consultas(cliente, url) == 1
+
+    def test_listado_completo_con_equipo(self):
+        _crear(3)
+        filas = APIClient().get("/api/eventos/").json()["results"]
+        assert sorted(str(f["equipo_nombre"]) for f in filas) == [
+            "Bomba-0",
+            "Bomba-1",
+            "Bomba-2",
+            "None",
+            "None",
+            "None",
+        ]
+
+    @pytest.mark.parametrize("modelo", ["mantenimiento", "evento"])
+    def test_admin(self, admin_client, modelo):
+        url = f"/admin/api/{modelo}/"
+        _crear(2)
+        pocas = _consultas(admin_client, url)
+        _crear(20, desde=2)
+        assert _consultas(admin_client, url) == pocas
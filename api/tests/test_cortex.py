@@ -0,0 +1,263 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import (
+    CATEGORIA_MECANICO,
+    ESTADO_COMPLETADO,
+    ESTADO_PENDIENTE,
+    PRIORIDAD_MEDIA,
+)
+from api.cortex.neural_net import NumpyCortexNN, PurePythonCortexNN
+from api.models import Equipo, Mantenimiento, ModeloIA
+from api.servicios import cortex_service
+from api.servicios.cortex_service import CortexService
+
+
+@pytest.fixture
+def pesos(tmp_path, settings, monkeypatch):
+    """Archivo de pesos temporal y singleton del proceso reiniciado"""
+    settings.CORTEX_WEIGHTS_PATH = str(tmp_path / "cortex.npy")
+    cache.clear()
+    for nombre, valor in (
+        ("_cortex_instance", None),
+        ("_ruta_pesos", None),
+        ("_pesos_mtime", None),
+        ("_pesos_version", 0),
+        ("_ultimo_chequeo", 0.0),
+    ):
+        monkeypatch.setattr(cortex_service, nombre, valor)
+    return settings.CORTEX_WEIGHTS_PATH
+
+
+def _copiar_pesos(origen, destino):
+    destino.w1 = np.array(origen.w1)
+    destino.b1 = np.array(origen.b1)
+    destino.w2 = np.array(origen.w2)
+    destino.b2 = np.array(origen.b2)
+
+
+class TestNumpyCortexNN:
+    def test_forward_igual_a_python_puro(self):
+        puro = PurePythonCortexNN(3, 5, 2)
+        vectorizado = NumpyCortexNN(3, 5, 2)
+        _copiar_pesos(puro, vectorizado)
+        muestras = [[random.random() for _ in range(3)] for _ in range(4)]
+
+        lote = vectorizado.forward(muestras)
+
+        assert lote.shape == (4, 2)
+        for fila, muestra in zip(lote, muestras, strict=True):
+            np.testing.assert_allclose(fila, puro.forward(muestra))
+        np.testing.assert_allclose(vectorizado.forward(muestras[0]), lote[0])
+
+    def test_train_muestra_igual_a_python_puro(self):
+        puro = PurePythonCortexNN(3, 4, 1)
+        vectorizado = NumpyCortexNN(3, 4, 1)
+        _copiar_pesos(puro, vectorizado)
+
+        for _ in range(5):
+            esperado = puro.train([0.2, 0.5, 0.9], [1.0])
+            obtenido = vectorizado.train([0.2, 0.5, 0.9], [1.0])
+            assert obtenido == pytest.approx(esperado)
+
+        np.testing.assert_allclose(vectorizado.w1, puro.w1)
+        np.testing.assert_allclose(vectorizado.w2, puro.w2)
+
+    def test_train_batch_reduce_error(self):
+        np.random.seed(0)
+        nn = NumpyCortexNN(2, 6, 1, learning_rate=1.0)
+        inputs = np.random.rand(200, 2)
+        targets = (inputs.sum(axis=1, keepdims=True) > 1).astype(float)
+
+        inicial = nn.train_batch(inputs, targets, batch_size=16)
+        final = nn.train_batch(inputs, targets, batch_size=16, epochs=50)
+
+        assert final < inicial
+
+    def test_pesos_mmap_solo_lectura_y_reentrenables(self, tmp_path):
+        ruta = str(tmp_path / "pesos.npy")
+        original = NumpyCortexNN(3, 5, 1)
+        original.save_weights(ruta, version=7)
+        cargada = NumpyCortexNN(3, 5, 1)
+
+        assert cargada.load_weights(ruta) == 7
+        assert not cargada.w1.flags.writeable
+        np.testing.assert_array_equal(cargada.w2, original.w2)
+        np.testing.assert_allclose(
+            cargada.forward([0.1, 0.2, 0.3]), original.forward([0.1, 0.2, 0.3])
+        )
+
+        cargada.train([0.1, 0.2, 0.3], [1.0])
+        assert cargada.w1.flags.writeable
+
+    def test_pesos_de_otra_forma_se_rechazan(self, tmp_path):
+        ruta = str(tmp_path / "pesos.npy")
+        NumpyCortexNN(3, 4, 1).save_weights(ruta)
+
+        with pytest.raises(ValueError):
+            NumpyCortexNN(3, 5, 1).load_weights(ruta)
+
+
+@pytest.mark.django_db
+def test_recarga_en_caliente_al_publicar(pesos, monkeypatch):
+    worker = CortexService.get_instance()
+    assert CortexService.version_pesos() == 0
+
+    # Otro proceso publica pesos nuevos
+    otra = NumpyCortexNN(3, 5, 1)
+    CortexService.publicar_pesos(otra)
+    monkeypatch.setattr(cortex_service, "_pesos_mtime", None)
+
+    consultas = []
+    stat = cortex_service.os.stat
+    monkeypatch.setattr(
+        cortex_service.os, "stat", lambda ruta: consultas.append(ruta) or stat(ruta)
+    )
+
+    # Dentro del intervalo no se consulta el disco
+    assert CortexService.get_instance() is worker
+    assert consultas == []
+
+    monkeypatch.setattr(cortex_service, "_ultimo_chequeo", 0.0)
+    CortexService.get_instance()
+
+    assert consultas == [pesos]
+    assert CortexService.version_pesos() == 1
+    np.testing.assert_array_equal(worker.w1, otra.w1)
+    assert ModeloIA.objects.get(nombre="Cortex-NN").modelo_path == pesos
+
+
+@pytest.mark.django_db
+def test_entrenar_con_historia_en_lote(pesos):
+    ahora = timezone.now()
+    equipo = Equipo.objects.create(
+        nombre="Compresor",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-cortex",
+        ubicacion="Planta 1",
+        fecha_instalacion=ahora - timedelta(days=700),
+    )
+    for tipo in (Mantenimiento.TIPO_CORRECTIVO, Mantenimiento.TIPO_PREVENTIVO):
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=tipo,
+            prioridad=PRIORIDAD_MEDIA,
+            estado=ESTADO_COMPLETADO,
+            fecha_programada=ahora,
+            fecha_completada=ahora,
+            descripcion="historia",
+        )
+
+    loss = CortexService.entrenar_con_historia(epocas=3)
+
+    assert 0.0 < loss < 1.0
+    assert ModeloIA.objects.get(nombre="Cortex-NN").version == "1"
+    assert 0.0 <= CortexService.predecir_riesgo_neuronal(equipo) <= 1.0
+
+
+@pytest.mark.django_db
+def test_vectorizar_equipos_en_una_consulta(pesos, django_assert_num_queries):
+    ahora = timezone.now()
+    for i in range(3):
+        equipo = Equipo.objects.create(
+            nombre=f"Motor-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie=f"SN-vec-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=ahora - timedelta(days=365 * (i + 1)),
+        )
+        for _ in range(i * 3):
+            Mantenimiento.objects.create(
+                equipo=equipo,
+                tipo=Mantenimiento.TIPO_PREVENTIVO,
+                prioridad=PRIORIDAD_MEDIA,
+                estado=ESTADO_PENDIENTE,
+                fecha_programada=ahora,
+                descripcion="pendiente",
+            )
+
+    with django_assert_num_queries(1):
+        matriz, ids = CortexService.vectorizar_equipos()
+
+    assert matriz.shape == (3, 3)
+    np.testing.assert_allclose(matriz[:, 2], [0.0, 0.6, 1.0])
+    for fila, equipo in zip(matriz, Equipo.objects.order_by("id"), strict=True):
+        assert fila.tolist() == CortexService.vectorizar_equipo(equipo)
+
+    lote_ids, scores = CortexService.predecir_riesgo_neuronal_lote()
+    assert lote_ids.tolist() == ids.tolist()
+    assert scores[0] == pytest.approx(
+        CortexService.predecir_riesgo_neuronal(Equipo.objects.get(id=ids[0]))
+    )
+
+
+@pytest.mark.django_db
+def test_vectorizar_equipo_sin_guardar(pesos):
+    equipo = Equipo(
+        nombre="Nuevo",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-nuevo",
+        ubicacion="Planta 1",
+        fecha_instalacion=timezone.now() - timedelta(days=365),
+    )
+
+    vector = CortexService.vectorizar_equipo(equipo)
+    assert 0.0 <= CortexService.predecir_riesgo_neuronal(equipo) <= 1.0
+
+    equipo.save()
+    assert vector == CortexService.vectorizar_equipo(equipo)
+    assert vector[2] == 0.0
+
+
+@pytest.mark.django_db
+def test_endpoint_riesgo_neuronal_paginado_y_cacheado(pesos, monkeypatch):
+    ahora = timezone.now()
+    for i in range(5):
+        Equipo.objects.create(
+            nombre=f"Turbina-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie=f"SN-rn-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=ahora - timedelta(days=400 * i),
+        )
+    cliente = APIClient()
+
+    completo = cliente.get("/api/analytics/riesgo_neuronal/").json()
+    scores = [e["score"] for e in completo["results"]]
+    assert completo["count"] == 5
+    assert scores == sorted(scores, reverse=True)
+
+    lotes = []
+    original = CortexService.predecir_riesgo_neuronal_lote
+    monkeypatch.setattr(
+        CortexService,
+        "predecir_riesgo_neuronal_lote",
+        staticmethod(lambda *a: lotes.append(a) or original(*a)),
+    )
+    _, reales = CortexService.ranking_riesgo_neuronal()
+    umbral = float(reales[2])
+    pagina = cliente.get(
+        "/api/analytics/riesgo_neuronal/",
+        {"min_score": umbral, "page_size": 2, "page": 2},
+    ).json()
+
+    assert lotes == []  # servido desde caché
+    assert pagina["count"] == int((reales >= umbral).sum())
+    assert pagina["results"] == completo["results"][2:3]
+
+    CortexService.publicar_pesos(NumpyCortexNN(3, 5, 1))
+    cliente.get("/api/analytics/riesgo_neuronal/")
+    assert len(lotes) == 1  # pesos nuevos, caché nueva
+
+    respuesta = cliente.get("/api/analytics/riesgo_neuronal/", {"min_score": "x"})
+    assert respuesta.status_code == 400
@@ -0,0 +1,139 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_HIDRAULICO, PRIORIDAD_MEDIA
+from api.models import Equipo, Mantenimiento, Recurso
+from api.servicios.ia_core import ia_sistema
+from api.servicios.indice_tecnicos import indice_tecnicos
+from api.servicios.prioridad import calcular_prioridad
+from api.servicios.tabla_q import TablaQ
+
+TEXTOS = ["Fuga critica en bomba", "revision de rutina", "ruido y vibracion"]
+
+
+@pytest.fixture
+def datos(monkeypatch):
+    monkeypatch.setattr(ia_sistema, "_q_table", TablaQ())
+    monkeypatch.setattr(ia_sistema, "epsilon", 0.0)
+    indice_tecnicos.invalidar()
+
+    equipo = Equipo.objects.create(
+        nombre="Bomba-1",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_HIDRAULICO,
+        numero_serie="SN-1",
+        ubicacion="Planta 1",
+        fecha_instalacion=timezone.now() - timedelta(days=900),
+    )
+    mantenimientos = [
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_CORRECTIVO,
+            prioridad=PRIORIDAD_MEDIA,
+            fecha_programada=timezone.now(),
+            descripcion="falla",
+        )
+        for _ in range(2)
+    ]
+    for i, especialidad in enumerate(["electrica", "mecanica", "mecanica"]):
+        Recurso.objects.create(
+            tipo=Recurso.TIPO_TECNICO,
+            nombre=f"Tecnico {i}",
+            especialidad=especialidad,
+            calificacion=5 - i,
+        )
+    yield mantenimientos
+    indice_tecnicos.invalidar()
+
+
+def _lineas(respuesta):
+    contenido = b"".join(respuesta.streaming_content).decode()
+    return [json.loads(linea) for linea in contenido.splitlines()]
+
+
+@pytest.mark.django_db
+class TestDecidirLote:
+    def test_mezcla_en_orden(self, datos):
+        decisiones = [{"tipo": "prioridad", "descripcion": t} for t in TEXTOS]
+        decisiones += [
+            {"tipo": "tecnico", "mantenimiento_id": datos[0].id},
+            {
+                "tipo": "tecnico",
+                "mantenimiento_id": datos[1].id,
+                "especialidad": "mecanica",
+            },
+            {"tipo": "tecnico", "mantenimiento_id": 999_999},
+            {"tipo": "otro"},
+        ]
+        indice_tecnicos.datos()
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = APIClient().post(
+                "/api/sistema/decidir_lote/",
+                {"decisiones": decisiones, "top_k": 1},
+                format="json",
+            )
+            lineas = _lineas(respuesta)
+
+        assert respuesta["Content-Type"] == "application/x-ndjson"
+        assert [linea["indice"] for linea in lineas] == list(range(7))
+        assert [linea["decision"] for linea in lineas[:3]] == [
+            calcular_prioridad(t) for t in TEXTOS
+        ]
+        assert lineas[4]["decision"]["especialidad"] == "mecanica"
+        elegido = lineas[3]["decision"]["tecnico_id"]
+        assert lineas[3]["alternativas"][0]["tecnico_id"] != elegido
+        assert len(lineas[3]["alternativas"]) == 1
+        assert lineas[5] == {"indice": 5, "error": "Mantenimiento no encontrado"}
+        assert "no soportado" in lineas[6]["error"]
+
+        # Mantenimientos en una consulta; técnicos desde el índice cargado
+        sql = [c["sql"] for c in consultas.captured_queries]
+        assert sum('FROM "mantenimiento"' in q for q in sql) == 1
+        assert not any('FROM "recurso"' in q for q in sql)
+
+    def test_acepta_lista_y_valida(self, datos):
+        cliente = APIClient()
+        respuesta = cliente.post(
+            "/api/sistema/decidir_lote/",
+            [{"tipo": "prioridad", "descripcion": "fuga"}],
+            format="json",
+        )
+        assert len(_lineas(respuesta)) == 1
+
+        respuesta = cliente.post(
+            "/api/sistema/decidir_lote/", {"decisiones": "x"}, format="json"
+        )
+        assert respuesta.status_code == 400
+
+    @pytest.mark.parametrize("top_k", ["abc", None, -1, 0, 1000, True])
+    def test_top_k_invalido(self, datos, top_k):
+        cliente = APIClient()
+        respuesta = cliente.post(
+            "/api/sistema/decidir/",
+            {"tipo": "tecnico", "mantenimiento_id": datos[0].id, "top_k": top_k},
+            format="json",
+        )
+        assert respuesta.status_code == 400
+        assert "top_k" in respuesta.json()["error"]
+
+        respuesta = cliente.post(
+            "/api/sistema/decidir_lote/",
+            {"decisiones": [{"tipo": "otro"}], "top_k": top_k},
+            format="json",
+        )
+        assert respuesta.status_code == 400
+
+    def test_top_k_como_texto(self, datos):
+        respuesta = APIClient().post(
+            "/api/sistema/decidir/",
+            {"tipo": "tecnico", "mantenimiento_id": datos[0].id, "top_k": "2"},
+            format="json",
+        )
+        assert len(respuesta.json()["alternativas"]) == 2
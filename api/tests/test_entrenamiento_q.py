@@ -0,0 +1,142 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_HIDRAULICO, ESTADO_COMPLETADO, ESTADO_PENDIENTE
+from api.models import Equipo, Mantenimiento, ValorQ
+from api.servicios.entrenamiento_q import EntrenadorQ
+from api.servicios.ia_core import SistemaIA, ia_sistema
+from api.servicios.tabla_q import TablaQ
+
+AHORA = timezone.now()
+
+
+def _crear_historial(cantidad=60):
+    equipos = [
+        Equipo.objects.create(
+            nombre=f"Bomba-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_HIDRAULICO + i % 2,
+            numero_serie=f"SN-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=AHORA - timedelta(days=900),
+        )
+        for i in range(3)
+    ]
+    for i in range(cantidad):
+        programada = AHORA - timedelta(days=90, hours=i)
+        Mantenimiento.objects.create(
+            equipo=equipos[i % 3],
+            tipo=Mantenimiento.TIPO_CORRECTIVO if i % 4 else "preventivo",
+            prioridad=(10, 50, 100)[i % 3],
+            estado=ESTADO_COMPLETADO,
+            tecnico_asignado=f"T{i % 5}",
+            fecha_programada=programada,
+            # 0, 3, 10 y 45 días de resolución
+            fecha_completada=programada + timedelta(days=(0, 3, 10, 45)[i % 4]),
+            costo=Decimal(100 + i),
+            descripcion="falla",
+        )
+    # Sin fecha de cierre o no completados: no entran al entrenamiento
+    Mantenimiento.objects.create(
+        equipo=equipos[0],
+        tipo="preventivo",
+        prioridad=10,
+        estado=ESTADO_COMPLETADO,
+        fecha_programada=AHORA,
+        costo=Decimal(100),
+        descripcion="sin cerrar",
+    )
+    Mantenimiento.objects.create(
+        equipo=equipos[0],
+        tipo="preventivo",
+        prioridad=10,
+        estado=ESTADO_PENDIENTE,
+        fecha_programada=AHORA,
+        costo=Decimal(100),
+        descripcion="pendiente",
+    )
+
+
+def _entrenar_fila_a_fila(barridos):
+    """Entrenamiento previo: aprender_de_resultado por cada mantenimiento"""
+    sistema = SistemaIA()
+    sistema._cargar_conocimiento = TablaQ
+    sistema._guardar_conocimiento = lambda: None
+    completados = Mantenimiento.objects.filter(
+        estado=ESTADO_COMPLETADO, fecha_completada__isnull=False
+    ).order_by("-prioridad", "fecha_programada", "id")
+    for _ in range(barridos):
+        for mant in completados:
+            dias = (mant.fecha_completada - mant.fecha_programada).days
+            sistema.aprender_de_resultado(
+                mant,
+                {
+                    "fue_exitoso": True,
+                    "dias_resolucion": max(1, dias),
+                    "costo_real": float(mant.costo),
+                    "costo_esperado": float(mant.costo) * 1.1,
+                },
+            )
+    return sistema
+
+
+@pytest.mark.django_db
+class TestEntrenadorQ:
+    @pytest.mark.parametrize("barridos", [1, 3])
+    def test_mismo_resultado_que_fila_a_fila(self, barridos):
+        _crear_historial()
+        referencia = _entrenar_fila_a_fila(barridos)
+
+        sistema = SistemaIA()
+        resultado = EntrenadorQ.entrenar(sistema, barridos=barridos)
+
+        assert resultado["entrenados"] == 60
+        esperado = referencia.exportar_q_table()
+        obtenido = sistema.exportar_q_table()
+        assert obtenido.keys() == esperado.keys()
+        for estado, acciones in esperado.items():
+            assert obtenido[estado] == pytest.approx(acciones)
+        assert sistema.metricas == pytest.approx(referencia.metricas)
+        # Persistido en un solo volcado
+        assert ValorQ.objects.count() == sistema.q_table.total_acciones
+
+    def test_carga_historial_en_una_consulta(self):
+        _crear_historial(10)
+        with CaptureQueriesContext(connection) as consultas:
+            datos = EntrenadorQ.cargar_experiencias()
+        assert len(consultas) == 1
+        assert len(datos["estados"]) == 10
+
+    def test_endpoint_encola_y_el_worker_entrena(self, monkeypatch):
+        # El worker entrena la instancia global: que no arrastre estado
+        monkeypatch.setattr(ia_sistema, "_q_table", None)
+        monkeypatch.setattr(ia_sistema, "metricas", dict(ia_sistema.metricas))
+        _crear_historial(12)
+        cliente = APIClient()
+
+        respuesta = cliente.post(
+            "/api/sistema/entrenar/", {"barridos": 2}, format="json"
+        )
+        assert respuesta.status_code == 202
+        assert not ValorQ.objects.exists()
+        call_command("procesar_tareas", stdout=StringIO())
+
+        tarea = cliente.get(respuesta["Location"]).json()
+        assert tarea["estado"] == "completada"
+        assert tarea["progreso"] == 1.0
+        assert tarea["resultado"]["entrenados"] == 12
+        assert ValorQ.objects.exists()
+
+    def test_entrenar_valida_barridos(self):
+        respuesta = APIClient().post(
+            "/api/sistema/entrenar/", {"barridos": "x"}, format="json"
+        )
+        assert respuesta.status_code == 400
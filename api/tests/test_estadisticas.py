@@ -0,0 +1,159 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+from api.constants import (
+    CATEGORIA_MECANICO,
+    ESTADO_COMPLETADO,
+    ESTADO_PENDIENTE,
+    PRIORIDAD_ALTA,
+    PRIORIDAD_BAJA,
+)
+from api.models import Equipo, EstadisticaEquipo, Mantenimiento
+
+CAMPOS = [
+    "total_mantenimientos",
+    "total_completados",
+    "pendientes",
+    "suma_prioridad_pendientes",
+    "costo_total",
+    "suma_intervalos_dias",
+    "fecha_ultimo_completado",
+    "ultimas_fechas",
+]
+
+
+@pytest.fixture
+def equipo(db):
+    return Equipo.objects.create(
+        nombre="Compresor",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-1",
+        ubicacion="Planta 1",
+        fecha_instalacion=timezone.now() - timedelta(days=100),
+    )
+
+
+AHORA = timezone.now()
+
+
+def _mantenimiento(equipo, dias=None, estado=ESTADO_COMPLETADO, **extra):
+    return Mantenimiento.objects.create(
+        equipo=equipo,
+        tipo=Mantenimiento.TIPO_PREVENTIVO,
+        prioridad=extra.pop("prioridad", PRIORIDAD_BAJA),
+        estado=estado,
+        fecha_programada=AHORA,
+        fecha_completada=AHORA - timedelta(days=dias) if dias is not None else None,
+        descripcion="revision",
+        **extra,
+    )
+
+
+def _snapshot():
+    return list(EstadisticaEquipo.objects.order_by("equipo_id").values(*CAMPOS))
+
+
+@pytest.mark.django_db
+class TestEstadisticaEquipo:
+    def test_incremental_al_crear(self, equipo):
+        for dias in (50, 10, 30):
+            _mantenimiento(equipo, dias, costo=Decimal("100.00"))
+        _mantenimiento(equipo, estado=ESTADO_PENDIENTE, prioridad=PRIORIDAD_ALTA)
+
+        stats = EstadisticaEquipo.objects.get(equipo=equipo)
+        assert stats.total_mantenimientos == 4
+        assert stats.total_completados == 3
+        assert stats.pendientes == 1
+        assert stats.prioridad_promedio_pendientes == PRIORIDAD_ALTA
+        assert stats.suma_intervalos_dias == 40
+        assert stats.mtbf_dias == 20
+        assert stats.costo_promedio == Decimal("75.00")
+        assert len(stats.ultimas_fechas) == 3
+
+    def test_incremental_coincide_con_reconstruccion(self, equipo):
+        mants = [_mantenimiento(equipo, dias) for dias in (90, 70, 45, 30, 21, 8, 2)]
+        pendiente = _mantenimiento(equipo, estado=ESTADO_PENDIENTE)
+
+        # Cambios de estado, fecha y eliminaciones
+        mants[3].fecha_completada = AHORA - timedelta(days=1)
+        mants[3].save()
+        mants[5].estado = ESTADO_PENDIENTE
+        mants[5].save()
+        mants[6].delete()
+        pendiente.estado = ESTADO_COMPLETADO
+        pendiente.fecha_completada = AHORA - timedelta(days=60)
+        pendiente.save()
+
+        incremental = _snapshot()
+        call_command("reconstruir_estadisticas", stdout=StringIO())
+
+        assert _snapshot() == incremental
+
+    def test_reconstruir_crea_fila_por_equipo(self, equipo):
+        Equipo.objects.create(
+            nombre="Sin historial",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie="SN-2",
+            ubicacion="Planta 2",
+            fecha_instalacion=timezone.now(),
+        )
+        EstadisticaEquipo.objects.all().delete()
+
+        call_command("reconstruir_estadisticas", stdout=StringIO())
+
+        assert EstadisticaEquipo.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migracion_puebla_bases_existentes():
+    previa = [("api", "0006_indices_orden")]
+    poblado = [("api", "0007_poblar_estadisticaequipo")]
+    executor = MigrationExecutor(connection)
+    ultimas = executor.loader.graph.leaf_nodes()
+    executor.migrate(previa)
+    try:
+        # Base anterior al cambio: historial sin filas de estadística
+        modelos = executor.loader.project_state(previa).apps
+        equipo = modelos.get_model("api", "Equipo").objects.create(
+            nombre="Compresor",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_MECANICO,
+            numero_serie="SN-1",
+            ubicacion="Planta 1",
+            fecha_instalacion=AHORA - timedelta(days=100),
+        )
+        mantenimientos = modelos.get_model("api", "Mantenimiento").objects
+        for estado, prioridad, completada in (
+            (ESTADO_COMPLETADO, PRIORIDAD_BAJA, AHORA - timedelta(days=10)),
+            (ESTADO_PENDIENTE, PRIORIDAD_ALTA, None),
+        ):
+            mantenimientos.create(
+                equipo=equipo,
+                tipo=Mantenimiento.TIPO_PREVENTIVO,
+                prioridad=prioridad,
+                estado=estado,
+                fecha_programada=AHORA,
+                fecha_completada=completada,
+                descripcion="revision",
+            )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(poblado)
+
+        modelos = executor.loader.project_state(poblado).apps
+        stats = modelos.get_model("api", "EstadisticaEquipo").objects.get(
+            equipo_id=equipo.pk
+        )
+        assert (stats.total_completados, stats.pendientes) == (1, 1)
+    finally:
+        executor = MigrationExecutor(connection)
+        executor.migrate(ultimas)
@@ -0,0 +1,192 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_HIDRAULICO, ESTADO_COMPLETADO
+from api.models import Equipo, Mantenimiento
+from api.servicios import experiencias
+from api.servicios.experiencias import BufferExperiencias, retorno_descontado
+from api.servicios.ia_core import SistemaIA, ia_sistema
+from api.servicios.tabla_q import TablaQ
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    return BufferExperiencias(tmp_path / "experiencias.buf", capacidad=8)
+
+
+def _sistema(buffer):
+    sistema = SistemaIA()
+    sistema._cargar_conocimiento = TablaQ
+    sistema.experiencias = buffer
+    return sistema
+
+
+class TestBufferExperiencias:
+    def test_fifo_y_descarta_las_mas_antiguas(self, buffer):
+        for i in range(11):
+            buffer.agregar(f"s{i}", "a", float(i))
+
+        assert buffer.estadisticas() == {
+            "capacidad": 8,
+            "pendientes": 8,
+            "escritos": 11,
+            "descartados": 3,
+        }
+        desde, lote = buffer.leer(5)
+        assert [e.decode() for e in lote["estado"]] == [f"s{i}" for i in range(3, 8)]
+        # Leer no consume; confirmar sí
+        assert buffer.pendientes() == 8
+        _, resto = buffer.leer(10, desde + len(lote))
+        assert list(resto["recompensa"]) == [8.0, 9.0, 10.0]
+        buffer.confirmar(desde + len(lote) + len(resto))
+        assert len(buffer.leer(10)[1]) == 0
+
+    def test_persiste_en_disco(self, buffer):
+        buffer.agregar("s", "a", 2.5, exitoso=False)
+
+        reabierto = BufferExperiencias(buffer.ruta, capacidad=1000)
+        assert reabierto.pendientes() == 1
+        # La capacidad sale del archivo existente
+        assert reabierto.capacidad == 8
+        registro = reabierto.leer(1)[1][0]
+        assert (registro["recompensa"], registro["exitoso"]) == (2.5, False)
+
+    def test_rechaza_claves_que_no_entran(self, buffer):
+        # Cortar en el byte 300 partiría una "ñ" y daría otra clave
+        accion = "tecnico_" + "ñ" * 150
+        with pytest.raises(ValueError, match="accion"):
+            buffer.agregar("s", accion, 1.0)
+        assert buffer.pendientes() == 0
+
+        buffer.agregar("s", "tecnico_" + "ñ" * 100, 1.0)
+        assert buffer.leer(1)[1]["accion"][0].decode() == "tecnico_" + "ñ" * 100
+
+    def test_convierte_archivo_del_formato_anterior(self, tmp_path):
+        cabecera = np.zeros(1, dtype=experiencias._CABECERA)
+        cabecera["magic"] = experiencias.MAGIC
+        cabecera["formato"] = 1
+        cabecera["capacidad"] = 4
+        cabecera["escritos"], cabecera["leidos"] = 6, 3
+        registros = np.zeros(4, dtype=experiencias._REGISTRO_V1)
+        for i in range(3, 6):
+            registros[i % 4] = (f"s{i}".encode(), b"a", float(i), True)
+        ruta = tmp_path / "v1.buf"
+        ruta.write_bytes(cabecera.tobytes() + registros.tobytes())
+
+        buffer = BufferExperiencias(ruta)
+        assert buffer.pendientes() == 3
+        assert list(buffer.leer(10)[1]["recompensa"]) == [3.0, 4.0, 5.0]
+        buffer.agregar("s6", "a", 6.0)
+        assert buffer.estadisticas()["escritos"] == 4
+
+    def test_retorno_descontado(self):
+        assert retorno_descontado([1.0, 2.0, 4.0], 0.5) == 4.0 + 1.0 + 0.25
+        assert retorno_descontado([], 0.5) == 0.0
+
+
+@pytest.mark.django_db
+class TestAprendizajeDiferido:
+    @pytest.fixture
+    def mantenimientos(self):
+        equipo = Equipo.objects.create(
+            nombre="Bomba-1",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_HIDRAULICO,
+            numero_serie="SN-1",
+            ubicacion="Planta 1",
+            fecha_instalacion=timezone.now() - timedelta(days=900),
+        )
+        return [
+            Mantenimiento.objects.create(
+                equipo=equipo,
+                tipo=Mantenimiento.TIPO_CORRECTIVO,
+                prioridad=(10, 50)[i % 2],
+                estado=ESTADO_COMPLETADO,
+                tecnico_asignado=f"T{i % 3}",
+                fecha_programada=timezone.now(),
+                costo=Decimal(100),
+                descripcion="falla",
+            )
+            for i in range(7)
+        ]
+
+    def test_minilotes_igual_que_en_linea(self, tmp_path, mantenimientos):
+        buffer = BufferExperiencias(tmp_path / "exp.buf", capacidad=64)
+        diferido = _sistema(buffer)
+        en_linea = _sistema(buffer)
+        en_linea._guardar_conocimiento = lambda: None
+
+        rng = np.random.default_rng(1)
+        for mant in mantenimientos * 3:
+            resultado = {
+                "fue_exitoso": bool(rng.random() < 0.7),
+                "dias_resolucion": int(rng.integers(1, 40)),
+            }
+            diferido.registrar_experiencia(mant, resultado)
+            en_linea.aprender_de_resultado(mant, resultado)
+
+        resultado = diferido.procesar_experiencias(lote=4)
+
+        assert (resultado["procesadas"], resultado["lotes"]) == (21, 6)
+        assert resultado["pendientes"] == 0
+        esperado = en_linea.exportar_q_table()
+        obtenido = diferido.exportar_q_table()
+        assert obtenido.keys() == esperado.keys()
+        for estado, acciones in esperado.items():
+            assert obtenido[estado] == pytest.approx(acciones)
+        assert diferido.metricas == en_linea.metricas
+
+    def test_endpoint_solo_encola(self, monkeypatch, buffer, mantenimientos):
+        monkeypatch.setattr(ia_sistema, "experiencias", buffer)
+        monkeypatch.setattr(ia_sistema, "metricas", dict(ia_sistema.metricas))
+
+        respuesta = APIClient().post(
+            "/api/sistema/aprender/",
+            {"mantenimiento_id": mantenimientos[0].id, "resultado": {}},
+            format="json",
+        )
+
+        assert respuesta.status_code == 202
+        assert respuesta.json()["aprendizaje"]["pendientes"] == 1
+
+        salida = StringIO()
+        monkeypatch.setattr(ia_sistema, "_q_table", TablaQ())
+        call_command("procesar_experiencias", stdout=salida)
+        assert "1 experiencias en 1 lotes" in salida.getvalue()
+        assert buffer.pendientes() == 0
+
+        # Técnico con un nombre que no entra en el registro
+        mantenimientos[1].tecnico_asignado = "🔧" * 100
+        mantenimientos[1].save()
+        respuesta = APIClient().post(
+            "/api/sistema/aprender/",
+            {"mantenimiento_id": mantenimientos[1].id, "resultado": {}},
+            format="json",
+        )
+        assert respuesta.status_code == 400
+        assert buffer.pendientes() == 0
+
+    def test_caida_antes_de_guardar_no_pierde_experiencias(
+        self, buffer, mantenimientos
+    ):
+        sistema = _sistema(buffer)
+        for mant in mantenimientos[:3]:
+            sistema.registrar_experiencia(mant, {"fue_exitoso": True})
+
+        def caida():
+            raise RuntimeError("sin base")
+
+        sistema.flush = caida
+        with pytest.raises(RuntimeError):
+            sistema.procesar_experiencias(lote=2)
+        assert buffer.pendientes() == 3
+
+        assert _sistema(buffer).procesar_experiencias()["procesadas"] == 3
+        assert buffer.pendientes() == 0
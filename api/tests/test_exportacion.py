@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_MECANICO, PRIORIDAD_MEDIA
+from api.listados import LISTADO_EVENTOS
+from api.models import Equipo, Evento, Mantenimiento
+
+
+@pytest.fixture
+def datos():
+    ahora = timezone.now()
+    equipo = Equipo.objects.create(
+        nombre="Bomba, norte",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-export",
+        ubicacion="Planta 1",
+        fecha_instalacion=ahora,
+    )
+    for i in range(5):
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_CORRECTIVO,
+            prioridad=PRIORIDAD_MEDIA,
+            fecha_programada=ahora,
+            descripcion=f'línea "{i}"\nsegunda',
+            costo=Decimal("10.5") * i,
+        )
+        Evento.objects.create(
+            tipo=Evento.TIPO_TELEMETRIA,
+            equipo=equipo,
+            descripcion="lectura",
+            datos={"temp": 20 + i, "ok": True},
+        )
+    # Los dos primeros eventos son viejos
+    viejos = Evento.objects.order_by("id")[:2].values_list("id", flat=True)
+    Evento.objects.filter(id__in=list(viejos)).update(
+        fecha_evento=ahora - timedelta(days=10)
+    )
+    return ahora
+
+
+def _contenido(respuesta) -> str:
+    assert respuesta.streaming
+    return b"".join(respuesta.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExportacion:
+    def test_ndjson_igual_al_listado(self, datos):
+        cliente = APIClient()
+        respuesta = cliente.get("/api/mantenimientos/export/")
+        assert respuesta["Content-Type"] == "application/x-ndjson"
+        assert "mantenimientos.ndjson" in respuesta["Content-Disposition"]
+        filas = [json.loads(linea) for linea in _contenido(respuesta).splitlines()]
+
+        listado = cliente.get("/api/mantenimientos/", {"ordering": "id"}).json()
+        assert filas == sorted(listado["results"], key=lambda f: f["id"])
+        assert filas[1]["costo"] == "10.50"
+
+    def test_csv(self, datos):
+        respuesta = APIClient().get(
+            "/api/eventos/export/",
+            {"formato": "csv", "fields": "id,equipo_nombre,datos"},
+        )
+        assert respuesta["Content-Type"] == "text/csv; charset=utf-8"
+        filas = list(csv.reader(io.StringIO(_contenido(respuesta))))
+        assert filas[0] == ["id", "equipo_nombre", "datos"]
+        assert len(filas) == 6
+        assert filas[1][1] == "Bomba, norte"
+        assert json.loads(filas[1][2]) == {"temp": 20, "ok": True}
+
+    def test_since(self, datos):
+        desde = (datos - timedelta(days=1)).isoformat()
+        respuesta = APIClient().get("/api/eventos/export/", {"since": desde})
+        assert len(_contenido(respuesta).splitlines()) == 3
+
+        solo_fecha = (datos - timedelta(days=30)).date().isoformat()
+        respuesta = APIClient().get("/api/eventos/export/", {"since": solo_fecha})
+        assert len(_contenido(respuesta).splitlines()) == 5
+
+    def test_errores(self, datos):
+        cliente = APIClient()
+        assert cliente.get("/api/eventos/export/", {"since": "ayer"}).status_code == 400
+        respuesta = cliente.get("/api/eventos/export/", {"formato": "xml"})
+        assert respuesta.status_code == 400
+
+    def test_por_bloques(self, datos):
+        """Cada bloque de filas sale por separado"""
+        tuplas = LISTADO_EVENTOS.consulta(Evento.objects.order_by("pk")).iterator(
+            chunk_size=2
+        )
+        bloques = list(LISTADO_EVENTOS.exportar_ndjson(tuplas, tamano=2))
+        assert [bloque.count(b"\n") for bloque in bloques] == [2, 2, 1]
+
+    def test_sin_filas_csv_solo_encabezado(self):
+        respuesta = APIClient().get(
+            "/api/mantenimientos/export/", {"formato": "csv", "fields": "id,costo"}
+        )
+        assert _contenido(respuesta) == "id,costo\r\n"
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from api.constants import CATEGORIA_HIDRAULICO, PRIORIDAD_MEDIA
+from api.models import Equipo, Mantenimiento, Recurso
+from api.servicios.ia_core import SistemaIA
+from api.servicios.indice_tecnicos import IndiceTecnicos, indice_tecnicos
+from api.servicios.tabla_q import TablaQ
+from api.servicios.versiones import leer_version
+
+
+@pytest.fixture
+def indice():
+    indice_tecnicos.invalidar()
+    yield indice_tecnicos
+    # El rollback del test deja la instantánea global desactualizada
+    indice_tecnicos.invalidar()
+
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaIA()
+    sistema._cargar_conocimiento = TablaQ
+    sistema.epsilon = 0.0
+    return sistema
+
+
+@pytest.fixture
+def mantenimiento():
+    equipo = Equipo.objects.create(
+        nombre="Bomba-1",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_HIDRAULICO,
+        numero_serie="SN-1",
+        ubicacion="Planta 1",
+        fecha_instalacion=timezone.now() - timedelta(days=900),
+    )
+    return Mantenimiento.objects.create(
+        equipo=equipo,
+        tipo=Mantenimiento.TIPO_CORRECTIVO,
+        prioridad=PRIORIDAD_MEDIA,
+        fecha_programada=timezone.now(),
+        descripcion="falla",
+    )
+
+
+def _crear_tecnicos(cantidad):
+    Recurso.objects.bulk_create(
+        Recurso(
+            tipo=Recurso.TIPO_TECNICO,
+            nombre=f"Tecnico {i}",
+            especialidad=("electrica", "mecanica", "hidraulica")[i % 3],
+            calificacion=1 + i % 5,
+            disponible=i % 10 != 9,
+        )
+        for i in range(cantidad)
+    )
+    # bulk_create no dispara señales
+    indice_tecnicos.notificar_cambio()
+    return list(
+        Recurso.objects.filter(disponible=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+class TestIndiceTecnicos:
+    def test_mejor_q_y_alternativas(
+        self, indice, sistema, mantenimiento, django_assert_num_queries
+    ):
+        ids = _crear_tecnicos(10_000)
+        estado = f"cat_{CATEGORIA_HIDRAULICO}_tipo_correctivo_pri_{PRIORIDAD_MEDIA}"
+        for q, tecnico_id in ((50.0, ids[7]), (80.0, ids[3]), (20.0, ids[100])):
+            sistema.q_table.asignar(estado, f"tecnico_{tecnico_id}", q)
+        sistema.decidir_tecnico(mantenimiento)
+
+        # Con el índice cargado no hay consultas por decisión
+        with django_assert_num_queries(0):
+            decision = sistema.decidir_tecnico(mantenimiento, top_k=2)
+
+        assert decision["tecnico"].id == ids[3]
+        assert decision["confianza"] == 0.8
+        assert [a["tecnico"].id for a in decision["alternativas"]] == [ids[7], ids[100]]
+        assert [a["q_valor"] for a in decision["alternativas"]] == [50.0, 20.0]
+
+    def test_filtra_por_especialidad(self, indice, sistema, mantenimiento):
+        _crear_tecnicos(30)
+
+        decision = sistema.decidir_tecnico(mantenimiento, especialidad="mecanica")
+        elegidos = [decision["tecnico"]] + [
+            a["tecnico"] for a in decision["alternativas"]
+        ]
+        assert {t.especialidad for t in elegidos} == {"mecanica"}
+        # Especialidad sin técnicos: todos son candidatos
+        assert sistema.decidir_tecnico(mantenimiento, especialidad="quimica")
+
+    def test_senales_refrescan_el_indice(
+        self, indice, sistema, mantenimiento, django_capture_on_commit_callbacks
+    ):
+        assert sistema.decidir_tecnico(mantenimiento) is None
+        otro_proceso = IndiceTecnicos(intervalo=0)
+        assert len(otro_proceso.datos()) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            tecnico = Recurso.objects.create(
+                tipo=Recurso.TIPO_TECNICO, nombre="Ana", especialidad="electrica"
+            )
+        assert sistema.decidir_tecnico(mantenimiento)["tecnico"].id == tecnico.id
+        assert leer_version("tecnicos") == 1
+        assert otro_proceso.datos().ids.tolist() == [tecnico.id]
+
+        tecnico.disponible = False
+        tecnico.save()
+        assert sistema.decidir_tecnico(mantenimiento) is None
+
+    def test_lista_explicita(self, sistema, mantenimiento):
+        tecnicos = [
+            Recurso(id=1, nombre="A", especialidad="x", calificacion=3.0),
+            Recurso(id=2, nombre="B", especialidad="y", calificacion=4.0),
+        ]
+        decision = sistema.decidir_tecnico(mantenimiento, tecnicos)
+        assert decision["tecnico"].id in {1, 2}
+        assert len(decision["alternativas"]) == 1
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.constants import CATEGORIA_MECANICO, PRIORIDAD_ALTA, PRIORIDAD_MEDIA
+from api.listados import ORJSON_AVAILABLE, a_json
+from api.models import Equipo, Evento, Mantenimiento
+from api.views import EventoViewSet, MantenimientoViewSet
+
+RAROS = 'ñandú "citas" \\ \n\t\x01\x1f \u2028 \u2029 😀 </script>'
+
+
+@pytest.fixture
+def datos():
+    ahora = timezone.now()
+    equipo = Equipo.objects.create(
+        nombre=f"Bomba {RAROS}",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-rapido",
+        ubicacion="Planta 1",
+        fecha_instalacion=ahora,
+    )
+    for i in range(12):
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_CORRECTIVO,
+            prioridad=PRIORIDAD_ALTA if i % 2 else PRIORIDAD_MEDIA,
+            # 3 no es un estado conocido: la etiqueta es el número
+            estado=3 if i == 5 else 1,
+            tecnico_asignado=RAROS if i == 1 else "",
+            fecha_programada=ahora + timedelta(hours=i, microseconds=i),
+            fecha_completada=ahora.replace(microsecond=0) if i % 3 == 0 else None,
+            descripcion=f"orden {i} {RAROS}",
+            costo=Decimal("1234.5") if i else Decimal("0"),
+        )
+        Evento.objects.create(
+            tipo=Evento.TIPO_TELEMETRIA,
+            equipo=equipo if i % 2 else None,
+            severidad=i % 4,
+            descripcion=RAROS,
+            datos={"temp": 1e16 + i, "x": [0.1, -2e-7, None, True], "ñ": RAROS},
+            resuelto=bool(i % 3),
+        )
+
+
+@pytest.mark.django_db
+class TestListadoRapido:
+    @pytest.mark.parametrize(
+        "vista,url,orden",
+        [
+            (MantenimientoViewSet, "/api/mantenimientos/", "-fecha_programada"),
+            (EventoViewSet, "/api/eventos/", "fecha_evento"),
+        ],
+    )
+    def test_mismos_bytes_que_el_serializer(
+        self, datos, monkeypatch, vista, url, orden
+    ):
+        cliente = APIClient()
+
+        def paginas(params):
+            respuesta = cliente.get(url, params)
+            contenidos = [(respuesta["Content-Type"], respuesta.content)]
+            while siguiente := respuesta.json()["next"]:
+                respuesta = cliente.get(siguiente)
+                contenidos.append((respuesta["Content-Type"], respuesta.content))
+            return contenidos
+
+        consultas = [{}, {"page_size": 5}, {"page_size": 5, "ordering": orden}]
+        rapido = [paginas(params) for params in consultas]
+        monkeypatch.setattr(vista, "listado_rapido", None)
+        assert rapido == [paginas(params) for params in consultas]
+
+    def test_api_navegable_usa_el_serializer(self, datos):
+        respuesta = APIClient().get("/api/mantenimientos/", HTTP_ACCEPT="text/html")
+        assert respuesta.status_code == 200
+        assert respuesta["Content-Type"].startswith("text/html")
+
+    @pytest.mark.skipif(not ORJSON_AVAILABLE, reason="orjson no instalado")
+    def test_orjson_escapa_igual(self):
+        texto = {"a": [RAROS, 1, None, False, "\x7f"]}
+        assert a_json(texto) == a_json(texto, libre=True)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.constants import PRIORIDAD_MEDIA
+from api.models import Equipo, Evento, Mantenimiento
+from api.paginacion import PaginacionKeyset
+
+
+def _recorrer(cliente, url, params=None, clave="next"):
+    """Ids de todas las páginas siguiendo los enlaces `clave`"""
+    paginas = []
+    datos = cliente.get(url, params).json()
+    while True:
+        paginas.append([fila["id"] for fila in datos["results"]])
+        if not datos[clave]:
+            return paginas
+        datos = cliente.get(datos[clave]).json()
+
+
+@pytest.fixture
+def eventos():
+    ahora = timezone.now()
+    for i in range(30):
+        Evento.objects.create(
+            tipo=Evento.TIPO_INCIDENTE, severidad=i % 3, descripcion=f"e{i}"
+        )
+    # Empates de severidad y fecha: solo el id los desempata
+    for severidad in range(3):
+        Evento.objects.filter(severidad=severidad, id__lt=15).update(fecha_evento=ahora)
+        Evento.objects.filter(severidad=severidad, id__gte=15).update(
+            fecha_evento=ahora - timedelta(seconds=severidad, microseconds=7)
+        )
+    return list(
+        Evento.objects.order_by("-severidad", "-fecha_evento", "id").values_list(
+            "id", flat=True
+        )
+    )
+
+
+@pytest.mark.django_db
+class TestPaginacionKeyset:
+    def test_recorre_todo_en_orden_sin_repetir(self, eventos):
+        paginas = _recorrer(APIClient(), "/api/eventos/", {"page_size": 7})
+        assert [len(p) for p in paginas] == [7, 7, 7, 7, 2]
+        assert sum(paginas, []) == eventos
+
+    def test_vuelve_hacia_atras(self, eventos):
+        cliente = APIClient()
+        datos = cliente.get("/api/eventos/", {"page_size": 7}).json()
+        assert datos["previous"] is None
+        while datos["next"]:
+            datos = cliente.get(datos["next"]).json()
+
+        paginas = _recorrer(cliente, datos["previous"], clave="previous")
+        assert sum(reversed(paginas), []) == eventos[:28]
+
+    def test_sin_offset_ni_count(self, eventos):
+        cliente = APIClient()
+        siguiente = cliente.get("/api/eventos/", {"page_size": 10}).json()["next"]
+        with CaptureQueriesContext(connection) as consultas:
+            datos = cliente.get(siguiente).json()
+        sql = " ".join(c["sql"] for c in consultas).upper()
+        assert datos["results"][0]["id"] == eventos[10]
+        assert "OFFSET" not in sql and "COUNT(" not in sql
+
+    def test_respeta_ordering(self, eventos):
+        paginas = _recorrer(
+            APIClient(), "/api/eventos/", {"page_size": 4, "ordering": "fecha_evento"}
+        )
+        assert sum(paginas, []) == list(
+            Evento.objects.order_by("fecha_evento", "id").values_list("id", flat=True)
+        )
+
+    def test_cursor_invalido(self):
+        respuesta = APIClient().get("/api/eventos/", {"cursor": "no-es-un-cursor"})
+        assert respuesta.status_code == 404
+
+    def test_columnas_con_null(self):
+        ahora = timezone.now()
+        equipo = Equipo.objects.create(
+            nombre="Bomba",
+            empresa_nombre="EV4",
+            categoria=1,
+            numero_serie="SN-pag",
+            ubicacion="Planta 1",
+            fecha_instalacion=ahora,
+        )
+        for i in range(9):
+            Mantenimiento.objects.create(
+                equipo=equipo,
+                tipo=Mantenimiento.TIPO_PREVENTIVO,
+                prioridad=PRIORIDAD_MEDIA,
+                fecha_programada=ahora,
+                fecha_completada=None if i % 3 else ahora - timedelta(days=i),
+                descripcion=f"m{i}",
+            )
+        consulta = Mantenimiento.objects.order_by("-fecha_completada")
+        esperado = [m.pk for m in consulta if m.fecha_completada] + sorted(
+            m.pk for m in consulta if m.fecha_completada is None
+        )
+
+        factory = APIRequestFactory()
+
+        def recorrer(url, enlace):
+            paginas = []
+            while url:
+                paginador = PaginacionKeyset()
+                pagina = paginador.paginate_queryset(
+                    consulta, Request(factory.get(url))
+                )
+                paginas.append([m.pk for m in pagina])
+                anterior, url = url, enlace(paginador)
+            return paginas, anterior
+
+        adelante, ultima = recorrer("/?page_size=2", PaginacionKeyset.get_next_link)
+        assert sum(adelante, []) == esperado
+        # Desde la última página (un NULL) hasta el principio
+        atras, _ = recorrer(ultima, PaginacionKeyset.get_previous_link)
+        assert sum(reversed(atras), []) == esperado
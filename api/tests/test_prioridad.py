@@ -0,0 +1,149 @@
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.constants import (
+    CATEGORIA_MECANICO,
+    ESTADO_COMPLETADO,
+    ESTADO_PENDIENTE,
+    PALABRAS_CLAVE_PRIORIDAD,
+    PRIORIDAD_ALTA,
+    PRIORIDAD_BAJA,
+    PRIORIDAD_MEDIA,
+)
+from api.models import Equipo, EstadisticaEquipo, Mantenimiento
+from api.servicios.comun import ServicioMantenimiento
+from api.servicios.prioridad import (
+    MatcherPrioridad,
+    calcular_prioridad,
+    calcular_prioridad_lote,
+    matcher_prioridad,
+    normalizar_texto,
+)
+
+PESOS = {p: w for palabras in PALABRAS_CLAVE_PRIORIDAD.values() for p, w in palabras}
+
+
+def _puntaje_referencia(texto):
+    """Escaneo palabra por palabra (semántica `palabra in texto`)"""
+    texto = normalizar_texto(texto)
+    return sum(peso for palabra, peso in PESOS.items() if palabra in texto)
+
+
+class TestMatcherPrioridad:
+    @pytest.mark.parametrize(
+        "texto, esperado",
+        [
+            ("Riesgo CRÍTICO en tablero", PRIORIDAD_ALTA),
+            ("Ruido en rodamiento", PRIORIDAD_MEDIA),
+            ("Ajuste y revisión general", PRIORIDAD_MEDIA),
+            ("Ajuste menor", PRIORIDAD_BAJA),
+            ("", PRIORIDAD_BAJA),
+        ],
+    )
+    def test_pesos_y_umbrales(self, texto, esperado):
+        assert calcular_prioridad(texto) == esperado
+
+    def test_cada_palabra_suma_una_vez(self):
+        assert matcher_prioridad.puntaje("falla, falla y más falla") == 35
+
+    def test_palabras_solapadas_y_prefijos(self):
+        matcher = MatcherPrioridad({1: [("fall", 5), ("falla", 10), ("lla", 1)]})
+
+        assert matcher.puntaje("FALLA") == 16
+        assert matcher.puntaje("fallo") == 5
+
+    def test_igual_a_escaneo_por_palabra(self):
+        rng = random.Random(9)
+        vocabulario = [*PESOS, "Fuégo", "REVISIÓN", "bomba", "urgentemente", "x"]
+        textos = [
+            " ".join(rng.choices(vocabulario, k=rng.randint(0, 6))) for _ in range(300)
+        ]
+
+        for texto in textos:
+            assert matcher_prioridad.puntaje(texto) == _puntaje_referencia(texto)
+        assert calcular_prioridad_lote(textos) == [
+            calcular_prioridad(t) for t in textos
+        ]
+
+    def test_rust_igual_a_python(self):
+        k_ia = pytest.importorskip("k_ia")
+        if not hasattr(k_ia, "calc_p_rust"):
+            pytest.skip("extensión k_ia no compilada")
+
+        for texto in ["Fuego en sala", "revisión", "ruido y ajuste", "nada"]:
+            assert k_ia.calc_p_rust(normalizar_texto(texto)) == calcular_prioridad(
+                texto
+            )
+
+    def test_lote_rust_igual_a_python(self):
+        k_ia = pytest.importorskip("k_ia")
+        if not hasattr(k_ia, "calc_p_batch"):
+            pytest.skip("extensión k_ia no compilada")
+        textos = ["Fuego en sala", "revisión", "ruido y ajuste", "", "FALLA"]
+
+        assert matcher_prioridad.calcular_lote(textos) == MatcherPrioridad(
+            usar_rust=False
+        ).calcular_lote(textos)
+
+
+def test_sincronizar_prioridad_usa_matcher():
+    mantenimiento = Mantenimiento(descripcion="Peligro: fuga", prioridad=PRIORIDAD_BAJA)
+
+    ServicioMantenimiento.sincronizar_prioridad(mantenimiento)
+
+    assert mantenimiento.prioridad == PRIORIDAD_ALTA
+
+
+@pytest.mark.django_db
+def test_sincronizar_prioridades_guarda_con_senales():
+    equipo = Equipo.objects.create(
+        nombre="Compresor",
+        empresa_nombre="EV4",
+        categoria=CATEGORIA_MECANICO,
+        numero_serie="SN-1",
+        ubicacion="Planta 1",
+        fecha_instalacion=timezone.now(),
+    )
+    descripciones = ["Fuego en tablero", "Ajuste menor", "Peligro: fuga", ""]
+    for descripcion in descripciones:
+        Mantenimiento.objects.create(
+            equipo=equipo,
+            tipo=Mantenimiento.TIPO_PREVENTIVO,
+            prioridad=PRIORIDAD_MEDIA,
+            estado=ESTADO_PENDIENTE,
+            fecha_programada=timezone.now(),
+            descripcion=descripcion,
+        )
+    Mantenimiento.objects.create(
+        equipo=equipo,
+        tipo=Mantenimiento.TIPO_PREVENTIVO,
+        prioridad=PRIORIDAD_BAJA,
+        estado=ESTADO_COMPLETADO,
+        fecha_programada=timezone.now(),
+        fecha_completada=timezone.now(),
+        descripcion="Fuego resuelto",
+    )
+
+    salida = StringIO()
+    call_command("sincronizar_prioridades", lote=2, stdout=salida)
+
+    assert "3 de 4" in salida.getvalue()
+    prioridades = Mantenimiento.objects.order_by("pk").values_list(
+        "prioridad", flat=True
+    )
+    assert list(prioridades) == [
+        PRIORIDAD_ALTA,
+        PRIORIDAD_BAJA,
+        PRIORIDAD_ALTA,
+        PRIORIDAD_MEDIA,
+        PRIORIDAD_BAJA,
+    ]
+    # Las señales mantuvieron la estadística del equipo
+    stats = EstadisticaEquipo.objects.get(equipo=equipo)
+    assert stats.suma_prioridad_pendientes == 2 * PRIORIDAD_ALTA + (
+        PRIORIDAD_BAJA + PRIORIDAD_MEDIA
+    )
@@ -0,0 +1,194 @@
+import multiprocessing
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.constants import (
+    CATEGORIA_HIDRAULICO,
+    ESTADO_COMPLETADO,
+    ESTADO_PENDIENTE,
+    PRIORIDAD_MEDIA,
+)
+from api.models import Equipo, Mantenimiento, Recomendacion
+from api.servicios.recomendaciones import MotorRecomendaciones
+
+AHORA = timezone.now()
+CAMPOS = ["equipo_id", "tipo", "prioridad", "titulo", "descripcion", "confianza"]
+
+
+def _crear_flota(cantidad, desde=0):
+    for i in range(desde, desde + cantidad):
+        eq = Equipo.objects.create(
+            nombre=f"Bomba-{i}",
+            empresa_nombre="EV4",
+            categoria=CATEGORIA_HIDRAULICO,
+            es_critico=i % 2 == 0,
+            numero_serie=f"SN-{i}",
+            ubicacion="Planta 1",
+            fecha_instalacion=AHORA - timedelta(days=900),
+        )
+        for dias, costo in ((120, 100), (80, 100), (40 + i, 500)):
+            Mantenimiento.objects.create(
+                equipo=eq,
+                tipo=Mantenimiento.TIPO_CORRECTIVO,
+                prioridad=PRIORIDAD_MEDIA,
+                estado=ESTADO_COMPLETADO,
+                fecha_programada=AHORA - timedelta(days=dias),
+                fecha_completada=AHORA - timedelta(days=dias),
+                costo=Decimal(costo),
+                descripcion="falla",
+            )
+        for _ in range(3):
+            Mantenimiento.objects.create(
+                equipo=eq,
+                tipo=Mantenimiento.TIPO_PREVENTIVO,
+                prioridad=PRIORIDAD_MEDIA,
+                estado=ESTADO_PENDIENTE,
+                fecha_programada=AHORA + timedelta(days=5),
+                costo=Decimal(100),
+                descripcion="revision",
+            )
+
+
+def _recomendaciones():
+    return sorted(
+        Recomendacion.objects.values_list(*CAMPOS), key=lambda r: (r[0], r[1])
+    )
+
+
+@pytest.mark.django_db
+class TestMotorRecomendaciones:
+    def test_lote_coincide_con_reglas_por_equipo(self):
+        _crear_flota(4)
+        for equipo_id in Equipo.objects.values_list("id", flat=True):
+            MotorRecomendaciones.generar_recomendaciones_equipo(equipo_id)
+        por_equipo = _recomendaciones()
+        Recomendacion.objects.all().delete()
+
+        resultado = MotorRecomendaciones.generar_recomendaciones_lote()
+
+        assert resultado["total"] == len(por_equipo) > 0
+        assert _recomendaciones() == por_equipo
+        assert set(resultado["tiempos"]) == {"carga", "evaluacion", "escritura"}
+
+    def test_lote_omite_recomendaciones_no_vistas(self):
+        _crear_flota(3)
+        primera = MotorRecomendaciones.generar_recomendaciones_lote()
+
+        segunda = MotorRecomendaciones.generar_recomendaciones_lote()
+
+        assert segunda["total"] == 0
+        assert segunda["omitidas"] == primera["total"]
+
+    def test_consultas_constantes_en_tamano_de_flota(self):
+        _crear_flota(2)
+        with CaptureQueriesContext(connection) as pequena:
+            MotorRecomendaciones.generar_recomendaciones_lote(batch_size=2)
+        Recomendacion.objects.all().delete()
+
+        _crear_flota(2, desde=2)
+        with CaptureQueriesContext(connection) as grande:
+            MotorRecomendaciones.generar_recomendaciones_lote(batch_size=100)
+
+        assert len(grande.captured_queries) <= len(pequena.captured_queries)
+
+    def test_rangos_cubren_todos_los_equipos(self):
+        _crear_flota(7)
+        ids = list(Equipo.objects.order_by("id").values_list("id", flat=True))
+
+        rangos = MotorRecomendaciones.rangos_equipos(3)
+
+        assert len(rangos) == 3
+        assert rangos[0][0] == ids[0] and rangos[-1][1] == ids[-1]
+        cubiertos = [i for desde, hasta in rangos for i in ids if desde <= i <= hasta]
+        assert cubiertos == ids
+        assert MotorRecomendaciones.rangos_equipos(50) == [(i, i) for i in ids]
+
+    def test_lote_por_rangos_coincide_con_lote_unico(self):
+        _crear_flota(5)
+        MotorRecomendaciones.generar_recomendaciones_lote(ahora=AHORA)
+        unico = _recomendaciones()
+        Recomendacion.objects.all().delete()
+
+        total = 0
+        for desde, hasta in MotorRecomendaciones.rangos_equipos(3):
+            total += MotorRecomendaciones.generar_recomendaciones_lote(
+                equipos=Equipo.objects.filter(id__range=(desde, hasta)), ahora=AHORA
+            )["total"]
+
+        assert total == len(unico)
+        assert _recomendaciones() == unico
+
+    def test_comando_un_worker(self):
+        _crear_flota(2)
+        salida = StringIO()
+
+        call_command("generar_recomendaciones", "--workers", "1", stdout=salida)
+
+        assert f"{Recomendacion.objects.count()} recomendaciones generadas" in (
+            salida.getvalue()
+        )
+        assert "Shard 1" in salida.getvalue()
+
+    def test_comando_sin_fork_procesa_en_linea(self, monkeypatch):
+        _crear_flota(4)
+        monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+        salida, avisos = StringIO(), StringIO()
+
+        call_command(
+            "generar_recomendaciones", "--workers", "2", stdout=salida, stderr=avisos
+        )
+
+        assert "no soporta fork" in avisos.getvalue()
+        assert "Shard 2" in salida.getvalue()
+        assert "con 1 procesos" in salida.getvalue()
+        assert Recomendacion.objects.exists()
+
+
+@contextmanager
+def _base_en_archivo(tmp_path):
+    """
+    Copia la base de prueba a un archivo SQLite y la usa como default: la
+    de memoria no la ven los procesos hijos del comando.
+    """
+    original = connections["default"]
+    original.ensure_connection()
+    ruta = tmp_path / "db.sqlite3"
+    destino = sqlite3.connect(ruta)
+    original.connection.backup(destino)
+    destino.close()
+
+    copia = original.__class__({**original.settings_dict, "NAME": str(ruta)}, "default")
+    connections["default"] = copia
+    try:
+        yield
+    finally:
+        copia.close()
+        connections["default"] = original
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comando_varios_workers_coincide_con_uno(tmp_path):
+    _crear_flota(6)
+    call_command("generar_recomendaciones", "--workers", "1", stdout=StringIO())
+    en_linea = _recomendaciones()
+    Recomendacion.objects.all().delete()
+    assert en_linea
+
+    # Dos procesos (fork) escriben a la vez en el mismo archivo
+    with _base_en_archivo(tmp_path):
+        salida = StringIO()
+        call_command("generar_recomendaciones", "--workers", "2", stdout=salida)
+        paralelo = _recomendaciones()
+
+    assert "Shard 2" in salida.getvalue()
+    assert paralelo == en_linea
+    assert not Recomendacion.objects.exists()
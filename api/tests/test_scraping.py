@@ -0,0 +1,297 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api.models import BaseConocimiento
+from api.servicios import scraping, scraping_inteligente
+from api.servicios.cache_http import CacheHTTP
+from api.servicios.ia_core import ia_sistema
+from api.servicios.scraping_async import (
+    MAX_PARRAFOS,
+    ClienteScraping,
+    ExtractorParrafos,
+    cliente_scraping,
+)
+from api.servicios.tabla_q import TablaQ
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Servidor local: páginas con párrafos, una lenta y una que no termina"""
+
+    protocol_version = "HTTP/1.1"
+    activos = 0
+    max_activos = 0
+    enviados_infinita = 0
+    version_wiki = 1
+    cuerpos_wiki = 0
+    pedidos_wiki = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, cuerpo: str, estado: int = 200, cabeceras=()):
+        datos = cuerpo.encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        for cabecera in cabeceras:
+            self.send_header(*cabecera)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.activos += 1
+            cls.max_activos = max(cls.max_activos, cls.activos)
+        try:
+            self._atender()
+        finally:
+            with cls.lock:
+                cls.activos -= 1
+
+    def _atender(self):
+        ruta = self.path.split("?")[0]
+        if ruta.startswith("/pagina/"):
+            n = ruta.rsplit("/", 1)[1]
+            time.sleep(0.1)
+            parrafos = "".join(f"<p>pag {n} parrafo {i}</p>" for i in range(50))
+            self._responder(f"<html><script>x</script>{parrafos}</html>")
+        elif ruta == "/lenta":
+            time.sleep(3)
+            self._responder("<p>tarde</p>")
+        elif ruta == "/infinita":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            try:
+                while type(self).enviados_infinita < 10_000:
+                    self.wfile.write(b"<p>mas</p>" * 100)
+                    self.wfile.flush()
+                    type(self).enviados_infinita += 100
+                    time.sleep(0.01)
+            except OSError:
+                pass
+            self.close_connection = True
+        elif ruta == "/wiki":
+            cls = type(self)
+            cls.pedidos_wiki += 1
+            etag = f'"v{cls.version_wiki}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._responder("", estado=304, cabeceras=[("ETag", etag)])
+                return
+            cls.cuerpos_wiki += 1
+            parrafos = "".join(
+                f"<p>bomba centrifuga version {cls.version_wiki} parte {i}</p>"
+                for i in range(40)
+            )
+            self._responder(f"<html>{parrafos}</html>", cabeceras=[("ETag", etag)])
+        elif ruta.startswith("/html/"):
+            base = f"http://{self.headers['Host']}"
+            resultados = "".join(
+                f'<div class="result"><h2 class="result__title">Titulo {destino}</h2>'
+                f'<a class="result__a" href="{base}{destino}">link</a>'
+                f'<div class="result__snippet">snippet {destino}</div></div>'
+                for destino in self._destinos()
+            )
+            self._responder(f"<html>{resultados}</html>")
+        else:
+            self._responder("no", estado=404)
+
+    def _destinos(self):
+        if "wiki" in self.path:
+            return ("/wiki", "/wiki?b")
+        return ("/pagina/1", "/no-existe", "/pagina/2")
+
+
+@pytest.fixture
+def servidor():
+    _Stub.activos = _Stub.max_activos = _Stub.enviados_infinita = 0
+    _Stub.version_wiki = 1
+    _Stub.cuerpos_wiki = _Stub.pedidos_wiki = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    httpd.daemon_threads = True
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = CacheHTTP(tmp_path / "cache", ttl=0)
+    monkeypatch.setattr(cliente_scraping, "cache", cache)
+    monkeypatch.setattr(scraping_inteligente, "cache_http", cache)
+    return cache
+
+
+class TestExtractorParrafos:
+    def test_para_tras_n_parrafos(self):
+        parser = ExtractorParrafos(max_parrafos=2)
+        for trozo in (
+            "<p>uno <b>a</b>",
+            " &amp; b</p><style>p{}</style>",
+            "<p>dos<p>tres",
+        ):
+            parser.feed(trozo)
+        parser.close()
+        assert parser.parrafos == ["uno a & b", "dos"]
+        assert parser.completo
+
+
+class TestClienteScraping:
+    def test_visita_en_paralelo_con_limite_por_host(self, servidor, cache):
+        cliente = ClienteScraping(max_conexiones=8, max_por_host=2, cache=cache)
+        urls = [f"{servidor}/pagina/{i}" for i in range(6)] + [f"{servidor}/x"]
+
+        inicio = time.monotonic()
+        textos = cliente.visitar_sitios(urls, max_parrafos=3)
+
+        assert [p.texto for p in textos[:6]] == [
+            "\n".join(f"pag {i} parrafo {j}" for j in range(3)) for i in range(6)
+        ]
+        assert textos[6] is None
+        assert _Stub.max_activos == 2
+        # 6 páginas de 0.1 s de a 2: bastante menos que en serie
+        assert time.monotonic() - inicio < 1.0
+
+    def test_presupuesto_total(self, servidor, cache):
+        cliente = ClienteScraping(cache=cache)
+        inicio = time.monotonic()
+        textos = cliente.visitar_sitios(
+            [f"{servidor}/lenta", f"{servidor}/pagina/1"], presupuesto=0.5
+        )
+        assert textos[0] is None
+        assert textos[1].texto.startswith("pag 1")
+        assert time.monotonic() - inicio < 1.5
+
+    def test_corta_la_descarga(self, servidor, cache):
+        cliente = ClienteScraping(cache=cache)
+        pagina = cliente.visitar_sitios([f"{servidor}/infinita"], max_parrafos=5)[0]
+        assert pagina.texto == "\n".join(["mas"] * 5)
+        assert _Stub.enviados_infinita < 10_000
+
+    def test_huella_del_texto_y_no_del_html_leido(self, servidor, tmp_path):
+        """Cortada en otro punto, la misma página da la misma huella"""
+        url = f"{servidor}/infinita"
+        primera = ClienteScraping(cache=CacheHTTP(tmp_path / "a")).visitar_sitios(
+            [url], max_parrafos=5
+        )[0]
+        _Stub.enviados_infinita = 0
+        segunda = ClienteScraping(cache=CacheHTTP(tmp_path / "b")).visitar_sitios(
+            [url], max_parrafos=5
+        )[0]
+        assert segunda.huella == primera.huella
+
+
+class TestServicioScraping:
+    def test_buscar_web(self, servidor, cache, monkeypatch):
+        monkeypatch.setattr(scraping, "URL_BUSQUEDA", f"{servidor}/html/")
+
+        resultados = scraping.ServicioScraping.buscar_web("bomba", max_resultados=5)
+
+        assert [r["titulo"] for r in resultados] == [
+            "Titulo /pagina/1",
+            "Titulo /no-existe",
+            "Titulo /pagina/2",
+        ]
+        assert resultados[0]["contenido"].startswith("pag 1 parrafo 0\n")
+        # Sitio caído: queda el snippet
+        assert resultados[1]["contenido"] == "snippet /no-existe"
+        assert resultados[2]["features"]["lineas"] == MAX_PARRAFOS - 1
+
+    def test_visitar_sitio(self, servidor, cache):
+        assert scraping.ServicioScraping.visitar_sitio(f"{servidor}/nada") is None
+        assert scraping.ServicioScraping.visitar_sitio(f"{servidor}/pagina/3")
+
+
+class TestCacheHTTP:
+    def test_revalida_con_etag(self, servidor, cache):
+        cliente = ClienteScraping(cache=cache)
+        url = f"{servidor}/wiki"
+
+        primera = cliente.visitar_sitios([url], max_parrafos=3)[0]
+        segunda = cliente.visitar_sitios([url], max_parrafos=3)[0]
+        assert segunda == primera
+        # Vencida (ttl=0) se revalida: 304 sin cuerpo
+        assert (_Stub.pedidos_wiki, _Stub.cuerpos_wiki) == (2, 1)
+
+        _Stub.version_wiki = 2
+        tercera = cliente.visitar_sitios([url], max_parrafos=3)[0]
+        assert tercera.huella != primera.huella
+        assert "version 2" in tercera.texto
+
+    def test_fresca_no_usa_la_red(self, servidor, tmp_path):
+        cliente = ClienteScraping(cache=CacheHTTP(tmp_path, ttl=60))
+        url = f"{servidor}/wiki"
+
+        cliente.visitar_sitios([url], max_parrafos=3)
+        # Más párrafos que los guardados: el comienzo no alcanza
+        treinta = cliente.visitar_sitios([url], max_parrafos=30)[0]
+        assert treinta.texto.count("\n") == 29
+        assert cliente.visitar_sitios([url], max_parrafos=30)[0] == treinta
+        assert cliente.visitar_sitios([url], max_parrafos=5)[0].texto.count("\n") == 4
+        assert _Stub.pedidos_wiki == 2
+
+    def test_cuerpo_comprimido_y_lru(self, tmp_path):
+        cache = CacheHTTP(tmp_path, max_bytes=3000)
+        repetido = b"<p>" + b"a" * 10_000 + b"</p>"
+        entrada = cache.guardar("http://x/0", repetido, etag='"e"')
+        assert cache.tamano() < 1000
+        assert cache.obtener("http://x/0").cuerpo() == repetido
+        assert entrada.condicionales() == {"If-None-Match": '"e"'}
+
+        for i in range(1, 4):
+            time.sleep(0.02)
+            cache.guardar(f"http://x/{i}", os.urandom(900))
+            time.sleep(0.02)
+            # Usar la primera la mantiene entre las recientes
+            assert cache.obtener("http://x/0") is not None
+
+        assert cache.tamano() <= 3000
+        assert cache.obtener("http://x/1") is None
+        assert cache.obtener("http://x/3") is not None
+
+    def test_extraer_conocimiento(self, servidor, cache):
+        url = f"{servidor}/wiki"
+        primera = scraping_inteligente.ScrapingInteligente.extraer_conocimiento(url)
+        segunda = scraping_inteligente.ScrapingInteligente.extraer_conocimiento(url)
+        assert primera["exito"]
+        assert segunda["huella"] == primera["huella"]
+        assert segunda["texto"] == primera["texto"]
+        assert _Stub.cuerpos_wiki == 1
+
+    @pytest.mark.django_db
+    def test_aprender_web_omite_lo_que_no_cambio(self, servidor, cache, monkeypatch):
+        monkeypatch.setattr(scraping, "URL_BUSQUEDA", f"{servidor}/html/wiki")
+        monkeypatch.setattr(ia_sistema, "_q_table", TablaQ())
+        monkeypatch.setattr(ia_sistema, "metricas", dict(ia_sistema.metricas))
+
+        primera = ia_sistema.aprender_de_web("bombas")
+        BaseConocimiento.objects.all().delete()
+        segunda = ia_sistema.aprender_de_web("bombas")
+
+        assert primera["conocimientos_guardados"] == 2
+        assert segunda["sin_cambios"] == 2
+        assert segunda["conocimientos_guardados"] == 0
+
+    @pytest.mark.django_db
+    def test_aprender_web_procesa_lo_ya_descargado(self, servidor, cache, monkeypatch):
+        """Que la página esté en la caché no significa que se haya procesado"""
+        monkeypatch.setattr(scraping, "URL_BUSQUEDA", f"{servidor}/html/wiki")
+        monkeypatch.setattr(ia_sistema, "_q_table", TablaQ())
+        monkeypatch.setattr(ia_sistema, "metricas", dict(ia_sistema.metricas))
+
+        scraping.ServicioScraping.buscar_web("bombas")
+        resultado = ia_sistema.aprender_de_web("bombas")
+
+        assert resultado["sin_cambios"] == 0
+        assert resultado["conocimientos_guardados"] == 2
+        # Otro tema no comparte lo procesado
+        BaseConocimiento.objects.all().delete()
+        assert ia_sistema.aprender_de_web("motores")["sin_cambios"] == 0
@@ -0,0 +1,220 @@
+import json
+import random
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import ValorQ
+from api.servicios.ia_core import SistemaIA
+from api.servicios.persistencia_q import CLAVE_CACHE_LEGADA, PersistenciaQ
+from api.servicios.tabla_q import TablaQ
+
+
+def _actualizar_dict(tabla, estado, accion, reward, next_estado, lr=0.1, gamma=0.95):
+    """Implementación previa con dict de dicts (referencia)"""
+    tabla.setdefault(estado, {}).setdefault(accion, 0.0)
+    current_q = tabla[estado][accion]
+    next_max_q = max(tabla.get(next_estado, {}).values(), default=0.0)
+    tabla[estado][accion] = current_q + lr * (reward + gamma * next_max_q - current_q)
+
+
+@pytest.fixture
+def sistema(monkeypatch):
+    monkeypatch.setattr(SistemaIA, "_guardar_conocimiento", lambda self: None)
+    monkeypatch.setattr(SistemaIA, "_cargar_conocimiento", lambda self: TablaQ())
+    return SistemaIA()
+
+
+class TestTablaQ:
+    def test_misma_evolucion_que_dict(self, sistema):
+        rng = random.Random(3)
+        referencia = {}
+        estados = [f"cat_{c}_tipo_x_pri_{p}" for c in range(6) for p in (10, 50)]
+        for _ in range(2000):
+            estado = rng.choice(estados)
+            accion = f"tecnico_{rng.randint(1, 40)}"
+            reward = rng.uniform(-15, 18)
+            siguiente = rng.choice([f"{estado}_completado", rng.choice(estados)])
+            _actualizar_dict(referencia, estado, accion, reward, siguiente)
+            sistema._actualizar_q_value(estado, accion, reward, siguiente)
+
+        assert sistema.q_table.exportar() == referencia
+        estadisticas = sistema.obtener_estadisticas()
+        assert estadisticas["total_estados"] == len(referencia)
+        assert estadisticas["total_acciones"] == sum(map(len, referencia.values()))
+
+    def test_crece_duplicando_capacidad(self):
+        tabla = TablaQ(capacidad_estados=2, capacidad_acciones=2)
+        for i in range(5):
+            tabla.asignar(f"s{i}", f"a{i}", float(i))
+
+        assert tabla.general.q.shape == (8, 8)
+        assert tabla.valor("s4", "a4") == 4.0
+        assert tabla.valor("s4", "a0") == 0.0
+        assert TablaQ.desde_dict(tabla.exportar()).exportar() == tabla.exportar()
+
+    def test_tecnicos_solo_ocupan_estados_de_asignacion(self):
+        tabla = TablaQ()
+        for i in range(2000):
+            tabla.asignar(f"cat_{i}_tipo_x_pri_50", "50", 1.0)
+            tabla.asignar(f"cat_{i}_tipo_x_pri_50_completado", "extraer", 1.0)
+        for t in range(10000):
+            tabla.asignar("cat_0_tipo_x_pri_50", f"tecnico_{t}", float(t))
+
+        assert tabla.tecnicos.q.shape == (8, 16384)
+        assert tabla.general.q.shape[1] == 16
+        assert tabla.memoria_bytes() < 2_000_000
+        assert tabla.max_estado("cat_0_tipo_x_pri_50") == 9999.0
+        assert tabla.valor("cat_0_tipo_x_pri_50", "50") == 1.0
+        assert len(tabla.exportar()["cat_0_tipo_x_pri_50"]) == 10001
+
+    def test_max_solo_de_acciones_aprendidas(self):
+        tabla = TablaQ()
+        tabla.asignar("s", "a", -3.0)
+        tabla.asignar("otro", "b", 5.0)
+
+        assert tabla.max_estado("s") == -3.0
+        assert tabla.max_estado("nuevo") == 0.0
+        np.testing.assert_array_equal(
+            tabla.valores("s", ["b", "a", "desconocida"]), [0.0, -3.0, 0.0]
+        )
+
+    def test_elegir_mejor_accion(self, sistema):
+        sistema.epsilon = 0.0
+        sistema.q_table.asignar("estado", "tecnico_2", 4.0)
+        sistema.q_table.asignar("estado", "tecnico_3", 9.0)
+
+        acciones = ["tecnico_1", "tecnico_2", "tecnico_3"]
+        assert sistema._elegir_mejor_accion("estado", acciones) == "tecnico_3"
+        assert sistema._elegir_mejor_accion("sin_datos", acciones) in acciones
+
+
+@pytest.mark.django_db
+class TestPersistenciaQ:
+    def test_flush_escribe_solo_cambios(self):
+        persistencia = PersistenciaQ()
+        tabla = TablaQ()
+        for i in range(10):
+            tabla.asignar(f"s{i % 3}", f"tecnico_{i}", float(i))
+
+        with CaptureQueriesContext(connection) as diez:
+            assert persistencia.flush(tabla) == 10
+        assert persistencia.flush(tabla) == 0
+
+        tabla.asignar("s0", "tecnico_0", 42.0)
+        with CaptureQueriesContext(connection) as uno:
+            assert persistencia.flush(tabla) == 1
+        # Un único executemany sin importar cuántas filas haya
+        assert len(uno) == len(diez)
+
+        assert ValorQ.objects.count() == 10
+        assert ValorQ.objects.get(estado="s0", accion="tecnico_0").valor == 42.0
+        assert persistencia.cargar().exportar() == tabla.exportar()
+
+    def test_registrar_vuelca_por_umbral_o_intervalo(self):
+        persistencia = PersistenciaQ(umbral=3, intervalo=3600)
+        tabla = TablaQ()
+        for i in range(2):
+            tabla.asignar("s", f"a{i}", 1.0)
+            persistencia.registrar(tabla)
+        assert ValorQ.objects.count() == 0
+
+        tabla.asignar("s", "a2", 1.0)
+        persistencia.registrar(tabla)
+        assert ValorQ.objects.count() == 3
+
+        tabla.asignar("s", "a3", 1.0)
+        persistencia.intervalo = 0
+        persistencia.registrar(tabla)
+        assert ValorQ.objects.count() == 4
+
+    def test_importa_snapshot_json_anterior_una_vez(self):
+        cache.set(CLAVE_CACHE_LEGADA, json.dumps({"s": {"a": 2.5, "b": 1.0}}))
+        try:
+            # Varios procesos arrancan a la vez con la tabla vacía
+            tablas = [PersistenciaQ().cargar() for _ in range(3)]
+        finally:
+            cache.delete(CLAVE_CACHE_LEGADA)
+
+        assert ValorQ.objects.get(accion="a").valor == 2.5
+        assert ValorQ.objects.count() == 2
+        for tabla in tablas:
+            assert tabla.exportar() == {"s": {"a": 2.5, "b": 1.0}}
+            assert tabla.total_sucios == 0
+
+        # Otro proceso que leyó la tabla vacía antes de la importación
+        PersistenciaQ()._importar_legado({"s": {"a": 2.5}})
+        assert ValorQ.objects.get(accion="a").valor == 2.5
+
+    def test_sistema_carga_perezosa_y_flush(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            sistema = SistemaIA()
+
+        sistema._actualizar_q_value("s", "a", 10.0, "s_completado")
+        sistema.flush()
+
+        assert SistemaIA().q_table.valor("s", "a") == pytest.approx(1.0)
+
+    def test_workers_suman_deltas_y_se_sincronizan(self):
+        ValorQ.objects.create(estado="s", accion="a", valor=10.0)
+        worker_a, worker_b = SistemaIA(), SistemaIA()
+        worker_a._persistencia.intervalo_sincronizacion = 0
+        worker_b._persistencia.intervalo_sincronizacion = 0
+        assert worker_a.q_table.valor("s", "a") == 10.0
+        assert worker_b.q_table.valor("s", "a") == 10.0
+
+        # Ambos aprenden sobre el mismo par a partir del mismo valor
+        worker_a.q_table.asignar("s", "a", 13.0)
+        worker_b.q_table.asignar("s", "a", 8.0)
+        worker_a.flush()
+        worker_b.flush()
+
+        assert ValorQ.objects.get(estado="s", accion="a").valor == 11.0
+        worker_b.q_table.asignar("s", "b", 1.0)
+        assert worker_a.q_table.valor("s", "a") == 11.0
+        # El delta aún no volcado de B se conserva sobre el valor compartido
+        assert worker_b.q_table.valor("s", "b") == 1.0
+        assert worker_b.q_table.valor("s", "a") == 11.0
+        assert worker_a.q_table.valor("s", "b") == 0.0
+
+    def test_reinicio_llega_a_los_demas_workers(self):
+        worker_a, worker_b = SistemaIA(), SistemaIA()
+        worker_b._persistencia.intervalo_sincronizacion = 0
+        worker_a.q_table.asignar("s", "a", 5.0)
+        worker_a.flush()
+        assert worker_b.q_table.valor("s", "a") == 5.0
+
+        # B tiene un delta sin volcar cuando A reinicia
+        worker_b.q_table.asignar("s", "b", 2.0)
+        worker_a.reiniciar_conocimiento()
+        assert worker_b.flush() == 0
+        assert not ValorQ.objects.exists()
+        assert worker_b._q_table.exportar() == {}
+
+        # Sin deltas pendientes: la sincronización también vacía la tabla
+        worker_c = SistemaIA()
+        worker_c._persistencia.intervalo_sincronizacion = 0
+        worker_c.q_table.asignar("s", "c", 1.0)
+        worker_c.flush()
+        assert worker_b.q_table.valor("s", "c") == 1.0
+        worker_a.reiniciar_conocimiento()
+        assert len(worker_b.q_table) == 0
+
+    def test_descarta_claves_que_no_caben(self, caplog):
+        persistencia = PersistenciaQ()
+        tabla = TablaQ()
+        tecnico = "x" * 100
+        tabla.asignar("s", f"tecnico_{tecnico}", 1.0)
+        tabla.asignar("s" * 300, "a", 1.0)
+        tabla.asignar("s", "a", 2.0)
+
+        assert persistencia.flush(tabla) == 2
+        assert tabla.total_sucios == 0
+        assert "descartado" in caplog.text
+        assert ValorQ.objects.get(accion=f"tecnico_{tecnico}").valor == 1.0
+        # Los siguientes volcados no quedan trabados
+        tabla.asignar("s", "a", 3.0)
+        assert persistencia.flush(tabla) == 1
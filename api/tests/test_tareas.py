@@ -0,0 +1,190 @@
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Mantenimiento, Tarea
+from api.servicios import tareas
+from api.servicios.tareas import MAX_INTENTOS, PLAZO_LATIDO, ServicioTareas
+
+
+@pytest.fixture
+def manejadores(monkeypatch):
+    """Manejadores de prueba registrados solo durante el test"""
+    llamadas = []
+
+    def sumar(parametros, contexto):
+        llamadas.append(parametros)
+        contexto.avisar(0.5, "mitad")
+        return {"suma": parametros["a"] + parametros["b"]}
+
+    def cancelable(parametros, contexto):
+        # Alguien pide cancelar mientras corre
+        ServicioTareas.cancelar(contexto.tarea_id)
+        contexto.avisar(0.1)
+        raise AssertionError("avisar() debió cortar la tarea")
+
+    def fallar(parametros, contexto):
+        raise RuntimeError("sin datos")
+
+    monkeypatch.setitem(tareas.MANEJADORES, "sumar", sumar)
+    monkeypatch.setitem(tareas.MANEJADORES, "cancelable", cancelable)
+    monkeypatch.setitem(tareas.MANEJADORES, "fallar", fallar)
+    return llamadas
+
+
+@pytest.mark.django_db
+class TestColaTareas:
+    def test_cada_tarea_la_toma_un_solo_worker(self, manejadores):
+        primera = ServicioTareas.encolar("sumar", {"a": 1, "b": 2})
+        segunda = ServicioTareas.encolar("sumar", {"a": 3, "b": 4})
+
+        assert ServicioTareas.reclamar("w1").pk == primera.pk
+        assert ServicioTareas.reclamar("w2").pk == segunda.pk
+        assert ServicioTareas.reclamar("w3") is None
+
+        tarea = ServicioTareas.ejecutar(Tarea.objects.get(pk=primera.pk))
+        assert tarea.estado == Tarea.ESTADO_COMPLETADA
+        assert tarea.resultado == {"suma": 3}
+        assert (tarea.worker, tarea.progreso, tarea.mensaje) == ("w1", 1.0, "mitad")
+        assert tarea.fecha_inicio <= tarea.fecha_fin
+
+    def test_cancelar_y_fallar(self, manejadores):
+        pendiente = ServicioTareas.encolar("sumar", {"a": 1, "b": 1})
+        cancelable = ServicioTareas.encolar("cancelable")
+        fallida = ServicioTareas.encolar("fallar")
+        assert ServicioTareas.cancelar(pendiente.pk).estado == Tarea.ESTADO_CANCELADA
+
+        salida = StringIO()
+        call_command("procesar_tareas", stdout=salida)
+
+        estados = dict(Tarea.objects.values_list("pk", "estado"))
+        assert estados == {
+            pendiente.pk: Tarea.ESTADO_CANCELADA,
+            cancelable.pk: Tarea.ESTADO_CANCELADA,
+            fallida.pk: Tarea.ESTADO_FALLIDA,
+        }
+        assert Tarea.objects.get(pk=fallida.pk).error == "sin datos"
+        assert manejadores == []
+        assert "2 tareas ejecutadas" in salida.getvalue()
+
+    def test_tipo_desconocido(self):
+        with pytest.raises(ValueError):
+            ServicioTareas.encolar("no_existe")
+
+    def test_endpoints(self, manejadores):
+        cliente = APIClient()
+        respuesta = cliente.post("/api/sistema/ejecutar_automata/")
+        assert respuesta.status_code == 202
+        tarea_id = respuesta.json()["tarea"]["id"]
+        assert respuesta["Location"].endswith(f"/api/tareas/{tarea_id}/")
+
+        otra = ServicioTareas.encolar("sumar", {"a": 1, "b": 1})
+        listado = cliente.get("/api/tareas/", {"tipo": "ejecutar_automata"}).json()
+        assert [t["id"] for t in listado["results"]] == [tarea_id]
+
+        respuesta = cliente.post(f"/api/tareas/{tarea_id}/cancelar/")
+        assert respuesta.json()["estado"] == Tarea.ESTADO_CANCELADA
+        assert cliente.post(f"/api/tareas/{tarea_id}/cancelar/").status_code == 409
+
+        ServicioTareas.procesar_siguiente()
+        tarea = cliente.get(f"/api/tareas/{otra.pk}/").json()
+        assert (tarea["estado"], tarea["resultado"]) == ("completada", {"suma": 2})
+
+    def test_recupera_tareas_de_workers_muertos(self, manejadores):
+        tarea = ServicioTareas.encolar("sumar", {"a": 2, "b": 2})
+        cancelada = ServicioTareas.encolar("sumar", {"a": 0, "b": 0})
+        viva = ServicioTareas.encolar("sumar", {"a": 1, "b": 1})
+        for worker in ("muerto", "muerto", "vivo"):
+            ServicioTareas.reclamar(worker)
+        ServicioTareas.cancelar(cancelada.pk)
+        # El worker "muerto" dejó de latir hace más del plazo
+        viejo = timezone.now() - PLAZO_LATIDO * 2
+        Tarea.objects.filter(worker="muerto").update(latido=viejo)
+
+        recuperada = ServicioTareas.reclamar("nuevo")
+        assert recuperada.pk == tarea.pk
+        assert (recuperada.worker, recuperada.intentos) == ("nuevo", 2)
+        assert Tarea.objects.get(pk=cancelada.pk).estado == Tarea.ESTADO_CANCELADA
+        assert Tarea.objects.get(pk=viva.pk).worker == "vivo"
+        assert ServicioTareas.ejecutar(recuperada).resultado == {"suma": 4}
+
+    def test_falla_tras_max_intentos(self, manejadores):
+        tarea = ServicioTareas.encolar("sumar", {"a": 1, "b": 1})
+        viejo = timezone.now() - PLAZO_LATIDO * 2
+        for intento in range(MAX_INTENTOS):
+            assert ServicioTareas.reclamar(f"w{intento}").pk == tarea.pk
+            Tarea.objects.filter(pk=tarea.pk).update(latido=viejo)
+
+        assert ServicioTareas.reclamar("otro") is None
+        tarea.refresh_from_db()
+        assert tarea.estado == Tarea.ESTADO_FALLIDA
+        assert tarea.fecha_fin is not None and "worker" in tarea.error
+
+    def test_avisar_renueva_el_latido(self, manejadores):
+        tarea = ServicioTareas.encolar("sumar", {"a": 1, "b": 1})
+        ServicioTareas.reclamar("w1")
+        viejo = timezone.now() - PLAZO_LATIDO * 2
+        Tarea.objects.filter(pk=tarea.pk).update(latido=viejo)
+
+        tareas.ContextoTarea(tarea.pk).avisar(0.3)
+        assert ServicioTareas.recuperar_abandonadas() == 0
+        assert Tarea.objects.get(pk=tarea.pk).latido > viejo
+
+    def test_automata_se_cancela_antes_de_escribir(self, monkeypatch):
+        from api.servicios.automata import AnaliticaPredictiva
+
+        tarea = ServicioTareas.encolar("ejecutar_automata")
+
+        def analizar_y_cancelar():
+            # Alguien cancela mientras se analizan los riesgos
+            ServicioTareas.cancelar(tarea.pk)
+            return [{"equipo_id": 1, "nombre": "X", "riesgo": "Crítico"}]
+
+        monkeypatch.setattr(
+            AnaliticaPredictiva, "analizar_riesgo_equipos", analizar_y_cancelar
+        )
+
+        tarea = ServicioTareas.ejecutar(ServicioTareas.reclamar("w1"))
+        assert tarea.estado == Tarea.ESTADO_CANCELADA
+        assert tarea.mensaje == "1 equipos en riesgo crítico"
+        assert not Mantenimiento.objects.exists()
+
+    def test_pipeline_entrena_dentro_de_la_tarea(self, monkeypatch):
+        from django.core import management
+
+        from api.servicios import ia as modulo_ia
+        from api.servicios.ia import ServicioIA
+
+        monkeypatch.setattr(management, "call_command", lambda *a, **k: None)
+        monkeypatch.setattr(modulo_ia.time, "sleep", lambda segundos: None)
+        monkeypatch.setattr(
+            ServicioIA,
+            "iniciar_entrenamiento",
+            lambda **k: pytest.fail("el pipeline no debe lanzar un hilo"),
+        )
+        tarea = ServicioTareas.encolar("pipeline_auto", {"busquedas": 1})
+
+        tarea = ServicioTareas.ejecutar(ServicioTareas.reclamar("w1"))
+        assert tarea.estado == Tarea.ESTADO_COMPLETADA
+        assert "IA entrenada" in tarea.resultado["pasos"]
+        assert ServicioIA._training_state["status"] == "completed"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_latido_en_segundo_plano():
+    """Un manejador que no llama a avisar() igual mantiene viva su tarea"""
+    tarea = Tarea.objects.create(tipo="sumar", estado=Tarea.ESTADO_EN_CURSO)
+    latido = tareas.Latido(tarea.pk, intervalo=0.01)
+    latido.start()
+    try:
+        for _ in range(200):
+            if Tarea.objects.get(pk=tarea.pk).latido is not None:
+                break
+            time.sleep(0.01)
+    finally:
+        latido.detener()
+    assert Tarea.objects.get(pk=tarea.pk).latido is not None
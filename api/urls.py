@@ -7,6 +7,7 @@ from .views import (
     MantenimientoViewSet,
     RecursoViewSet,
     EventoViewSet,
+    TareaViewSet,
     DatabaseExplorerViewSet,
     IADashboardViewSet,
 )
@@ -21,6 +22,9 @@ router.register(r"mantenimientos", MantenimientoViewSet, basename="mantenimiento
 router.register(r"recursos", RecursoViewSet, basename="recurso")
 router.register(r"eventos", EventoViewSet, basename="evento")
 
+# Tareas en segundo plano (las ejecuta manage.py procesar_tareas)
+router.register(r"tareas", TareaViewSet, basename="tarea")
+
 # Dashboard
 router.register(r"db", DatabaseExplorerViewSet, basename="db-explorer")
 
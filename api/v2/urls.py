@@ -34,8 +34,16 @@ def generar_recomendaciones(request):
     """Generar recomendaciones automáticamente"""
     from api.servicios.recomendaciones import motor_recomendaciones
 
-    total = motor_recomendaciones.generar_todas_recomendaciones()
-    return Response({"mensaje": f"{total} recomendaciones generadas", "total": total})
+    resultado = motor_recomendaciones.generar_recomendaciones_lote()
+    total = resultado["total"]
+    return Response(
+        {
+            "mensaje": f"{total} recomendaciones generadas",
+            "total": total,
+            "omitidas": resultado["omitidas"],
+            "tiempos": resultado["tiempos"],
+        }
+    )
 
 
 router = DefaultRouter()
@@ -1,11 +1,27 @@
-from rest_framework import viewsets, status, filters
+from datetime import datetime
+from functools import cache
+
+from rest_framework import viewsets, status, filters, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.apps import apps
-from drf_spectacular.utils import extend_schema
-
-from .models import Equipo, Mantenimiento, Recurso, Evento, DatoEntrenamiento, ModeloIA
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+from .models import (
+    Equipo,
+    Mantenimiento,
+    Recurso,
+    Evento,
+    DatoEntrenamiento,
+    ModeloIA,
+    Tarea,
+)
 from .serializers import (
     EquipoSerializer,
     MantenimientoSerializer,
@@ -13,14 +29,208 @@ from .serializers import (
     EventoSerializer,
     DatoEntrenamientoSerializer,
     ModeloIASerializer,
+    TareaSerializer,
 )
+from .listados import LISTADO_EVENTOS, LISTADO_MANTENIMIENTOS, TAMANO_LOTE, a_json
+from .paginacion import PaginacionKeyset
+from .servicios.tareas import ServicioTareas
+
+
+def _lista(valor) -> list:
+    return [nombre.strip() for nombre in (valor or "").split(",") if nombre.strip()]
+
+
+def _fecha_desde(valor: str):
+    """?since= en ISO 8601 (fecha o fecha y hora; sin zona, la local)"""
+    try:
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            dia = parse_date(valor)
+            fecha = dia and datetime.combine(dia, datetime.min.time())
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValidationError({"since": "Fecha inválida, se espera ISO 8601"})
+    return timezone.make_aware(fecha) if timezone.is_naive(fecha) else fecha
+
+
+@cache
+def _columnas_por_campo(vista, serializer_class) -> dict:
+    """
+    {campo del serializer: columnas que lee}. get_x_display lee x y
+    "equipo.nombre" lee equipo__nombre; None si no se puede saber (un
+    método o propiedad sin declarar en columnas_calculadas).
+    """
+    propios = {campo.name for campo in serializer_class.Meta.model._meta.fields}
+    columnas = {}
+    for nombre, campo in serializer_class().fields.items():
+        if nombre in vista.columnas_calculadas:
+            columnas[nombre] = tuple(vista.columnas_calculadas[nombre])
+            continue
+        fuente = campo.source
+        if fuente.startswith("get_") and fuente.endswith("_display"):
+            fuente = fuente[len("get_") : -len("_display")]
+        if fuente.split(".")[0] in propios:
+            columnas[nombre] = (fuente.replace(".", "__"),)
+        else:
+            columnas[nombre] = None
+    return columnas
 
 
 class BaseViewSet(viewsets.ModelViewSet):
-    """ViewSet base con configuración común"""
+    """
+    ViewSet base con configuración común
+
+    En las lecturas, ?fields=a,b y ?omit=c eligen los campos de la
+    respuesta; el SELECT trae solo las columnas que esos campos leen (más
+    las del orden), así los TextField y JSON que no se piden no salen de
+    la base. Las relaciones que lee el serializer (equipo.nombre) se traen
+    en el mismo SELECT con un JOIN.
+    """
 
     permission_classes = []
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PaginacionKeyset
+    # Columnas de los campos calculados del serializer (propiedades, métodos)
+    columnas_calculadas = {}
+    # ListadoRapido opcional para servir el listado JSON sin el serializer
+    listado_rapido = None
+
+    def _columnas_por_campo(self) -> dict:
+        return _columnas_por_campo(type(self), self.get_serializer_class())
+
+    def campos_pedidos(self):
+        """Campos según ?fields= y ?omit= en el orden del serializer (None: todos)"""
+        request = getattr(self, "request", None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        pedidos = _lista(request.query_params.get("fields"))
+        omitidos = _lista(request.query_params.get("omit"))
+        if not (pedidos or omitidos):
+            return None
+
+        disponibles = list(self._columnas_por_campo())
+        desconocidos = [n for n in (*pedidos, *omitidos) if n not in disponibles]
+        if desconocidos:
+            raise ValidationError(
+                {"fields": f"Campos desconocidos: {', '.join(desconocidos)}"}
+            )
+        return [
+            nombre
+            for nombre in disponibles
+            if (not pedidos or nombre in pedidos) and nombre not in omitidos
+        ]
+
+    def columnas_orden(self, queryset) -> list:
+        """Columnas del orden efectivo: la paginación por cursor las lee"""
+        request = getattr(self, "request", None)
+        orden = request is not None and filters.OrderingFilter().get_ordering(
+            request, queryset, self
+        )
+        orden = orden or queryset.model._meta.ordering
+        return [columna.lstrip("-") for columna in orden]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        por_campo = self._columnas_por_campo()
+        columnas = []
+        for nombre in self.campos_pedidos() or por_campo:
+            if por_campo[nombre] is None:
+                return queryset
+            columnas += por_campo[nombre]
+        columnas += self.columnas_orden(queryset)
+
+        relaciones = sorted({c.split("__")[0] for c in columnas if "__" in c})
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        # La clave foránea de un select_related no puede quedar diferida
+        return queryset.only(*dict.fromkeys([*columnas, *relaciones]))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_pedidos()
+        if campos is not None:
+            destino = getattr(serializer, "child", serializer)
+            for nombre in list(destino.fields):
+                if nombre not in campos:
+                    destino.fields.pop(nombre)
+        return serializer
+
+    def list(self, request, *args, **kwargs):
+        listado = self.listado_rapido
+        # La API navegable y otros formatos siguen por el serializer
+        if listado is None or request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        campos = self.campos_pedidos()
+        if campos is not None:
+            listado = listado.elegir(campos)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = listado.consulta(queryset, orden=self.columnas_orden(queryset))
+        filas = listado.filas(self.paginate_queryset(queryset))
+        datos = self.paginator.get_paginated_response(filas).data
+        return HttpResponse(
+            a_json(datos, libre=listado.libre), content_type="application/json"
+        )
+
+
+class ExportacionMixin:
+    """
+    GET export/: todas las filas en streaming, como NDJSON o CSV
+    (?formato=), sin pasar por la paginación. Se leen con iterator() por
+    bloques y se escriben bloque a bloque, así la memoria no crece con la
+    cantidad de filas. ?since= filtra por `campo_desde`; también valen
+    ?search=, ?fields= y ?omit=. El orden es por id, estable para
+    exportaciones incrementales.
+    """
+
+    campo_desde = None
+    FORMATOS_EXPORTACION = {
+        "ndjson": ("application/x-ndjson", "exportar_ndjson"),
+        "csv": ("text/csv; charset=utf-8", "exportar_csv"),
+    }
+
+    @extend_schema(
+        summary="Exportar en streaming (NDJSON o CSV)",
+        parameters=[
+            OpenApiParameter("formato", str, enum=["ndjson", "csv"]),
+            OpenApiParameter("since", OpenApiTypes.DATETIME),
+        ],
+        responses={
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            (200, "text/csv"): OpenApiTypes.STR,
+        },
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        formato = request.query_params.get("formato", "ndjson")
+        if formato not in self.FORMATOS_EXPORTACION:
+            return Response(
+                {"error": f"Formato no soportado: {formato} (ndjson o csv)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        tipo_contenido, metodo = self.FORMATOS_EXPORTACION[formato]
+
+        listado = self.listado_rapido
+        campos = self.campos_pedidos()
+        if campos is not None:
+            listado = listado.elegir(campos)
+        queryset = self.filter_queryset(self.get_queryset())
+        desde = request.query_params.get("since")
+        if desde:
+            queryset = queryset.filter(
+                **{f"{self.campo_desde}__gte": _fecha_desde(desde)}
+            )
+        tuplas = listado.consulta(queryset.order_by("pk")).iterator(
+            chunk_size=TAMANO_LOTE
+        )
+
+        respuesta = StreamingHttpResponse(
+            getattr(listado, metodo)(tuplas), content_type=tipo_contenido
+        )
+        nombre = queryset.model._meta.verbose_name_plural.lower()
+        respuesta["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+        return respuesta
 
 
 @extend_schema(tags=["Equipos"])
@@ -34,11 +244,13 @@ class EquipoViewSet(BaseViewSet):
 
 
 @extend_schema(tags=["Mantenimiento"])
-class MantenimientoViewSet(BaseViewSet):
+class MantenimientoViewSet(ExportacionMixin, BaseViewSet):
     """Gestión de mantenimientos"""
 
     queryset = Mantenimiento.objects.all()
     serializer_class = MantenimientoSerializer
+    listado_rapido = LISTADO_MANTENIMIENTOS
+    campo_desde = "fecha_creacion"
     search_fields = ["descripcion", "tecnico_asignado"]
     ordering_fields = ["prioridad", "fecha_programada", "estado"]
 
@@ -49,20 +261,53 @@ class RecursoViewSet(BaseViewSet):
 
     queryset = Recurso.objects.all()
     serializer_class = RecursoSerializer
+    columnas_calculadas = {"necesita_reposicion": ["tipo", "stock", "stock_minimo"]}
     search_fields = ["nombre", "especialidad"]
     ordering_fields = ["tipo", "nombre", "calificacion"]
 
 
 @extend_schema(tags=["Eventos"])
-class EventoViewSet(BaseViewSet):
+class EventoViewSet(ExportacionMixin, BaseViewSet):
     """Gestión de eventos del sistema"""
 
     queryset = Evento.objects.all()
     serializer_class = EventoSerializer
+    listado_rapido = LISTADO_EVENTOS
+    campo_desde = "fecha_evento"
     search_fields = ["descripcion"]
     ordering_fields = ["severidad", "fecha_evento", "resuelto"]
 
 
+@extend_schema(tags=["Tareas"])
+class TareaViewSet(viewsets.ReadOnlyModelViewSet):
+    """Tareas en segundo plano: estado, progreso, resultado y cancelación"""
+
+    permission_classes = []
+    serializer_class = TareaSerializer
+    pagination_class = PaginacionKeyset
+
+    def get_queryset(self):
+        tareas = Tarea.objects.all()
+        for campo in ("estado", "tipo"):
+            valor = self.request.query_params.get(campo)
+            if valor:
+                tareas = tareas.filter(**{campo: valor})
+        return tareas
+
+    @extend_schema(summary="Cancelar tarea")
+    @action(detail=True, methods=["post"])
+    def cancelar(self, request, pk=None):
+        """Cancela una pendiente o pide cortar una en curso"""
+        tarea = self.get_object()
+        if tarea.estado in Tarea.ESTADOS_FINALES:
+            return Response(
+                {"error": f"La tarea ya terminó ({tarea.estado})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        tarea = ServicioTareas.cancelar(tarea.pk)
+        return Response(TareaSerializer(tarea).data)
+
+
 @extend_schema(tags=["Dashboard - Explorador de BD"])
 class DatabaseExplorerViewSet(viewsets.ViewSet):
     """Explorador interactivo de base de datos"""
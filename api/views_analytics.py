@@ -2,8 +2,10 @@
 Vistas Analíticas para Consultas Relevantes
 """
 
+import numpy as np
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django.db.models import Count, Avg, Q
 from api.models import (
@@ -21,6 +23,12 @@ from api.models import (
 from django.db.models import Sum
 
 
+class RiesgoNeuronalPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
 class AnalyticsViewSet(viewsets.ViewSet):
     """Vistas analíticas y consultas útiles"""
 
@@ -74,23 +82,20 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def equipos_criticos(self, request):
         """Equipos críticos con mantenimientos pendientes"""
+        # Lectura O(1) por equipo desde EstadisticaEquipo precalculada
         equipos = Equipo.objects.filter(
-            es_critico=True, mantenimientos__estado=1  # 1 = pendiente
-        ).distinct()
+            es_critico=True, estadistica__pendientes__gt=0
+        ).select_related("estadistica")
 
         resultado = []
         for eq in equipos:
-            pendientes = eq.mantenimientos.filter(estado=1).count()  # 1 = pendiente
             resultado.append(
                 {
                     "id": eq.id,
                     "nombre": eq.nombre,
                     "empresa": eq.empresa_nombre,
-                    "mantenimientos_pendientes": pendientes,
-                    "prioridad_maxima": eq.mantenimientos.filter(
-                        estado=1  # 1 = pendiente
-                    ).aggregate(Avg("prioridad"))["prioridad__avg"]
-                    or 0,
+                    "mantenimientos_pendientes": eq.estadistica.pendientes,
+                    "prioridad_maxima": eq.estadistica.prioridad_promedio_pendientes,
                 }
             )
 
@@ -227,7 +232,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def eventos_recientes(self, request):
         """Timeline de eventos"""
-        eventos = Evento.objects.all().order_by("-id")[:20]
+        eventos = Evento.objects.select_related("equipo").order_by("-id")[:20]
         data = [
             {
                 "id": e.id,
@@ -277,6 +282,42 @@ class AnalyticsViewSet(viewsets.ViewSet):
             }
         )
 
+    @action(detail=False, methods=["get"])
+    def riesgo_neuronal(self, request):
+        """Riesgo de falla de toda la flota según la red Cortex (paginado)"""
+        from api.servicios.cortex_service import CortexService
+
+        try:
+            min_score = float(request.query_params.get("min_score", 0))
+        except ValueError:
+            return Response(
+                {"error": "min_score debe ser numérico"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ids, scores = CortexService.ranking_riesgo_neuronal()
+        # Scores descendentes: los que cumplen el mínimo son un prefijo
+        hasta = int(np.searchsorted(-scores, -min_score, side="right"))
+
+        paginador = RiesgoNeuronalPagination()
+        pagina = paginador.paginate_queryset(np.arange(hasta), request, view=self)
+        nombres = dict(
+            Equipo.objects.filter(id__in=[int(ids[i]) for i in pagina]).values_list(
+                "id", "nombre"
+            )
+        )
+
+        return paginador.get_paginated_response(
+            [
+                {
+                    "equipo_id": int(ids[i]),
+                    "nombre": nombres.get(int(ids[i])),
+                    "score": round(float(scores[i]), 4),
+                }
+                for i in pagina
+            ]
+        )
+
     @action(detail=False, methods=["get"])
     def analitica_inventario(self, request):
         """Optimización de stock e inventario inteligente"""
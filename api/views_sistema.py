@@ -1,15 +1,121 @@
+import json
 import logging
+
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 
 from api.servicios.ia_core import ia_sistema
-from api.models import Mantenimiento, Recurso
+from api.models import Mantenimiento
+from api.serializers import TareaSerializer
+from api.servicios.tareas import ServicioTareas
 
 logger = logging.getLogger(__name__)
 
 
+def _tecnico_a_dict(tecnico, confianza):
+    return {
+        "tecnico_id": tecnico.id,
+        "tecnico_nombre": tecnico.nombre,
+        "especialidad": tecnico.especialidad,
+        "calificacion": tecnico.calificacion,
+        "confianza": confianza,
+    }
+
+
+def _encolar(request, tipo, parametros, mensaje):
+    """Encola la tarea y responde 202 con la URL para seguirla"""
+    tarea = ServicioTareas.encolar(tipo, parametros)
+    url = request.build_absolute_uri(reverse("tarea-detail", args=[tarea.pk]))
+    return Response(
+        {"mensaje": mensaje, "tarea": TareaSerializer(tarea).data, "url": url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url},
+    )
+
+
+# Decisiones por bloque: la respuesta empieza a salir antes de terminar
+MAX_DECISIONES_LOTE = 10_000
+BLOQUE_DECISIONES = 500
+# Alternativas de técnico que se pueden pedir por decisión
+MAX_TOP_K = 20
+ERROR_TOP_K = f"top_k debe ser un entero entre 1 y {MAX_TOP_K}"
+
+
+def _leer_top_k(datos):
+    """top_k del body (3 si no viene); None si no es un entero en rango"""
+    if not isinstance(datos, dict) or "top_k" not in datos:
+        return 3
+    valor = datos["top_k"]
+    if valor is None or isinstance(valor, bool):
+        return None
+    try:
+        top_k = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return top_k if 1 <= top_k <= MAX_TOP_K else None
+
+
+def _lineas_decisiones(decisiones, mantenimientos, top_k):
+    """Genera las lineas NDJSON de decidir_lote, bloque a bloque"""
+    for inicio in range(0, len(decisiones), BLOQUE_DECISIONES):
+        fin = inicio + BLOQUE_DECISIONES
+        bloque = list(enumerate(decisiones[inicio:fin], inicio))
+        resultados = {}
+
+        prioridad = [(i, d) for i, d in bloque if d.get("tipo") == "prioridad"]
+        if prioridad:
+            decididas = ia_sistema.decidir_prioridades_lote(
+                [str(d.get("descripcion") or "") for _, d in prioridad],
+                [
+                    d["contexto"] if isinstance(d.get("contexto"), dict) else {}
+                    for _, d in prioridad
+                ],
+            )
+            for (i, _), valor in zip(prioridad, decididas, strict=True):
+                resultados[i] = {"tipo": "prioridad", "decision": valor}
+
+        tecnico = []
+        for i, d in bloque:
+            if d.get("tipo") != "tecnico":
+                continue
+            try:
+                mantenimiento = mantenimientos.get(int(d.get("mantenimiento_id")))
+            except (TypeError, ValueError):
+                mantenimiento = None
+            if mantenimiento is None:
+                resultados[i] = {"error": "Mantenimiento no encontrado"}
+            else:
+                tecnico.append((i, mantenimiento, d.get("especialidad")))
+        if tecnico:
+            decididas = ia_sistema.decidir_tecnicos_lote(
+                [m for _, m, _ in tecnico], [e for _, _, e in tecnico], top_k=top_k
+            )
+            for (i, _, _), decision in zip(tecnico, decididas, strict=True):
+                if decision is None:
+                    resultados[i] = {"error": "No hay tecnicos disponibles"}
+                    continue
+                resultados[i] = {
+                    "tipo": "tecnico",
+                    "decision": _tecnico_a_dict(
+                        decision["tecnico"], decision["confianza"]
+                    ),
+                    "alternativas": [
+                        _tecnico_a_dict(alt["tecnico"], alt["confianza"])
+                        for alt in decision["alternativas"]
+                    ],
+                }
+
+        for i, d in bloque:
+            resultado = resultados.get(i) or {
+                "error": f'Tipo de decision "{d.get("tipo")}" no soportado'
+            }
+            yield json.dumps({"indice": i, **resultado}) + "\n"
+
+
 @extend_schema(tags=["Sistema Inteligente"])
 class SistemaInteligenteViewSet(viewsets.ViewSet):
     """
@@ -38,7 +144,9 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
                 "tipo": "preventivo",
                 "prioridad": 100
             },
-            "mantenimiento_id": 123  // Para decision de tecnico
+            "mantenimiento_id": 123,  // Para decision de tecnico
+            "especialidad": "electrica",  // Opcional (tecnico)
+            "top_k": 3  // Alternativas a devolver (tecnico)
         }
         """
         tipo = request.data.get("tipo")
@@ -68,26 +176,35 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
                     {"error": "mantenimiento_id requerido para decision de tecnico"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            top_k = _leer_top_k(request.data)
+            if top_k is None:
+                return Response(
+                    {"error": ERROR_TOP_K}, status=status.HTTP_400_BAD_REQUEST
+                )
 
             try:
-                mantenimiento = Mantenimiento.objects.get(id=mantenimiento_id)
-                tecnicos = Recurso.objects.filter(
-                    tipo=Recurso.TIPO_TECNICO, disponible=True
+                mantenimiento = Mantenimiento.objects.select_related("equipo").get(
+                    id=mantenimiento_id
                 )
 
-                decision = ia_sistema.decidir_tecnico(mantenimiento, list(tecnicos))
+                # Técnicos disponibles desde el índice en memoria
+                decision = ia_sistema.decidir_tecnico(
+                    mantenimiento,
+                    especialidad=request.data.get("especialidad"),
+                    top_k=top_k,
+                )
 
                 if decision:
                     return Response(
                         {
                             "tipo": "tecnico",
-                            "decision": {
-                                "tecnico_id": decision["tecnico"].id,
-                                "tecnico_nombre": decision["tecnico"].nombre,
-                                "especialidad": decision["tecnico"].especialidad,
-                                "calificacion": decision["tecnico"].calificacion,
-                                "confianza": decision["confianza"],
-                            },
+                            "decision": _tecnico_a_dict(
+                                decision["tecnico"], decision["confianza"]
+                            ),
+                            "alternativas": [
+                                _tecnico_a_dict(alt["tecnico"], alt["confianza"])
+                                for alt in decision["alternativas"]
+                            ],
                             "metodo": "RL basado en experiencia",
                         }
                     )
@@ -108,14 +225,72 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @extend_schema(
+        summary="Tomar decisiones en lote",
+        description=(
+            "Misma entrada que decidir, pero una lista. Responde JSON lines "
+            "(application/x-ndjson), una linea por decision en el mismo orden"
+        ),
+    )
+    @action(detail=False, methods=["post"])
+    def decidir_lote(self, request):
+        """
+        Toma muchas decisiones en una sola request
+
+        Body: [ {"tipo": "prioridad", "descripcion": "...", "contexto": {...}},
+                {"tipo": "tecnico", "mantenimiento_id": 123, "especialidad": "..."},
+                ... ]
+        (o {"decisiones": [...], "top_k": 3})
+
+        Respuesta (una linea por decision):
+        {"indice": 0, "tipo": "prioridad", "decision": 100}
+        {"indice": 1, "tipo": "tecnico", "decision": {...}, "alternativas": [...]}
+        {"indice": 2, "error": "Mantenimiento no encontrado"}
+        """
+        datos = request.data
+        decisiones = datos if isinstance(datos, list) else datos.get("decisiones")
+        if not isinstance(decisiones, list) or not all(
+            isinstance(d, dict) for d in decisiones
+        ):
+            return Response(
+                {"error": "Se esperaba una lista de decisiones"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(decisiones) > MAX_DECISIONES_LOTE:
+            return Response(
+                {"error": f"Maximo {MAX_DECISIONES_LOTE} decisiones por lote"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        top_k = _leer_top_k(datos)
+        if top_k is None:
+            return Response({"error": ERROR_TOP_K}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Una consulta para todos los mantenimientos referenciados
+        ids = set()
+        for d in decisiones:
+            if d.get("tipo") == "tecnico":
+                try:
+                    ids.add(int(d.get("mantenimiento_id")))
+                except (TypeError, ValueError):
+                    pass
+        mantenimientos = Mantenimiento.objects.select_related("equipo").in_bulk(ids)
+
+        return StreamingHttpResponse(
+            _lineas_decisiones(decisiones, mantenimientos, top_k),
+            content_type="application/x-ndjson",
+        )
+
     @extend_schema(
         summary="Registrar aprendizaje",
-        description="Aprende de un resultado para mejorar futuras decisiones",
+        description=(
+            "Encola un resultado en el buffer de experiencias; el comando "
+            "procesar_experiencias lo aplica a la Q-table"
+        ),
     )
     @action(detail=False, methods=["post"])
     def aprender(self, request):
         """
-        Aprende de un resultado
+        Registra un resultado para aprender de él (respuesta 202)
 
         Body:
         {
@@ -138,17 +313,27 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
             )
 
         try:
-            mantenimiento = Mantenimiento.objects.get(id=mantenimiento_id)
+            mantenimiento = Mantenimiento.objects.select_related("equipo").get(
+                id=mantenimiento_id
+            )
 
-            # Aprender del resultado
-            aprendizaje = ia_sistema.aprender_de_resultado(mantenimiento, resultado)
+            # Solo encola: la Q-table se actualiza con procesar_experiencias
+            try:
+                aprendizaje = ia_sistema.registrar_experiencia(
+                    mantenimiento, resultado
+                )
+            except ValueError as e:
+                return Response(
+                    {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                )
 
             return Response(
                 {
-                    "mensaje": "Sistema aprendio de la experiencia",
+                    "mensaje": "Experiencia registrada para aprendizaje",
                     "aprendizaje": aprendizaje,
                     "precision_sistema": aprendizaje["precision_sistema"],
-                }
+                },
+                status=status.HTTP_202_ACCEPTED,
             )
 
         except Mantenimiento.DoesNotExist:
@@ -234,7 +419,7 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
 
         return Response(
             {
-                "q_table": ia_sistema.q_table,
+                "q_table": ia_sistema.exportar_q_table(),
                 "metricas": ia_sistema.metricas,
                 "configuracion": stats["configuracion"],
                 "total_conocimiento": {
@@ -255,41 +440,18 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["post"])
     def generar_datos(self, request):
         """
-        Genera datos automaticamente
+        Genera datos automaticamente (tarea en segundo plano, responde 202)
 
         Body: {"cantidad": 50}
         """
-        from django.core.management import call_command
-        from io import StringIO
-        import sys
-
         cantidad = request.data.get("cantidad", 50)
 
-        try:
-            output = StringIO()
-            sys.stdout = output
-            call_command("generar_datos", cantidad=cantidad)
-            sys.stdout = sys.__stdout__
-
-            from api.models import Equipo, Mantenimiento
-
-            return Response(
-                {
-                    "mensaje": f"{cantidad} registros generados exitosamente",
-                    "cantidad": cantidad,
-                    "totales": {
-                        "equipos": Equipo.objects.count(),
-                        "mantenimientos": Mantenimiento.objects.count(),
-                    },
-                }
-            )
-        except Exception as e:
-            sys.stdout = sys.__stdout__
-            logger.exception("Error al generar datos automaticamente: %s", e)
-            return Response(
-                {"error": "Ha ocurrido un error interno."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return _encolar(
+            request,
+            "generar_datos",
+            {"cantidad": cantidad},
+            f"Generacion de {cantidad} registros encolada",
+        )
 
     @extend_schema(
         summary="Pipeline automatico completo",
@@ -298,7 +460,7 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["post"])
     def pipeline_auto(self, request):
         """
-        Pipeline completo: scraping + datos + IA
+        Pipeline completo: scraping + datos + IA (tarea en segundo plano)
 
         Body: {
             "busquedas": 5,
@@ -306,52 +468,16 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
             "entrenar": true
         }
         """
-        from django.core.management import call_command
-        from io import StringIO
-        import sys
-
-        busquedas = request.data.get("busquedas", 5)
-        generar = request.data.get("generar", 30)
-        entrenar = request.data.get("entrenar", True)
-
-        resultados = []
-
-        try:
-            # Web scraping + generacion
-            output = StringIO()
-            sys.stdout = output
-            call_command("aprender_web", busquedas=busquedas, generar=generar)
-            sys.stdout = sys.__stdout__
-            resultados.append(f"Web scraping: {busquedas} busquedas")
-            resultados.append(f"Datos generados: {generar}")
-
-            # Entrenar IA
-            if entrenar:
-                from api.servicios import ServicioIA
-
-                ServicioIA.iniciar_entrenamiento(epochs=5, n_samples=50)
-                resultados.append("IA entrenada")
-
-            from api.models import Equipo, Mantenimiento
-
-            return Response(
-                {
-                    "mensaje": "Pipeline completado exitosamente",
-                    "pasos": resultados,
-                    "totales": {
-                        "equipos": Equipo.objects.count(),
-                        "mantenimientos": Mantenimiento.objects.count(),
-                    },
-                }
-            )
-
-        except Exception as e:
-            sys.stdout = sys.__stdout__
-            logger.exception("Error en pipeline automatico completo: %s", e)
-            return Response(
-                {"error": "Ha ocurrido un error interno."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return _encolar(
+            request,
+            "pipeline_auto",
+            {
+                "busquedas": request.data.get("busquedas", 5),
+                "generar": request.data.get("generar", 30),
+                "entrenar": request.data.get("entrenar", True),
+            },
+            "Pipeline automatico encolado",
+        )
 
     @action(detail=False, methods=["post"])
     def generar_datos_prueba(self, request):
@@ -646,52 +772,34 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=["post"])
     def entrenar(self, request):
-        """Entrena el sistema IA con los datos actuales"""
-        try:
-            # Entrenar con todos los mantenimientos completados
-            mantenimientos = Mantenimiento.objects.filter(
-                estado=4
-            )  # 4 = completado (ESTADO_COMPLETADO)
-
-            if mantenimientos.count() == 0:
-                return Response(
-                    {
-                        "mensaje": "No hay mantenimientos completados para entrenar",
-                        "entrenados": 0,
-                    }
-                )
+        """
+        Entrena el sistema IA con todos los mantenimientos completados
 
-            entrenados = 0
-            from api.servicios.ia_core import ia_sistema
+        Se ejecuta como tarea en segundo plano (responde 202); el avance
+        se consulta en /tareas/{id}/.
 
-            for mant in mantenimientos:
-                try:
-                    # Datos para aprendizaje
-                    dias = (mant.fecha_completada - mant.fecha_programada).days
-                    resultado = {
-                        "fue_exitoso": True,
-                        "dias_resolucion": max(1, dias),
-                        "costo_real": float(mant.costo),
-                        "costo_esperado": float(mant.costo) * 1.1,  # Estimación
-                    }
-
-                    # Entrenar IA
-                    ia_sistema.aprender_de_resultado(mant, resultado)
-                    entrenados += 1
-                except Exception:
-                    pass
-
-            return Response(
-                {
-                    "mensaje": f"IA entrenada con {entrenados} mantenimientos (Estado: COMPLETADO)",
-                    "entrenados": entrenados,
-                }
-            )
-        except Exception as e:
+        Body (opcional):
+        {
+            "barridos": 1  // pasadas sobre el historial
+        }
+        """
+        try:
+            barridos = int(request.data.get("barridos", 1))
+        except (TypeError, ValueError):
+            barridos = 0
+        if barridos < 1:
             return Response(
-                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": "barridos debe ser un entero positivo"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        return _encolar(
+            request,
+            "entrenar_q",
+            {"barridos": barridos},
+            "Entrenamiento de la IA encolado",
+        )
+
     @action(detail=False, methods=["post"])
     def aprender_web(self, request):
         """Dispara proceso de aprendizaje web"""
@@ -714,15 +822,11 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
             else:
                 tema = temas.get(int(categoria_id), temas[0])
 
-            from api.servicios.ia_core import ia_sistema
-
-            resultados = ia_sistema.aprender_de_web(tema, max_resultados=3)
-
-            return Response(
-                {
-                    "mensaje": f"Aprendizaje completado sobre: {tema}",
-                    "resultados": resultados,
-                }
+            return _encolar(
+                request,
+                "aprender_web",
+                {"tema": tema, "max_resultados": 3},
+                f"Aprendizaje encolado sobre: {tema}",
             )
 
         except Exception as e:
@@ -750,14 +854,8 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=["post"])
     def ejecutar_automata(self, request):
-        """Ejecuta el ciclo de autómata (acciones autónomas)"""
-        try:
-            from api.servicios.automata import AutomataInteligente
-
-            resultado = AutomataInteligente.ejecutar_ciclo_autonomo()
-            return Response(resultado)
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
+        """Ejecuta el ciclo de autómata (tarea en segundo plano)"""
+        return _encolar(request, "ejecutar_automata", {}, "Ciclo del automata encolado")
 
     @action(detail=False, methods=["post"])
     def chat_ia(self, request):
@@ -773,17 +871,17 @@ class SistemaInteligenteViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=["post"])
     def entrenar_cortex(self, request):
-        """Entrena la Red Neuronal con historial real"""
+        """Entrena la Red Neuronal con historial real (tarea en segundo plano)"""
         try:
-            from api.servicios.cortex_service import CortexService
-
-            loss = CortexService.entrenar_con_historia()
+            epocas = int(request.data.get("epocas", 1))
+        except (TypeError, ValueError):
             return Response(
-                {
-                    "mensaje": "Núcleo Cortex re-calibrado",
-                    "loss_final": f"{loss:.4f}",
-                    "estado": "Red Neuronal Operativa",
-                }
+                {"error": "epocas debe ser un entero"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
+        return _encolar(
+            request,
+            "entrenar_cortex",
+            {"epocas": epocas},
+            "Entrenamiento Cortex encolado",
+        )
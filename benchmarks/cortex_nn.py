@@ -0,0 +1,61 @@
+"""
+Benchmark de entrenamiento CortexNN: motor NumPy vs Python puro
+
+Uso:
+    python benchmarks/cortex_nn.py --muestras 5000 --epocas 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.cortex.neural_net import (  # noqa: E402
+    NUMPY_AVAILABLE,
+    NumpyCortexNN,
+    PurePythonCortexNN,
+)
+
+
+def _dataset(muestras, entradas):
+    inputs = [[random.random() for _ in range(entradas)] for _ in range(muestras)]
+    targets = [[1.0 if sum(x) > entradas / 2 else 0.0] for x in inputs]
+    return inputs, targets
+
+
+def _medir(clase, inputs, targets, epocas, batch_size):
+    nn = clase(input_size=len(inputs[0]), hidden_size=5, output_size=1)
+    inicio = time.perf_counter()
+    loss = nn.train_batch(inputs, targets, batch_size=batch_size, epochs=epocas)
+    duracion = time.perf_counter() - inicio
+    return len(inputs) * epocas / duracion, loss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--muestras", type=int, default=5000)
+    parser.add_argument("--entradas", type=int, default=3)
+    parser.add_argument("--epocas", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    inputs, targets = _dataset(args.muestras, args.entradas)
+    motores = [("python", PurePythonCortexNN)]
+    if NUMPY_AVAILABLE:
+        motores.append(("numpy", NumpyCortexNN))
+
+    resultados = {}
+    for nombre, clase in motores:
+        ritmo, loss = _medir(clase, inputs, targets, args.epocas, args.batch_size)
+        resultados[nombre] = ritmo
+        print(f"{nombre:>7}: {ritmo:12,.0f} muestras/s  (loss {loss:.4f})")
+
+    if "numpy" in resultados:
+        print(f"speedup: {resultados['numpy'] / resultados['python']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark de cálculo de prioridad: Python vs extensión Rust (k_ia)
+
+Uso:
+    python benchmarks/prioridad.py --textos 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.constants import PALABRAS_CLAVE_PRIORIDAD  # noqa: E402
+from api.servicios.prioridad import (  # noqa: E402
+    RUST_AVAILABLE,
+    MatcherPrioridad,
+    matcher_prioridad,
+    normalizar_texto,
+)
+
+RELLENO = "bomba motor válvula sala norte revisar turno equipo línea presión".split()
+
+
+def _textos(cantidad):
+    palabras = [p for lista in PALABRAS_CLAVE_PRIORIDAD.values() for p, _ in lista]
+    vocabulario = RELLENO + palabras + ["CRÍTICO", "Revisión"]
+    return [" ".join(random.choices(vocabulario, k=12)) for _ in range(cantidad)]
+
+
+def _medir(nombre, funcion, textos):
+    inicio = time.perf_counter()
+    resultado = funcion(textos)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:>14}: {len(textos) / duracion:12,.0f} textos/s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--textos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    textos = _textos(args.textos)
+    python = MatcherPrioridad()
+    esperado = _medir("python", python.calcular_lote, textos)
+
+    if RUST_AVAILABLE:
+        from k_ia import calc_p_rust
+
+        por_texto = _medir(
+            "rust por texto",
+            lambda ts: [calc_p_rust(normalizar_texto(t)) for t in ts],
+            textos,
+        )
+        lote = _medir("rust lote", matcher_prioridad.calcular_lote, textos)
+        assert por_texto == lote == esperado, "Rust y Python difieren"
+    else:
+        print("k_ia no compilado: solo ruta Python (maturin develop en k_ia/)")
+
+
+if __name__ == "__main__":
+    main()
@@ -145,6 +145,24 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "core/static"]
 
+# Pesos publicados de la red Cortex (compartidos por los workers vía mmap)
+CORTEX_WEIGHTS_PATH = os.getenv(
+    "CORTEX_WEIGHTS_PATH", str(BASE_DIR / "modelos" / "cortex_pesos.npy")
+)
+
+# Buffer circular de experiencias del aprendizaje diferido (SistemaIA)
+IA_EXPERIENCIAS_PATH = os.getenv(
+    "IA_EXPERIENCIAS_PATH", str(BASE_DIR / "modelos" / "experiencias.buf")
+)
+
+# Caché HTTP en disco del scraping (cuerpos comprimidos, LRU por tamaño)
+IA_CACHE_HTTP_DIR = os.getenv(
+    "IA_CACHE_HTTP_DIR", str(BASE_DIR / "modelos" / "cache_http")
+)
+IA_CACHE_HTTP_MAX_BYTES = int(os.getenv("IA_CACHE_HTTP_MAX_BYTES", 64 * 1024 * 1024))
+# Segundos que una página se usa sin revalidar
+IA_CACHE_HTTP_TTL = float(os.getenv("IA_CACHE_HTTP_TTL", 6 * 3600))
+
 # Clave Primaria Defecto
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -185,22 +185,30 @@ async function loadRecentRecommendations() {
     }
 }
 
+// Primera página de un listado paginado por cursor (sin COUNT: "100+" si hay más)
+async function primeraPagina(url, tamano = 100) {
+    const data = await fetch(`${url}?page_size=${tamano}`).then(r => r.json());
+    const filas = data.results;
+    filas.etiqueta = data.next ? `${filas.length}+` : `${filas.length}`;
+    return filas;
+}
+
 async function loadDatabase() {
     const [equipos, mantenimientos, recursos, eventos] = await Promise.all([
-        fetch('/api/equipos/').then(r => r.json()),
-        fetch('/api/mantenimientos/').then(r => r.json()),
-        fetch('/api/recursos/').then(r => r.json()),
-        fetch('/api/eventos/').then(r => r.json())
+        primeraPagina('/api/equipos/'),
+        primeraPagina('/api/mantenimientos/'),
+        primeraPagina('/api/recursos/'),
+        primeraPagina('/api/eventos/')
     ]);
 
     const html = `
         <h2 class="section-title">Visor de Base de Datos</h2>
         
         <div class="sub-tabs">
-            <button id="tab-btn-equipos" class="sub-tab active" onclick="showDbTab('equipos')">Equipos (${equipos.length})</button>
-            <button id="tab-btn-mantenimientos" class="sub-tab" onclick="showDbTab('mantenimientos')">Mantenimientos (${mantenimientos.length})</button>
-            <button id="tab-btn-recursos" class="sub-tab" onclick="showDbTab('recursos')">Recursos (${recursos.length})</button>
-            <button id="tab-btn-eventos" class="sub-tab" onclick="showDbTab('eventos')">Eventos (${eventos.length})</button>
+            <button id="tab-btn-equipos" class="sub-tab active" onclick="showDbTab('equipos')">Equipos (${equipos.etiqueta})</button>
+            <button id="tab-btn-mantenimientos" class="sub-tab" onclick="showDbTab('mantenimientos')">Mantenimientos (${mantenimientos.etiqueta})</button>
+            <button id="tab-btn-recursos" class="sub-tab" onclick="showDbTab('recursos')">Recursos (${recursos.etiqueta})</button>
+            <button id="tab-btn-eventos" class="sub-tab" onclick="showDbTab('eventos')">Eventos (${eventos.etiqueta})</button>
         </div>
 
         <div id="view-equipos" class="db-view">
@@ -712,11 +720,11 @@ async function scrapearCustomViz() {
     pStep1.replaceChildren(loadingDiv);
 
     // Call existing
-    await fetch('/api/sistema/aprender_web/', {
+    await esperarTarea(await fetch('/api/sistema/aprender_web/', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ prompt: prompt })
-    });
+    }));
 
     loadVisualizer(); // Reload to show new knowledge in Step 2
 }
@@ -755,6 +763,21 @@ async function previewDataGenerationViz() {
 }
 
 
+// Las acciones pesadas responden 202 con una tarea: esperar su resultado
+async function esperarTarea(response, intervalo = 1000) {
+    const data = await response.json();
+    if (response.status !== 202) return data;
+    let tarea = data.tarea;
+    while (!['completada', 'fallida', 'cancelada'].includes(tarea.estado)) {
+        await new Promise(resolve => setTimeout(resolve, intervalo));
+        tarea = await (await fetch(data.url)).json();
+    }
+    if (tarea.estado !== 'completada') {
+        throw new Error(tarea.error || `Tarea ${tarea.estado}`);
+    }
+    return tarea.resultado;
+}
+
 async function generarDatos(cantidad) {
     if (confirm(`Generar ${cantidad} datos aleatorios ? `)) {
         try {
@@ -776,6 +799,7 @@ async function entrenarIA() {
     if (confirm('Entrenar IA con datos actuales?')) {
         try {
             const response = await fetch('/api/sistema/entrenar/', { method: 'POST' });
+            await esperarTarea(response);
             alert('IA entrenada exitosamente');
             loadTabContent(currentTab);
         } catch (error) {
@@ -834,7 +858,7 @@ async function scrapearCategoria(categoria) {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ categoria })
             });
-            const result = await response.json();
+            const result = await esperarTarea(response);
 
             alert(`Aprendizaje completado: ${result.mensaje} \nResultados: ${result.resultados.resultados_encontrados} `);
             loadTabContent(currentTab);
@@ -863,7 +887,7 @@ async function scrapearCustom() {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ prompt: prompt })
             });
-            const result = await response.json();
+            const result = await esperarTarea(response);
 
             alert(`Investigación completa.\nEncontrados: ${result.resultados.resultados_encontrados} \nGuardados: ${result.resultados.conocimientos_guardados} `);
 
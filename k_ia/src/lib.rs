@@ -1,28 +1,75 @@
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
 use pyo3::prelude::*;
 use pyo3::types::{PyDict, PyString};
+use std::sync::{Arc, RwLock};
+
+mod prioridad;
+
+use prioridad::MatcherPrioridad;
+
+static MATCHER: RwLock<Option<Arc<MatcherPrioridad>>> = RwLock::new(None);
+
+fn matcher_actual() -> Option<Arc<MatcherPrioridad>> {
+    MATCHER.read().ok().and_then(|m| m.clone())
+}
 
 /// Heurística Bitwise (Rust Speed) - ORIGINAL
+/// Pesos y umbrales sincronizados con PALABRAS_CLAVE_PRIORIDAD (api/constants.py).
+/// Python pasa el texto ya normalizado (sin tildes) con prioridad.normalizar_texto.
 #[pyfunction]
 fn calc_p_rust(texto: &str) -> PyResult<i32> {
+    if let Some(matcher) = matcher_actual() {
+        return Ok(matcher.prioridad(texto));
+    }
+
     let t = texto.to_lowercase();
     let mut p_al = 0;
     
     // Keywords (Hardcoded for raw speed)
     if t.contains("fuego") { p_al += 50; }
     if t.contains("critico") { p_al += 40; }
-    if t.contains("urgente") { p_al += 35; }
-    if t.contains("falla") { p_al += 30; }
+    if t.contains("urgente") { p_al += 45; }
+    if t.contains("falla") { p_al += 35; }
     if t.contains("peligro") { p_al += 45; }
+    if t.contains("ruido") { p_al += 20; }
+    if t.contains("ajuste") { p_al += 10; }
+    if t.contains("revision") { p_al += 15; }
     
     if p_al >= 30 {
-        Ok(100) // PRIORIDAD_ALTA
-    } else if p_al >= 15 {
-        Ok(50)  // PRIORIDAD_MEDIA
+        Ok(100) // PRIORIDAD_ALTA (UMBRAL_PRIORIDAD_ALTA)
+    } else if p_al >= 20 {
+        Ok(50)  // PRIORIDAD_MEDIA (UMBRAL_PRIORIDAD_MEDIA)
     } else {
         Ok(10)  // PRIORIDAD_BAJA
     }
 }
 
+/// Compila el automata de prioridad con las palabras y pesos de Python.
+/// niveles = (PRIORIDAD_ALTA, PRIORIDAD_MEDIA, PRIORIDAD_BAJA)
+#[pyfunction]
+fn configurar_prioridad(
+    palabras: Vec<(String, i32)>,
+    umbral_alta: i32,
+    umbral_media: i32,
+    niveles: (i32, i32, i32),
+) -> PyResult<()> {
+    let matcher = MatcherPrioridad::nuevo(&palabras, umbral_alta, umbral_media, niveles)
+        .map_err(|e| PyValueError::new_err(e.to_string()))?;
+    *MATCHER
+        .write()
+        .map_err(|_| PyRuntimeError::new_err("matcher de prioridad inconsistente"))? =
+        Some(Arc::new(matcher));
+    Ok(())
+}
+
+/// Prioridad de muchos textos en una sola llamada, sin el GIL
+#[pyfunction]
+fn calc_p_batch(py: Python<'_>, textos: Vec<String>) -> PyResult<Vec<i32>> {
+    let matcher = matcher_actual()
+        .ok_or_else(|| PyRuntimeError::new_err("llamar primero a configurar_prioridad"))?;
+    Ok(py.allow_threads(move || textos.iter().map(|t| matcher.prioridad(t)).collect()))
+}
+
 /// NUEVO: Actualiza Q-value usando la fórmula de Q-Learning
 /// Q(s,a) ← Q(s,a) + α[r + γ max Q(s',a') - Q(s,a)]
 #[pyfunction]
@@ -125,6 +172,8 @@ fn epsilon_greedy_select(q_values: Vec<f64>, epsilon: f64, random_val: f64) -> P
 fn k_ia(_py: Python, m: &PyModule) -> PyResult<()> {
     // Función original
     m.add_function(wrap_pyfunction!(calc_p_rust, m)?)?;
+    m.add_function(wrap_pyfunction!(configurar_prioridad, m)?)?;
+    m.add_function(wrap_pyfunction!(calc_p_batch, m)?)?;
     
     // Nuevas funciones de RL
     m.add_function(wrap_pyfunction!(update_q_value, m)?)?;
@@ -0,0 +1,108 @@
+//! Matcher de prioridad sin dependencias de Python (probado con `cargo test`)
+
+use aho_corasick::{AhoCorasick, BuildError};
+
+/// Automata de palabras clave con pesos configurados desde Python
+/// (PALABRAS_CLAVE_PRIORIDAD). Los textos llegan ya normalizados.
+pub struct MatcherPrioridad {
+    automata: AhoCorasick,
+    pesos: Vec<i32>,
+    umbral_alta: i32,
+    umbral_media: i32,
+    niveles: (i32, i32, i32),
+}
+
+impl MatcherPrioridad {
+    /// niveles = (PRIORIDAD_ALTA, PRIORIDAD_MEDIA, PRIORIDAD_BAJA)
+    pub fn nuevo(
+        palabras: &[(String, i32)],
+        umbral_alta: i32,
+        umbral_media: i32,
+        niveles: (i32, i32, i32),
+    ) -> Result<Self, BuildError> {
+        Ok(MatcherPrioridad {
+            automata: AhoCorasick::new(palabras.iter().map(|(p, _)| p))?,
+            pesos: palabras.iter().map(|(_, w)| *w).collect(),
+            umbral_alta,
+            umbral_media,
+            niveles,
+        })
+    }
+
+    /// Suma el peso de cada palabra presente una sola vez (= `palabra in texto`)
+    pub fn puntaje(&self, texto: &str) -> i32 {
+        let mut vistas = vec![false; self.pesos.len()];
+        let mut total = 0;
+        for m in self.automata.find_overlapping_iter(texto) {
+            let i = m.pattern().as_usize();
+            if !vistas[i] {
+                vistas[i] = true;
+                total += self.pesos[i];
+            }
+        }
+        total
+    }
+
+    pub fn prioridad(&self, texto: &str) -> i32 {
+        let p_al = self.puntaje(texto);
+        let (alta, media, baja) = self.niveles;
+        if p_al >= self.umbral_alta {
+            alta
+        } else if p_al >= self.umbral_media {
+            media
+        } else {
+            baja
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn matcher() -> MatcherPrioridad {
+        let palabras: Vec<(String, i32)> = [
+            ("fuego", 50),
+            ("critico", 40),
+            ("urgente", 45),
+            ("falla", 35),
+            ("peligro", 45),
+            ("ruido", 20),
+            ("ajuste", 10),
+            ("revision", 15),
+        ]
+        .iter()
+        .map(|(p, w)| (p.to_string(), *w))
+        .collect();
+        MatcherPrioridad::nuevo(&palabras, 30, 20, (100, 50, 10)).unwrap()
+    }
+
+    #[test]
+    fn cada_palabra_cuenta_una_vez() {
+        let m = matcher();
+        assert_eq!(m.puntaje("ruido ruido ruido"), 20);
+        assert_eq!(m.puntaje("ajuste y revision"), 25);
+        assert_eq!(m.puntaje("sin palabras clave"), 0);
+    }
+
+    #[test]
+    fn umbrales() {
+        let m = matcher();
+        assert_eq!(m.prioridad("fuego en tablero"), 100);
+        assert_eq!(m.prioridad("ruido en motor"), 50);
+        assert_eq!(m.prioridad("ajuste menor"), 10);
+        assert_eq!(m.prioridad("ajuste y ruido"), 100);
+    }
+
+    #[test]
+    fn palabras_solapadas_y_subcadenas() {
+        let palabras = vec![
+            ("fallas".to_string(), 5),
+            ("falla".to_string(), 7),
+            ("alla".to_string(), 11),
+        ];
+        let m = MatcherPrioridad::nuevo(&palabras, 30, 20, (100, 50, 10)).unwrap();
+        assert_eq!(m.puntaje("fallas"), 23);
+        assert_eq!(m.puntaje("xfallax"), 18);
+    }
+}